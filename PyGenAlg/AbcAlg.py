@@ -6,11 +6,13 @@
 
 import sys
 import math
+import time
 import random
 from copy import deepcopy
 
 from GenAlgOps import int_rouletteWheelSelection
 from AbcAlgOps import FoodSource, generateTestSolution
+import ParallelEval
 
 # https://en.wikipedia.org/wiki/Artificial_bee_colony_algorithm
 # https://github.com/rwuilbercq/Hive/blob/master/Hive/Hive.py
@@ -29,6 +31,11 @@ class AbcAlg:
 		self.removeDupes   = kwargs.get( 'removeDupes', False )
 		# optional params to be passed to functions
 		self.params           = kwargs.get( 'params', {} )
+		# optional concurrent.futures executor for fitness evaluation
+		self.fitnessExecutor  = kwargs.get( 'fitnessExecutor', None )
+		self.fitnessChunkSize = kwargs.get( 'fitnessChunkSize', None )
+		# optional TelemetrySink, gets one record per generation
+		self.telemetry        = kwargs.get( 'telemetry', None )
 
 		if( (self.minOrMax!='min') and (self.minOrMax!='max') ):
 			raise ValueError('minOrMax must be min or max')
@@ -47,6 +54,7 @@ class AbcAlg:
 		self.min_fitness = sys.float_info.max
 		self.max_fitness = -sys.float_info.max
 		self.is_sorted = False
+		self.generation = 0
 
 	# maybe this should be __repr__ or __str__?
 	def describe(self):
@@ -119,28 +127,92 @@ class AbcAlg:
 				pop[idx] = t
 		self.is_sorted = True
 
+	# calc fitness for a list of chromos or food-sources (sets .fitness)
+	# : with a fitnessExecutor, they are all sent to the worker pool at once
+	def int_evaluate( self, items ):
+		if( self.fitnessExecutor is None ):
+			for x in items:
+				x.fitness = x.calcFitness()
+			return
+		chromos = [ getattr(x,'chromo',x) for x in items ]
+		fits = ParallelEval.evaluate( self.fitnessExecutor, self.chromoClass,
+			chromos, self.fitnessChunkSize )
+		for i in range(len(items)):
+			items[i].fitness = fits[i]
+
+	# create test-solutions for the given (food-source,other) index pairs,
+	# evaluate them and let each food-source decide whether to keep it
+	# : without an executor, this is done one bee at a time (so later bees
+	#   see earlier updates); with one, all test-solutions are built from the
+	#   current food-sources and evaluated together
+	def int_forage( self, pairs ):
+		pop = self.population
+		temps = []
+		if( self.fitnessExecutor is None ):
+			for i,other in pairs:
+				temp = generateTestSolution( pop[i], pop[other] )
+				pop[i].testSolution( temp )
+				temps.append( temp )
+		else:
+			for i,other in pairs:
+				temps.append( generateTestSolution( pop[i], pop[other], evaluate=False ) )
+			self.int_evaluate( temps )
+			for k in range(len(pairs)):
+				pop[pairs[k][0]].testSolution( temps[k] )
+		return temps
+
+	# everything needed to pick up a run where it left off, including
+	# the trial counters (see IoOps.saveCheckpoint)
+	def getState(self):
+		srcs = [ (list(src.chromo.data),src.fitness,src.counter) for src in self.population ]
+		return { 'algorithm':'AbcAlg', 'population':srcs,
+			'min_fitness':self.min_fitness, 'max_fitness':self.max_fitness,
+			'sum_fitness':getattr(self,'sum_fitness',0), 'generation':self.generation }
+
+	def setState( self, state ):
+		if( state.get('algorithm') != 'AbcAlg' ):
+			raise ValueError('state is not from an AbcAlg')
+		proto = self.chromoClass()
+		pop = []
+		for data,fit,counter in state['population']:
+			src = FoodSource( chromoClass=self.chromoClass, minOrMax=self.minOrMax,
+				chromoData=proto.viewOf(list(data),fit) )
+			src.fitness = fit
+			src.counter = counter
+			pop.append( src )
+		self.population = pop
+		self.min_fitness = state['min_fitness']
+		self.max_fitness = state['max_fitness']
+		self.sum_fitness = state['sum_fitness']
+		self.generation = state['generation']
+		self.is_sorted = False
+
 	def evolve( self, iters ):
 		pop = self.population
 
-		# initial calc of fitness for food sources
-		for i in range(self.population_sz):
-			pop[i].calcFitness()
+		# initial calc of fitness for food sources (e.g. not needed after setState)
+		self.int_evaluate( [ src for src in pop if src.fitness is None ] )
 
 		# now the main loop
 		for iter in range(iters):
+			t_gen = time.time()
 			# reset stats for roulette wheel search
 			self.sum_fitness = 0
 			self.min_fitness = sys.float_info.max
 			self.max_fitness = -sys.float_info.max
 
 			# for each employee-bee, do the local-search update process
+			pairs = []
 			for i in range(self.population_sz):
 				other = random.randrange(0,self.population_sz-1)
 				# TODO: check that other!=i (not same bee selected)
+				pairs.append( (i,other) )
 
-				# create new chromo from current and other food-sources
-				temp = generateTestSolution( pop[i], pop[other] )
-				pop[i].testSolution( temp )
+			# create new chromo from current and other food-sources
+			temps = self.int_forage( pairs )
+			for k in range(len(pairs)):
+				i = pairs[k][0]
+				temp = temps[k]
 				if( temp.fitness > pop[i].fitness ):
 					self.sum_fitness = self.sum_fitness + temp.fitness
 				else:
@@ -153,22 +225,31 @@ class AbcAlg:
 					self.min_fitness = temp.fitness
 
 			# for each onlooker-bee
+			pairs = []
 			for i in range(self.onlooker_sz):
 				# choose initial food-source
 				i = int_rouletteWheelSelection( self )
 				# choose 2nd food-source
 				other = random.randrange(0,self.population_sz-1)
+				pairs.append( (i,other) )
 
-				# create new chromo from current and other food-sources
-				temp = generateTestSolution( pop[i], pop[other] )
-				pop[i].testSolution( temp )
+			# create new chromo from current and other food-sources
+			self.int_forage( pairs )
 
 			# check for 'bad' food sources and send out scouts
+			scouts = []
 			for i in range(self.population_sz):
 				if( pop[i].counter > self.trial_limit ):
 					temp = FoodSource( chromoClass=self.chromoClass, minOrMax=self.minOrMax )
 					pop[i] = temp
-					pop[i].calcFitness()
+					scouts.append( temp )
+			self.int_evaluate( scouts )
+			self.generation = self.generation + 1
+
+			if( self.telemetry is not None ):
+				self.telemetry.logGeneration( 'AbcAlg', self.generation,
+					[ src.fitness for src in pop ], self.minOrMax,
+					scouts=len(scouts), gen_time=time.time()-t_gen )
 
 			# show a progress report?
 			if( self.showBest > 0 ):
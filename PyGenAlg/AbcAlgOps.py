@@ -5,7 +5,6 @@
 #
 
 import random
-from copy import deepcopy
 
 # TODO: create a class method .dcopy() to do a deepcopy of data
 #       but leave pointers to other arrays, etc
@@ -54,6 +53,7 @@ class FoodSource(object):
 				for i in range(self.chromo_sz):
 					self.chromo.data[i] = temp.data[i]
 				self.chromo.fitness = temp.fitness
+				self.fitness = temp.fitness
 				self.counter = 0
 			else:
 				self.counter = self.counter + 1
@@ -64,6 +64,7 @@ class FoodSource(object):
 				for i in range(self.chromo_sz):
 					self.chromo.data[i] = temp.data[i]
 				self.chromo.fitness = temp.fitness
+				self.fitness = temp.fitness
 				self.counter = 0
 			else:
 				self.counter = self.counter + 1
@@ -79,8 +80,9 @@ class FoodSource(object):
 	def unpackData( self, data ):
 		return self.chromo.unpackData(data)
 
-def generateTestSolution( first, second ):
-	temp = deepcopy( first.chromo )
+# : with evaluate=False, the caller is responsible for setting temp.fitness
+def generateTestSolution( first, second, evaluate=True ):
+	temp = first.chromo.spawnChild()
 	# which index to modify?
 	dim = random.randint(0,first.chromo_sz-1)
 
@@ -98,6 +100,7 @@ def generateTestSolution( first, second ):
 	elif( temp.data[dim] < rng[0] ):
 		temp.data[dim] = rng[0]
 
-	temp.fitness = temp.calcFitness()
+	if( evaluate ):
+		temp.fitness = temp.calcFitness()
 
 	return temp
@@ -0,0 +1,185 @@
+#
+# whole-generation crossover/mutation kernels for array-backed populations
+#
+# these are drop-in alternatives for crossoverFcn, mutationFcn and
+# pureMutationFcn when GenAlg is created with storage='array'; instead of
+# building one child (or pair of children) per call, each call builds
+# every child that is needed for the generation with NumPy
+#
+# the batch selection functions can be given as selectionFcn (or
+# pureMutationSelectionFcn) and return all parent indices at once
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+import GenAlgOps
+
+# mark a function as a whole-generation kernel (GenAlg checks for this)
+def arrayKernel( fcn ):
+	fcn.arrayKernel = True
+	return fcn
+
+def isArrayKernel( fcn ):
+	return getattr( fcn, 'arrayKernel', False )
+
+#
+# Batch selection functions
+# : called as fcn( gaMgr, num ) and return two arrays with num parent
+#   indices each; these also work with storage='list'
+#
+
+def int_fitnessVector( gaMgr ):
+	pop = gaMgr.population
+	if( getattr(gaMgr,'storage','list') == 'array' ):
+		return pop.fitness[:pop.count]
+	return np.array( GenAlgOps.int_populationFitness(gaMgr), dtype=np.float64 )
+
+@arrayKernel
+def tournamentSelectionBatch( gaMgr, num ):
+	""" batch selection-function for tournament selection """
+	# NOTE: contestants are drawn with replacement (like int_tournamentSelection0)
+	k = gaMgr.params.get( 'tournamentSize', 3 )
+	fit = int_fitnessVector( gaMgr )
+	idx = np.random.randint( 0, len(fit), size=(num,2,k) )
+	if( gaMgr.minOrMax == 'max' ):
+		win = np.argmax( fit[idx], axis=2 )
+	else:
+		win = np.argmin( fit[idx], axis=2 )
+	winners = np.take_along_axis( idx, win[:,:,None], axis=2 )[:,:,0]
+	return winners[:,0], winners[:,1]
+
+# draw 2*num indices from a cumulative-weight table
+def int_drawBatch( table, num ):
+	table = np.asarray( table )
+	value = np.random.random( (2,num) ) * table[-1]
+	idx = np.minimum( np.searchsorted( table, value, side='right' ), len(table)-1 )
+	return idx[0], idx[1]
+
+@arrayKernel
+def rouletteWheelSelectionBatch( gaMgr, num ):
+	""" batch selection-function for roulette-wheel selection """
+	return int_drawBatch( GenAlgOps.rouletteTable(gaMgr), num )
+
+@arrayKernel
+def aliasSelectionBatch( gaMgr, num ):
+	""" batch selection-function for fitness-proportional selection using an alias table """
+	prob,alias = GenAlgOps.aliasTable( gaMgr )
+	prob  = np.asarray( prob )
+	alias = np.asarray( alias )
+	idx = np.random.randint( 0, len(prob), size=(2,num) )
+	keep = np.random.random( (2,num) ) < prob[idx]
+	idx = np.where( keep, idx, alias[idx] )
+	return idx[0], idx[1]
+
+@arrayKernel
+def rankSelectionBatch( gaMgr, num ):
+	""" batch selection-function that uses rank-selection """
+	gaMgr.ensureSorted()
+	return int_drawBatch( GenAlgOps.rankTable(gaMgr), num )
+
+#
+# Crossover kernels
+# : called as fcn( gaMgr, num, params ) and return a (num x chromo_sz)
+#   array of children; parents are drawn with gaMgr.selectParents()
+#
+
+def int_crossover1( gaMgr, npairs ):
+	pop = gaMgr.population
+	idx1,idx2 = gaMgr.selectParents( npairs )
+	mothers = pop.data[idx1]
+	fathers = pop.data[idx2]
+	# one cut-point per pair, child gets mother[:cut] and father[cut:]
+	cut = np.random.randint( 0, pop.chromo_sz, size=npairs )
+	mask = np.arange( pop.chromo_sz )[None,:] >= cut[:,None]
+	return mothers, fathers, mask
+
+def int_crossover2( gaMgr, npairs ):
+	pop = gaMgr.population
+	sz = pop.chromo_sz
+	idx1,idx2 = gaMgr.selectParents( npairs )
+	mothers = pop.data[idx1]
+	fathers = pop.data[idx2]
+	# two distinct cut-points per pair, child gets father[cut1:cut2]
+	a = np.random.randint( 0, sz, size=npairs )
+	b = ( a + np.random.randint( 1, sz, size=npairs ) ) % sz
+	lo = np.minimum( a, b )
+	hi = np.maximum( a, b )
+	col = np.arange( sz )[None,:]
+	mask = (col >= lo[:,None]) & (col < hi[:,None])
+	return mothers, fathers, mask
+
+@arrayKernel
+def crossover11Array( gaMgr, num, params={} ):
+	""" array-kernel crossover that uses 1 crossover-point and provides 1 child per pair """
+	mothers,fathers,mask = int_crossover1( gaMgr, num )
+	return np.where( mask, fathers, mothers )
+
+@arrayKernel
+def crossover12Array( gaMgr, num, params={} ):
+	""" array-kernel crossover that uses 1 crossover-point and provides 2 children per pair """
+	mothers,fathers,mask = int_crossover1( gaMgr, (num+1)//2 )
+	children = np.concatenate( (np.where(mask,fathers,mothers), np.where(mask,mothers,fathers)) )
+	return children[:num]
+
+@arrayKernel
+def crossover21Array( gaMgr, num, params={} ):
+	""" array-kernel crossover that uses 2 crossover-points and provides 1 child per pair """
+	mothers,fathers,mask = int_crossover2( gaMgr, num )
+	return np.where( mask, fathers, mothers )
+
+@arrayKernel
+def crossover22Array( gaMgr, num, params={} ):
+	""" array-kernel crossover that uses 2 crossover-points and provides 2 children per pair """
+	mothers,fathers,mask = int_crossover2( gaMgr, (num+1)//2 )
+	children = np.concatenate( (np.where(mask,fathers,mothers), np.where(mask,mothers,fathers)) )
+	return children[:num]
+
+#
+# Mutation kernels
+# : called as fcn( gaMgr, children, params ) and modify the (N x chromo_sz)
+#   children array in place (and return it); new values are drawn
+#   uniformly from each gene's dataRange
+#
+
+def int_mutateMask( gaMgr, children, mask ):
+	rand = gaMgr.population.randomRows( children.shape[0] )
+	children[mask] = rand[mask]
+	return children
+
+@arrayKernel
+def mutateNoneArray( gaMgr, children, params={} ):
+	""" array-kernel mutation that does NO mutation """
+	return children
+
+@arrayKernel
+def mutateAllArray( gaMgr, children, params={} ):
+	""" array-kernel mutation that overwrites all chromos in every child """
+	children[:] = gaMgr.population.randomRows( children.shape[0] )
+	return children
+
+@arrayKernel
+def mutateFewArray( gaMgr, children, params={} ):
+	""" array-kernel mutation that overwrites a few chromos in every child """
+	num = params.get( 'mutateNum', 1 )
+	n,sz = children.shape
+	if( num >= sz ):
+		mask = np.ones( (n,sz), dtype=bool )
+	else:
+		# pick num distinct genes per row
+		keys = np.random.random( (n,sz) )
+		cols = np.argpartition( keys, num, axis=1 )[:,:num]
+		mask = np.zeros( (n,sz), dtype=bool )
+		mask[ np.arange(n)[:,None], cols ] = True
+	return int_mutateMask( gaMgr, children, mask )
+
+@arrayKernel
+def mutateRandomArray( gaMgr, children, params={} ):
+	""" array-kernel mutation that potentially overwrites every chromo based on per-chromo pct """
+	pct = params.get( 'chromoMutationPct', 0.1 )
+	mask = np.random.random( children.shape ) <= pct
+	return int_mutateMask( gaMgr, children, mask )
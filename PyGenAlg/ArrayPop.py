@@ -0,0 +1,182 @@
+#
+# an array-backed population (mostly used internally by GenAlg)
+#
+# the whole population lives in one 2-D NumPy array (pop_sz x chromo_sz)
+# plus a 1-D fitness vector; chromos handed out by this class are
+# lightweight views over one row of the array
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# NOTE: all-int chromos are stored as int64, anything else is stored
+#       as float64 (so int genes in a mixed chromo will read back as floats);
+#       anything that packs a view's data (toBytes, packData, the cache,
+#       dedup and the parallel wire formats) goes through
+#       BaseChromo.dataValues(), which turns those genes back into ints
+
+class ArrayPopulation(object):
+	def __init__( self, **kwargs ):
+
+		self.chromoClass   = kwargs.get( 'chromoClass', None )
+		self.population_sz = kwargs.get( 'size', 10 )
+		# prototype chromo, used for metadata and to create views
+		self.proto         = kwargs.get( 'proto', None )
+
+		if( np is None ):
+			raise ImportError('array-backed populations require numpy')
+
+		if( self.proto is None ):
+			self.proto = self.chromoClass()
+		proto = self.proto
+		self.chromo_sz = proto.chromo_sz
+
+		if( all( (tp is int) for tp in proto.dataType ) ):
+			self.dtype = np.int64
+		else:
+			self.dtype = np.float64
+
+		# per-gene bounds and types (for random init and array kernels)
+		self.range_lo = np.array( [ r[0] for r in proto.dataRange ], dtype=np.float64 )
+		self.range_hi = np.array( [ r[1] for r in proto.dataRange ], dtype=np.float64 )
+		self.int_cols = np.array( [ (tp is int) for tp in proto.dataType ], dtype=bool )
+
+		# current generation ...
+		self.data    = np.zeros( (self.population_sz,self.chromo_sz), dtype=self.dtype )
+		self.fitness = np.full( self.population_sz, np.nan )
+		# ... and a spare buffer to build the next generation in
+		self.next_data    = np.zeros_like( self.data )
+		self.next_fitness = np.full( self.population_sz, np.nan )
+
+		# number of valid rows
+		self.count = 0
+
+	def __len__( self ):
+		return self.count
+
+	def __iter__( self ):
+		for i in range(self.count):
+			yield self.view( i )
+
+	def __getitem__( self, idx ):
+		if( isinstance(idx,slice) ):
+			return [ self.view(i) for i in range(*idx.indices(self.count)) ]
+		if( idx < 0 ):
+			idx = idx + self.count
+		if( (idx < 0) or (idx >= self.count) ):
+			raise IndexError('population index out of range')
+		return self.view( idx )
+
+	# chromo object whose data is a view of row idx
+	# : writes to view.data go straight into the array, but
+	#   view.fitness is a snapshot (GenAlg writes fitness into the vector)
+	def view( self, idx ):
+		fit = self.fitness[idx]
+		if( fit != fit ):
+			fit = None
+		else:
+			fit = float(fit)
+		return self.proto.viewOf( self.data[idx], fit )
+
+	def randomRows( self, num ):
+		lo = self.range_lo
+		hi = self.range_hi
+		rows = np.random.uniform( lo, hi, size=(num,self.chromo_sz) )
+		if( self.int_cols.any() ):
+			ints = np.floor( np.random.uniform( lo, hi+1, size=(num,self.chromo_sz) ) )
+			rows[:,self.int_cols] = np.minimum( ints, hi )[:,self.int_cols]
+		return rows
+
+	def randomize( self ):
+		self.data[:] = self.randomRows( self.population_sz )
+		self.fitness[:] = np.nan
+		self.count = self.population_sz
+
+	def clear( self ):
+		self.fitness[:] = np.nan
+		self.count = 0
+
+	# items can be a list of chromos (any object with .data and .fitness)
+	# or a 2-D array of not-yet-evaluated rows
+	def int_store( self, data, fitness, start, items ):
+		k = start
+		if( isinstance(items,np.ndarray) ):
+			n = items.shape[0]
+			data[k:k+n] = items
+			fitness[k:k+n] = np.nan
+			return k + n
+		for c in items:
+			data[k] = c.data
+			if( c.fitness is None ):
+				fitness[k] = np.nan
+			else:
+				fitness[k] = c.fitness
+			k = k + 1
+		return k
+
+	# append chromos to the population
+	def extend( self, items ):
+		if( (self.count+len(items)) > self.population_sz ):
+			return -1
+		self.count = self.int_store( self.data, self.fitness, self.count, items )
+		return 0
+
+	# replace the whole population with one or more lists/arrays of chromos
+	# : items may be views into the current buffer (e.g. elites), so
+	#   we build the new generation in the spare buffer and then swap
+	def replace( self, *parts ):
+		num = 0
+		for items in parts:
+			items = items[:self.population_sz-num]
+			num = self.int_store( self.next_data, self.next_fitness, num, items )
+		self.next_fitness[num:] = np.nan
+		self.data, self.next_data = self.next_data, self.data
+		self.fitness, self.next_fitness = self.next_fitness, self.fitness
+		self.count = num
+
+	# insert one chromo at row pos, shifting the rows below it down
+	# : if the population is full, the last row drops off the end
+	def insert( self, pos, item ):
+		n = min( self.count+1, self.population_sz )
+		self.data[pos+1:n] = self.data[pos:n-1]
+		self.fitness[pos+1:n] = self.fitness[pos:n-1]
+		self.int_store( self.data, self.fitness, pos, [item] )
+		self.count = n
+
+	def unevaluated( self ):
+		return np.flatnonzero( np.isnan(self.fitness[:self.count]) )
+
+	def bestIndex( self, minOrMax ):
+		if( minOrMax == 'max' ):
+			return int( np.argmax(self.fitness[:self.count]) )
+		return int( np.argmin(self.fitness[:self.count]) )
+
+	def int_sortKey( self, start, reverse ):
+		if( reverse ):
+			return -self.fitness[start:self.count]
+		return self.fitness[start:self.count]
+
+	def int_reorder( self, order, start=0 ):
+		n = self.count
+		self.data[start:n] = self.data[start:n][order]
+		self.fitness[start:n] = self.fitness[start:n][order]
+
+	# sort in place, so anyone holding this object sees the new order
+	# : rows before 'start' are left alone
+	def sort( self, reverse=False, start=0 ):
+		order = np.argsort( self.int_sortKey(start,reverse), kind='stable' )
+		self.int_reorder( order, start )
+
+	# move the best k rows to the front (in order), leave the rest unsorted
+	def partialSort( self, k, reverse=False ):
+		key = self.int_sortKey( 0, reverse )
+		if( k >= len(key) ):
+			return self.sort( reverse )
+		part = np.argpartition( key, k-1 )
+		top = part[:k]
+		top = top[ np.argsort( key[top], kind='stable' ) ]
+		self.int_reorder( np.concatenate( (top,part[k:]) ) )
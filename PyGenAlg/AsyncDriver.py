@@ -0,0 +1,136 @@
+#
+# asynchronous (master-worker) steady-state evolution for GenAlg
+#
+# keeps N fitness evaluations in flight on a concurrent.futures executor;
+# as soon as one finishes, its child is inserted into the population
+# (GenAlg.insertChild) and a replacement is bred and submitted, so there
+# is no generational barrier for slow fitness functions to hold up
+#
+#    drv = AsyncDriver( ga, workers=8 )
+#    drv.run( 10000 )
+#    print( drv )
+#    drv.close()
+#
+# chromos are sent to the workers the same way as in ParallelEval, so the
+# chromo class must be importable by the worker processes
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+import os
+import time
+import concurrent.futures
+
+import ParallelEval
+
+class AsyncDriver(object):
+	def __init__( self, gaMgr, **kwargs ):
+		self.gaMgr     = gaMgr
+		# any concurrent.futures executor; default is a local process pool
+		self.executor  = kwargs.get( 'executor', None )
+		# size of the default pool; with your own executor, give its size
+		# here too (used for inFlight and utilization)
+		self.workers   = kwargs.get( 'workers', os.cpu_count() or 1 )
+		# evaluations kept in flight (default is 2 per worker)
+		self.inFlight  = kwargs.get( 'inFlight', None )
+		# children sent to a worker in each task
+		self.chunkSize = kwargs.get( 'chunkSize', 1 )
+
+		if( self.workers < 1 ):
+			raise ValueError('workers must be >= 1')
+		if( self.inFlight is None ):
+			self.inFlight = 2 * self.workers
+		if( (self.inFlight < 1) or (self.chunkSize < 1) ):
+			raise ValueError('inFlight and chunkSize must be >= 1')
+
+		self.own_executor = False
+		if( self.executor is None ):
+			self.executor = concurrent.futures.ProcessPoolExecutor( max_workers=self.workers )
+			self.own_executor = True
+
+		# stats
+		self.submitted = 0
+		self.completed = 0
+		self.inserted  = 0
+		self.busy_time = 0.0
+		self.wall_time = 0.0
+
+	def __str__( self ):
+		return 'AsyncDriver: workers=%d in-flight=%d evals=%d inserted=%d utilization=%0.1f%%' \
+			% (self.workers,self.inFlight,self.completed,self.inserted,100.0*self.utilization())
+
+	# fraction of the workers' time (while run() was active) spent on fitness evaluations
+	def utilization( self ):
+		if( self.wall_time <= 0 ):
+			return 0.0
+		return self.busy_time / ( self.wall_time * self.workers )
+
+	def close( self ):
+		if( self.own_executor ):
+			self.executor.shutdown()
+			self.own_executor = False
+
+	# breed and submit one task; returns False if no children could be bred
+	def int_submit( self, pending ):
+		ga = self.gaMgr
+		ga.int_steadyRollover()
+		children = ga.breedChildren( self.chunkSize )
+		if( len(children) == 0 ):
+			return False
+		ga.steady_count = ga.steady_count + len(children)
+		self.submitted = self.submitted + len(children)
+		# anything already in the fitness-cache goes straight in
+		cache = ga.fitnessCache
+		if( cache is not None ):
+			todo = []
+			for c in children:
+				fit = cache.lookup( c.dataKey() )
+				if( fit is None ):
+					todo.append( c )
+				else:
+					c.fitness = fit
+					self.int_insert( c )
+			children = todo
+		if( len(children) > 0 ):
+			buf = ParallelEval.packChunk( children )
+			fut = self.executor.submit( ParallelEval.evalChunkTimed, ga.chromoClass, buf )
+			pending[fut] = children
+		return True
+
+	def int_insert( self, child ):
+		if( self.gaMgr.insertChild(child) >= 0 ):
+			self.inserted = self.inserted + 1
+
+	# run until numEvals more children have been bred (and evaluated,
+	# or found in the fitness-cache)
+	# : returns the number of children inserted into the population
+	def run( self, numEvals ):
+		ga = self.gaMgr
+		ga.calcFitness()
+		ga.sortPopulation()
+		t0 = time.time()
+		inserted = self.inserted
+		target = self.submitted + numEvals
+		pending = {}
+		while( True ):
+			while( (self.submitted < target) and (len(pending) < self.inFlight) ):
+				if( not self.int_submit(pending) ):
+					break
+			if( len(pending) == 0 ):
+				break
+			done,not_done = concurrent.futures.wait( pending, return_when=concurrent.futures.FIRST_COMPLETED )
+			for fut in done:
+				children = pending.pop( fut )
+				fits,busy = fut.result()
+				self.busy_time = self.busy_time + busy
+				self.completed = self.completed + len(children)
+				# (so evalBudget, EvolveResult and telemetry see async work)
+				ga.num_evals = ga.num_evals + len(fits)
+				for k in range(len(children)):
+					c = children[k]
+					c.fitness = fits[k]
+					if( ga.fitnessCache is not None ):
+						ga.fitnessCache.store( c.dataKey(), c.fitness )
+					self.int_insert( c )
+		self.wall_time = self.wall_time + time.time() - t0
+		return self.inserted - inserted
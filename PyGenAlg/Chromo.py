@@ -3,19 +3,20 @@
 #
 # you MUST override calcFitness()
 #
+# you MAY also provide a classmethod calcFitnessBatch(data), where data
+# is a 2-D float64 NumPy array (one chromo per row), that returns a vector of
+# fitness values; GenAlg will then evaluate a whole generation at once
+#
 # Copyright (C) 2018-2020, John Pormann, Duke University Libraries
 #
 
 # TODO: add support for double, unsigned-int, byte, etc.
 
 import random
-from copy import deepcopy
+from copy import copy
 import struct
 import base64
 
-# TODO: create a class method .dcopy() to do a deepcopy of data
-#       but leave pointers to other arrays, etc
-
 class BaseChromo(object):
 	def __init__( self, **kwargs ):
 
@@ -64,6 +65,8 @@ class BaseChromo(object):
 			elif( tp is float ):
 				fmt = fmt + 'f'
 		self.struct_fmt = fmt
+		# same, but with floats as doubles (see dataKey)
+		self.key_fmt = fmt.replace( 'f', 'd' )
 
 		if( in_data != None ):
 			self.data = in_data
@@ -95,23 +98,59 @@ class BaseChromo(object):
 	def getFitness( self ):
 		return self.fitness
 
+	# create a lightweight chromo that shares all of this chromo's
+	# metadata (dataType, dataRange, struct_fmt, etc.) but points at
+	# the given data, e.g. one row of an array-backed population
+	# : no __init__ is run, so no random data is generated
+	def viewOf( self, data, fitness=None ):
+		view = self.__class__.__new__( self.__class__ )
+		view.__dict__.update( self.__dict__ )
+		view.data = data
+		view.fitness = fitness
+		return view
+
+	# fast replacement for deepcopy() when creating a child for
+	# crossover/mutation: only 'data' is copied, everything else
+	# (dataType, dataRange, struct_fmt, user-attached objects) is shared
+	# : override this if a subclass has per-chromo state that must not be shared
+	def spawnChild( self ):
+		return self.viewOf( copy(self.data) )
+
 	# NEED TO OVERRIDE
 	def calcFitness( self ):
 		self.fitness = None
 
+	# OPTIONAL OVERRIDE (as a classmethod) .. see top of file
+	calcFitnessBatch = None
+
 	def __str__( self ):
 		txt = 'data=' + ','.join( str(i) for i in self.data ) \
 				+ ' .. fit=' + str(self.fitness)
 		return txt
 
+	# the data as a list of plain values, with int genes as ints
+	# : views of a mixed int/float array-backed population hold float64
+	#   rows, so their int genes are rounded back to int here
+	def dataValues(self):
+		if( isinstance(self.data,list) ):
+			return self.data
+		return [ (int(round(v)) if (tp is int) else float(v)) for tp,v in zip(self.dataType,self.data) ]
+
 	# pack just the data into a text/base64 format
 	# format is:  fmt-string==base64data==
 	# where fmt-string is the struct.pack format string
 	# based on the Chromo's dataType entries
 	def toBytes(self):
-		# TODO: could try to memoize this, but since we use deepcopy elsewhere
-		#       we'd need to manually zero it out for every child-obj created
-		return struct.pack( self.struct_fmt, *self.data )
+		# TODO: could try to memoize this, but children (spawnChild) copy the
+		#       parent's attributes, and mutation changes data in place, so
+		#       the cached bytes would have to be reset on every change
+		return struct.pack( self.struct_fmt, *self.dataValues() )
+	# full-precision packed data (floats as doubles), for telling chromos
+	# apart: FitnessCache keys and duplicate detection
+	# : toBytes packs floats as float32, so chromos that differ only past
+	#   float32 precision would share one key
+	def dataKey(self):
+		return struct.pack( self.key_fmt, *self.dataValues() )
 	def packData(self):
 		# base64encode returns bytes .. convert to str and trim off the b' prefix
 		b64 = str(base64.b64encode( self.toBytes() ))
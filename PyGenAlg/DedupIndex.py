@@ -0,0 +1,91 @@
+#
+# per-GenAlg index of chromos that have already been seen (used by
+# GenAlgOps.disallowDupes)
+#
+# only a 64-bit digest of BaseChromo.dataKey() is kept for each chromo;
+# with window=N, a child is a duplicate if it matches anything from the
+# current generation or the N-1 generations before it
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+import hashlib
+from collections import deque
+
+def digestOf( key ):
+	return int.from_bytes( hashlib.blake2b(key,digest_size=8).digest(), 'little' )
+
+class DedupIndex(object):
+	def __init__( self, **kwargs ):
+		# number of generations to remember (1 = current generation only)
+		self.window = kwargs.get( 'window', 1 )
+
+		if( self.window < 1 ):
+			raise ValueError('DedupIndex window must be >= 1')
+
+		# newest generation is last
+		self.gens = deque( [ set() ] )
+		# members carried into the current generation (e.g. elites),
+		# these are allowed once even though they were seen before
+		self.carried = set()
+
+		# stats
+		self.checked     = 0
+		self.dupes       = 0
+		self.gen_checked = 0
+		self.gen_dupes   = 0
+
+	def __len__( self ):
+		return sum( len(s) for s in self.gens )
+
+	def __str__( self ):
+		return 'DedupIndex: window=%d size=%d checked=%d dupes=%d (%0.1f%%)' \
+			% (self.window,len(self),self.checked,self.dupes,100.0*self.dupeRate())
+
+	# start a new generation
+	# : carry is a list of chromos that move into the new generation as-is
+	def newGeneration( self, carry=[] ):
+		self.gens.append( set() )
+		while( len(self.gens) > self.window ):
+			self.gens.popleft()
+		self.carried = set( digestOf(c.dataKey()) for c in carry )
+		self.gen_checked = 0
+		self.gen_dupes = 0
+
+	# returns True if chromo has not been seen (and remembers it)
+	def check( self, chromo ):
+		h = digestOf( chromo.dataKey() )
+		current = self.gens[-1]
+		self.checked = self.checked + 1
+		self.gen_checked = self.gen_checked + 1
+		dupe = ( h in current )
+		if( (not dupe) and (h not in self.carried) ):
+			for s in self.gens:
+				if( h in s ):
+					dupe = True
+					break
+		if( dupe ):
+			self.dupes = self.dupes + 1
+			self.gen_dupes = self.gen_dupes + 1
+			return False
+		self.carried.discard( h )
+		current.add( h )
+		return True
+
+	def dupeRate( self ):
+		if( self.checked == 0 ):
+			return 0.0
+		return float(self.dupes) / self.checked
+
+	def genDupeRate( self ):
+		if( self.gen_checked == 0 ):
+			return 0.0
+		return float(self.gen_dupes) / self.gen_checked
+
+	def clear( self ):
+		self.gens = deque( [ set() ] )
+		self.carried = set()
+		self.checked = 0
+		self.dupes = 0
+		self.gen_checked = 0
+		self.gen_dupes = 0
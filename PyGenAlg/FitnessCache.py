@@ -0,0 +1,85 @@
+#
+# a bounded fitness cache (memoization) for GenAlg
+#
+# keys are BaseChromo.dataKey() (the packed data, with float genes at
+# full precision), values are fitness values; when full, the
+# least-recently-used entry is evicted
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+import os
+import pickle
+from collections import OrderedDict
+
+class FitnessCache(object):
+	def __init__( self, **kwargs ):
+		self.max_sz   = kwargs.get( 'size', 100000 )
+		# optional file to load from now (and save to with save())
+		self.filename = kwargs.get( 'filename', None )
+
+		if( self.max_sz <= 0 ):
+			raise ValueError('FitnessCache size must be >= 1')
+
+		self.cache = OrderedDict()
+
+		# stats
+		self.hits      = 0
+		self.misses    = 0
+		self.evictions = 0
+
+		if( (self.filename is not None) and os.path.isfile(self.filename) ):
+			self.load( self.filename )
+
+	def __len__( self ):
+		return len(self.cache)
+
+	def __str__( self ):
+		return 'FitnessCache: size=%d/%d hits=%d misses=%d evictions=%d' \
+			% (len(self.cache),self.max_sz,self.hits,self.misses,self.evictions)
+
+	# returns the cached fitness value, or None if not present
+	def lookup( self, key ):
+		fit = self.cache.get( key, None )
+		if( fit is None ):
+			self.misses = self.misses + 1
+		else:
+			self.hits = self.hits + 1
+			self.cache.move_to_end( key )
+		return fit
+
+	def store( self, key, fitness ):
+		cache = self.cache
+		cache[key] = fitness
+		cache.move_to_end( key )
+		while( len(cache) > self.max_sz ):
+			cache.popitem( last=False )
+			self.evictions = self.evictions + 1
+
+	def hitRate( self ):
+		total = self.hits + self.misses
+		if( total == 0 ):
+			return 0.0
+		return float(self.hits) / total
+
+	def clear( self ):
+		self.cache = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	# persist the cache between runs
+	# : entries are written oldest-to-newest so LRU order is kept
+	def save( self, filename=None ):
+		if( filename is None ):
+			filename = self.filename
+		with open(filename,'wb') as fp:
+			pickle.dump( list(self.cache.items()), fp, protocol=pickle.HIGHEST_PROTOCOL )
+
+	def load( self, filename=None ):
+		if( filename is None ):
+			filename = self.filename
+		with open(filename,'rb') as fp:
+			items = pickle.load( fp )
+		for key,fit in items:
+			self.store( key, fit )
@@ -5,7 +5,10 @@
 #
 
 import random
-from copy import deepcopy
+import bisect
+import itertools
+
+import DedupIndex
 
 #
 # base fcn for testing feasible solutions
@@ -14,28 +17,25 @@ def allowAll( gaMgr, child, newgen=False ):
 	""" feasible-solution-function that allows all values, including duplicates """
 	return True
 
-# TODO: this dedupe func may NOT be re-entrant/parallel-aware
-#       see https://stackoverflow.com/questions/279561/what-is-the-python-equivalent-of-static-variables-inside-a-function
-#       for a class-based approach to 'static' vars
+# dedup state lives on the gaMgr (see DedupIndex), so separate
+# GenAlg objects do not share their history
+def int_dedupIndex( gaMgr ):
+	idx = getattr( gaMgr, 'dedupIndex', None )
+	if( idx is None ):
+		idx = DedupIndex.DedupIndex()
+		gaMgr.dedupIndex = idx
+	return idx
+
 # returns True if child is not a dupe of existing chromo
-fitHistory = {}
-fitDupeCount = 0
 def disallowDupes( gaMgr, child, newgen=False ):
 	""" feasible-solution-function that disallows duplicate values """
-	global fitHistory, fitDupeCount
-	rtn = True   # assume NOT a dupe
+	idx = int_dedupIndex( gaMgr )
 	if( newgen ):
-		#print( 'fitDupeCount=',fitDupeCount )
-		fitHistory = {}
-		fitDupeCount = 0
-	else:
-		strdat = child.toBytes()
-		if( strdat in fitHistory ):
-			rtn = False
-			fitDupeCount = fitDupeCount + 1
-		else:
-			fitHistory[strdat] = 1
-	return rtn
+		# elites are re-checked at the start of each generation, let them through
+		num = getattr( gaMgr, 'elitism', 0 )
+		idx.newGeneration( carry=gaMgr.population[:num] )
+		return True
+	return idx.check( child )
 
 
 #
@@ -45,8 +45,7 @@ def disallowDupes( gaMgr, child, newgen=False ):
 # 1 crossover-point leads to 1 child
 def crossover11( mother, father, params={} ):
 	""" crossover-function that uses 1 crossover-point and provides 1 child """
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	# cutover at what location?
 	idx = random.randint(0,mother.chromo_sz-1)
 	child.data[idx:] = father.data[idx:]
@@ -55,10 +54,8 @@ def crossover11( mother, father, params={} ):
 # 1 crossover-point leads to 2 children
 def crossover12( mother, father, params={} ):
 	""" crossover-function that uses 1 crossover-point and provides 2 children """
-	child1 = deepcopy(mother)
-	child1.fitness = None
-	child2 = deepcopy(father)
-	child2.fitness = None
+	child1 = mother.spawnChild()
+	child2 = father.spawnChild()
 	# cutover at what location?
 	idx = random.randint(0,mother.chromo_sz-1)
 	child1.data[idx:] = father.data[idx:]
@@ -68,8 +65,7 @@ def crossover12( mother, father, params={} ):
 # 2 crossover-points leads to 1 child
 def crossover21( mother, father, params={} ):
 	""" crossover-function that uses 2 crossover-points and provides 1 child """
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	# 2 cutover points
 	(index1,index2) = random.sample( range(mother.chromo_sz), k=2 )
 	# index1 = random.randint(0,mother.chromo_sz-1)
@@ -82,10 +78,8 @@ def crossover21( mother, father, params={} ):
 # 2 crossover-points leads to 2 children
 def crossover22( mother, father, params={} ):
 	""" crossover-function that uses 2 crossover-points and provides 2 children """
-	child1 = deepcopy(mother)
-	child1.fitness = None
-	child2 = deepcopy(father)
-	child2.fitness = None
+	child1 = mother.spawnChild()
+	child2 = father.spawnChild()
 	# 2 cutover points
 	(index1,index2) = random.sample( range(mother.chromo_sz), k=2 )
 	# index1 = random.randint(0,mother.chromo_sz-1)
@@ -100,8 +94,7 @@ def crossover22( mother, father, params={} ):
 def crossoverN1( mother, father, params={} ):
 	""" crossover-function that uses N crossover-points and provides 1 child """
 	npts   = params.get( 'crossoverNumPts', 3 )
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	# N cutover points
 	indicies = sorted( random.sample( range(mother.chromo_sz), k=npts ) )
 	# continue to end of chromo
@@ -121,10 +114,8 @@ def crossoverN1( mother, father, params={} ):
 def crossoverN2( mother, father, params={} ):
 	""" crossover-function that uses N crossover-points and provides 2 children """
 	npts   = params.get( 'crossoverNumPts', 3 )
-	child1 = deepcopy(mother)
-	child1.fitness = None
-	child2 = deepcopy(father)
-	child2.fitness = None
+	child1 = mother.spawnChild()
+	child2 = father.spawnChild()
 	# N cutover points
 	indicies = sorted( random.sample( range(mother.chromo_sz), k=npts ) )
 	# continue to end of chromo
@@ -149,14 +140,12 @@ def crossoverN2( mother, father, params={} ):
 # mutateNone = useful for crossover-only children
 def mutateNone( mother, params={} ):
 	""" mutation-function that does NO mutation """
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	return child
 
 def mutateAll( mother, params={} ):
 	""" mutation-function that overwrites all chromos in a given parent """
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	for i in range(mother.chromo_sz):
 		# TODO: range for variation could be a function of data-range?
 		if( mother.dataType[i] is float ):
@@ -169,8 +158,7 @@ def mutateAll( mother, params={} ):
 def mutateFewSimple( mother, params={} ):
 	""" mutation-function that overwrites a few chromos in a given parent """
 	num = params.get( 'mutateNum', 1 )
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	for k in range(num):
 		i = random.randint(0,mother.chromo_sz-1)
 		# TODO: range for variation could be a function of data-range?
@@ -183,8 +171,7 @@ def mutateFewSimple( mother, params={} ):
 def mutateFew( mother, params={} ):
 	""" mutation-function that overwrites a few chromos in a given parent """
 	num = params.get( 'mutateNum', 1 )
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	chrlist = random.sample( range(mother.chromo_sz), k=num )
 	for i in chrlist:
 		# TODO: range for variation could be a function of data-range?
@@ -197,8 +184,7 @@ def mutateFew( mother, params={} ):
 def mutateRandom( mother, params={} ):
 	""" mutation-function that potentially overwrites every chromo based on per-chromo pct """
 	pct = params.get( 'chromoMutationPct', 0.1 )
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	for i in range(mother.chromo_sz):
 		if( random.uniform(0.0,1.0) <= pct ):
 			# TODO: range for variation could be a function of data-range?
@@ -213,16 +199,31 @@ def mutateRandom( mother, params={} ):
 #  selection functions  #
 # # # # # # # # # # # # #
 
+# is fitness 'a' better than fitness 'b'?
+def int_isBetter( gaMgr, a, b ):
+	if( gaMgr.minOrMax == 'min' ):
+		return a < b
+	return a > b
+
+# two distinct indices from range(n); with replacement if n < 2
+# (e.g. a short generation, see GenAlg shortfallPolicy)
+def int_samplePair( n ):
+	if( n < 2 ):
+		return random.randrange(n), random.randrange(n)
+	(idx1,idx2) = random.sample( range(n), k=2 )
+	return idx1,idx2
+
 def int_tournamentSelection( gaMgr ):
-	k = gaMgr.params.get( 'tournamentSize', 3 )
 	pop = gaMgr.population
-	k_list = random.sample( range(gaMgr.population_sz), k=k )
+	# (a short generation may be smaller than the tournament)
+	k = min( gaMgr.params.get( 'tournamentSize', 3 ), len(pop) )
+	k_list = random.sample( range(len(pop)), k=k )
 	best_i = k_list[0]
 	best_f = pop[best_i].fitness
 	for i in range(1,k):
 		new_i = k_list[i]
 		new_f = pop[new_i].fitness
-		if( new_f > best_f ):
+		if( int_isBetter(gaMgr,new_f,best_f) ):
 			best_i = new_i
 			best_f = new_f
 	return best_i
@@ -230,12 +231,12 @@ def int_tournamentSelection( gaMgr ):
 def int_tournamentSelection0( gaMgr ):
 	k = gaMgr.params.get( 'tournamentSize', 3 )
 	pop = gaMgr.population
-	best_i = random.randrange(gaMgr.population_sz)
+	best_i = random.randrange(len(gaMgr.population))
 	best_f = pop[best_i].fitness
 	for i in range(k-1):
-		new_i = random.randrange(gaMgr.population_sz)
+		new_i = random.randrange(len(gaMgr.population))
 		new_f = pop[new_i].fitness
-		if( new_f > best_f ):
+		if( int_isBetter(gaMgr,new_f,best_f) ):
 			best_i = new_i
 			best_f = new_f
 	return best_i
@@ -259,7 +260,7 @@ def int_rouletteWheelSelection0( gaMgr ):
 			# : make all values "look" positive
 			offset = gaMgr.min_fitness
 		# loop over population
-		for i in range(gaMgr.population_sz):
+		for i in range(len(gaMgr.population)):
 			value = value - (gaMgr.population[i].fitness + offset)
 			if( value < 0 ):
 				rtn = i
@@ -278,7 +279,7 @@ def int_rouletteWheelSelection0( gaMgr ):
 			offset = 0
 			#print( 'min/negative: value=',value,' offset=',offset )
 		# loop over population
-		for i in range(gaMgr.population_sz):
+		for i in range(len(gaMgr.population)):
 			value = value - (gaMgr.population[i].fitness + offset)
 			if( value > 0 ):
 				rtn = i
@@ -286,51 +287,121 @@ def int_rouletteWheelSelection0( gaMgr ):
 
 	# locate the random value based on the weights
 	if( rtn < 0 ):
-		rtn = gaMgr.population_sz - 1
+		rtn = len(gaMgr.population) - 1
 	return rtn
 
-def int_rouletteWheelSelection( gaMgr ):
-	rtn = -1
-
-	# NOTE: xform function must be range-preserving
-	# TODO: could we add an input-argument for xform?
+#
+# cumulative-weight tables for roulette-wheel and rank selection
+# : each table is built once per generation and cached on the gaMgr
+#   (keyed by gaMgr.pop_version), then every draw is a binary search
+# : managers without a selectionTables dict just rebuild it every call
+#
+def int_cachedTable( gaMgr, name, version, buildFcn ):
+	tables = getattr( gaMgr, 'selectionTables', None )
+	if( (tables is None) or (version is None) ):
+		return buildFcn( gaMgr )
+	entry = tables.get( name, None )
+	if( (entry is None) or (entry[0] != version) ):
+		entry = ( version, buildFcn(gaMgr) )
+		tables[name] = entry
+	return entry[1]
+
+def int_populationFitness( gaMgr ):
+	pop = gaMgr.population
+	if( getattr(gaMgr,'storage','list') == 'array' ):
+		return pop.fitness[:pop.count].tolist()
+	return [ x.fitness for x in pop ]
+
+# fitness-proportional weights (all > 0, better fitness == bigger weight)
+# : for 'max', weight = fit (if all fits are positive) else fit-min+1
+# : for 'min', weight = -fit (if all fits are negative) else max-fit+1
+def int_rouletteWeights( gaMgr ):
+	fits = int_populationFitness( gaMgr )
+	if( getattr(gaMgr,'stats_ok',False) ):
+		# already known from calcFitness
+		min_f = gaMgr.min_fitness
+		max_f = gaMgr.max_fitness
+	else:
+		min_f = min( fits )
+		max_f = max( fits )
 
 	if( gaMgr.minOrMax == 'max' ):
-		if( gaMgr.sum_fitness > 0 ):
+		if( min_f > 0 ):
 			# maximize fitness, and fitness values are positive
-			#print( 'max/positive' )
-			xform = lambda x: x
-		else:
-			# maximize fitness, and fitness values are negative
-			#print( 'max/negative', gaMgr.max_fitness, gaMgr.min_fitness )
-			xform = lambda x: x - gaMgr.min_fitness + 1
+			return fits
+		# maximize fitness, and some fitness values are negative/zero
+		return [ f - min_f + 1 for f in fits ]
 	else:
-		# TODO: these are not working yet
-		if( gaMgr.sum_fitness > 0 ):
-			# minimize fitness, and fitness values are positive
-			#print( 'min/positive' )
-			xform = lambda x: gaMgr.max_fitness - x + 1
-		else:
+		if( max_f < 0 ):
 			# minimize fitness, and fitness values are negative
-			#print( 'min/negative' )
-			xform = lambda x: -x
+			return [ -f for f in fits ]
+		# minimize fitness, and some fitness values are positive/zero
+		return [ max_f - f + 1 for f in fits ]
 
-	# select random value
-	value = random.random() * abs(gaMgr.sum_fitness)
+def int_buildRouletteTable( gaMgr ):
+	return list( itertools.accumulate( int_rouletteWeights(gaMgr) ) )
 
-	#print( '     sum(F)=',gaMgr.sum_fitness,' value=',value )
+def rouletteTable( gaMgr ):
+	return int_cachedTable( gaMgr, 'roulette', getattr(gaMgr,'pop_version',None),
+		int_buildRouletteTable )
 
-	# loop over population
-	for i in range(gaMgr.population_sz):
-		value = value - xform(gaMgr.population[i].fitness)
-		if( value < 0 ):
-			rtn = i
-			break
+# rank-weights only depend on the population size
+def int_buildRankTable( gaMgr ):
+	n = len(gaMgr.population)
+	return list( itertools.accumulate( 1.0/(i+1.0) for i in range(n) ) )
 
-	# locate the random value based on the weights
-	if( rtn < 0 ):
-		rtn = gaMgr.population_sz - 1
-	return rtn
+def rankTable( gaMgr ):
+	return int_cachedTable( gaMgr, 'rank', len(gaMgr.population), int_buildRankTable )
+
+# pick one index from a cumulative-weight table
+def int_drawFromTable( table ):
+	value = random.random() * table[-1]
+	return min( bisect.bisect_right( table, value ), len(table)-1 )
+
+def int_rouletteWheelSelection( gaMgr ):
+	return int_drawFromTable( rouletteTable(gaMgr) )
+
+# Walker/Vose alias table: O(n) setup, then O(1) per draw
+# : returns (prob,alias) lists; draw i uniformly, keep it with
+#   probability prob[i], otherwise use alias[i]
+def int_buildAliasTable( gaMgr ):
+	weights = int_rouletteWeights( gaMgr )
+	n = len(weights)
+	total = float( sum(weights) )
+	scaled = [ w*n/total for w in weights ]
+	prob  = [ 1.0 for i in range(n) ]
+	alias = list( range(n) )
+	small = [ i for i in range(n) if scaled[i] < 1.0 ]
+	large = [ i for i in range(n) if scaled[i] >= 1.0 ]
+	while( (len(small) > 0) and (len(large) > 0) ):
+		s = small.pop()
+		l = large.pop()
+		prob[s]  = scaled[s]
+		alias[s] = l
+		scaled[l] = scaled[l] + scaled[s] - 1.0
+		if( scaled[l] < 1.0 ):
+			small.append( l )
+		else:
+			large.append( l )
+	# anything left over (round-off) keeps prob=1.0
+	return prob,alias
+
+def aliasTable( gaMgr ):
+	return int_cachedTable( gaMgr, 'alias', getattr(gaMgr,'pop_version',None),
+		int_buildAliasTable )
+
+def int_aliasSelection( gaMgr ):
+	prob,alias = aliasTable( gaMgr )
+	i = random.randrange( len(prob) )
+	if( random.random() < prob[i] ):
+		return i
+	return alias[i]
+
+def aliasSelection( gaMgr ):
+	""" selection-function for fitness-proportional selection using an alias table """
+	idx1 = int_aliasSelection( gaMgr )
+	idx2 = int_aliasSelection( gaMgr )
+	return idx1,idx2
 
 def rouletteWheelSelection( gaMgr ):
 	""" selection-function for roulette-wheel selection """
@@ -343,43 +414,26 @@ def simpleSelectionParentPct( gaMgr ):
 	# simple selection from all "parents"
 	# potential parents == top X% of population with the best fitness
 	pct = gaMgr.params.get( 'parentPct', 0.50 )
+	# needs the whole population in order (sortMode='topk' only orders the elites)
+	gaMgr.ensureSorted()
 	parent_pop_sz = int( pct * len( gaMgr.population ) )
-	(idx1,idx2) = random.sample( range(parent_pop_sz), k=2 )
-	return idx1,idx2
+	parent_pop_sz = min( max( parent_pop_sz, 2 ), len(gaMgr.population) )
+	return int_samplePair( parent_pop_sz )
 
 def simpleSelection( gaMgr ):
 	""" selection-function that randomly pulls from the whole population """
 	# simple selection from whole population
-	(idx1,idx2) = random.sample( range(gaMgr.population_sz), k=2 )
-	return idx1,idx2
+	return int_samplePair( len(gaMgr.population) )
 
 # https://www.msi.umn.edu/sites/default/files/OptimizingWithGA.pdf
+# : weight for rank i is 1/(i+1), see rankTable()
 def int_rankSelection( gaMgr ):
-	rtn = -1
-
-	# TODO: could we add an input-argument for xform?
-	xform = lambda x: 1.0/(x+1.0)
-	sum_xform = 0
-	for i in range(gaMgr.population_sz):
-		sum_xform = sum_xform + xform(i)
-
-	# select random value
-	value = random.random() * sum_xform
-
-	# loop over population
-	for i in range(gaMgr.population_sz):
-		value = value - xform(i)
-		if( value < 0 ):
-			rtn = i
-			break
-
-	# locate the random value based on the weights
-	if( rtn < 0 ):
-		rtn = gaMgr.population_sz - 1
-	return rtn
+	return int_drawFromTable( rankTable(gaMgr) )
 
 def rankSelection( gaMgr ):
 	""" selection-function that uses rank-selection """
+	# needs the whole population in order (sortMode='topk' only orders the elites)
+	gaMgr.ensureSorted()
 	idx1 = int_rankSelection( gaMgr )
 	idx2 = int_rankSelection( gaMgr )
 	return idx1,idx2
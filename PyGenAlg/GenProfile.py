@@ -0,0 +1,100 @@
+#
+# per-generation timing breakdown for GenAlg.evolve
+#
+# pass profile=True (and optionally profileCallback=fcn) to GenAlg; each
+# generation then adds one record (a dict) to gaMgr.profiler.history:
+#    generation, total, selection, crossover, mutation, feasibility,
+#    migration_send, migration_recv, fitness, sort, other (all in seconds)
+#    evals, cache_hits, attempts, rejected, shortfall (counts)
+# the callback is called as fcn( gaMgr, record ) at the end of each generation
+#
+# times are exclusive: e.g. an array-kernel crossover calls the selection
+# function, and that time is only counted under 'selection'
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+import time
+import functools
+
+class GenProfile(object):
+	phases = ( 'selection', 'crossover', 'mutation', 'feasibility',
+		'migration_send', 'migration_recv', 'fitness', 'sort' )
+
+	def __init__( self, **kwargs ):
+		self.callback   = kwargs.get( 'callback', None )
+		# keep only the last N records (None = keep all)
+		self.maxHistory = kwargs.get( 'maxHistory', None )
+
+		if( (self.callback is not None) and (not callable(self.callback)) ):
+			raise ValueError('profile callback is not callable')
+
+		self.history = []
+		self.record  = dict( (p,0.0) for p in self.phases )
+		# time spent in nested (timed) calls, one entry per active call
+		self.stack   = []
+		self.t0      = 0.0
+		self.counts0 = None
+
+	def __str__( self ):
+		tot = self.totals()
+		txt = 'GenProfile: %d generations, %0.3fs' % (len(self.history),tot.get('total',0.0))
+		for p in self.phases + ('other',):
+			txt = txt + '\n   %-15s %0.3fs' % (p,tot.get(p,0.0))
+		return txt
+
+	# returns a wrapper around fcn that adds its run-time to phase 'name'
+	def timed( self, name, fcn ):
+		@functools.wraps( fcn )
+		def wrapper( *args, **kwargs ):
+			t0 = time.perf_counter()
+			self.stack.append( 0.0 )
+			try:
+				return fcn( *args, **kwargs )
+			finally:
+				dt = time.perf_counter() - t0
+				inner = self.stack.pop()
+				self.record[name] = self.record[name] + dt - inner
+				if( len(self.stack) > 0 ):
+					self.stack[-1] = self.stack[-1] + dt
+		return wrapper
+
+	def int_counts( self, gaMgr ):
+		hits = 0
+		if( gaMgr.fitnessCache is not None ):
+			hits = gaMgr.fitnessCache.hits
+		return ( gaMgr.num_evals, hits )
+
+	def startGen( self, gaMgr ):
+		self.record = dict( (p,0.0) for p in self.phases )
+		self.counts0 = self.int_counts( gaMgr )
+		self.t0 = time.perf_counter()
+
+	def endGen( self, gaMgr ):
+		rec = self.record
+		rec['total'] = time.perf_counter() - self.t0
+		rec['other'] = max( rec['total'] - sum( rec[p] for p in self.phases ), 0.0 )
+		evals,hits = self.int_counts( gaMgr )
+		rec['generation'] = gaMgr.generation
+		rec['evals']      = evals - self.counts0[0]
+		rec['cache_hits'] = hits - self.counts0[1]
+		rec['attempts']   = gaMgr.attempts
+		rec['rejected']   = gaMgr.rejected
+		rec['shortfall']  = gaMgr.shortfall
+		self.history.append( rec )
+		if( (self.maxHistory is not None) and (len(self.history) > self.maxHistory) ):
+			del self.history[0]
+		if( self.callback is not None ):
+			self.callback( gaMgr, rec )
+
+	# sum of every numeric field over the history
+	def totals( self ):
+		tot = {}
+		for rec in self.history:
+			for k,v in rec.items():
+				if( k != 'generation' ):
+					tot[k] = tot.get(k,0) + v
+		return tot
+
+	def clear( self ):
+		self.history = []
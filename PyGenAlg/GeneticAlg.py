@@ -5,15 +5,44 @@
 #
 
 import math
+import time
+import heapq
 import random
 
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
 import GenAlgOps
+import ArrayPop
+import ArrayOps
+import ParallelEval
+import DedupIndex
+import GenProfile
 
 # TODO: import default crossover and mutation funcs from GenOps
 
-# TODO: is there a better way to insert data into an already sorted list?
-# : right now, we calc "all" data (skipping vals we previously calc'd),
-#   then we sort the whole list ... then repeat
+# evolve() is generational: we calc "all" data (skipping vals we previously
+#   calc'd), then we sort the whole list ... then repeat
+# : with sortMode='topk', only the elites (and showBest) are put in order
+# : evolveSteadyState() instead breeds a few children at a time and inserts
+#   them into the sorted population, replacing the worst members
+
+# what evolve() did, and why it stopped
+# : reason is one of 'iters', 'target', 'stagnation', 'diversity', 'time', 'evals'
+class EvolveResult(object):
+	def __init__( self, **kwargs ):
+		self.reason       = kwargs.get( 'reason', 'iters' )
+		self.generations  = kwargs.get( 'generations', 0 )
+		self.best_fitness = kwargs.get( 'best_fitness', None )
+		self.num_evals    = kwargs.get( 'num_evals', 0 )
+		self.elapsed      = kwargs.get( 'elapsed', 0.0 )
+		self.diversity    = kwargs.get( 'diversity', None )
+
+	def __str__( self ):
+		return 'EvolveResult: stopped on %s after %d generations, best=%s evals=%d time=%0.2fs' \
+			% (self.reason,self.generations,str(self.best_fitness),self.num_evals,self.elapsed)
 
 class GenAlg:
 	def __init__( self, **kwargs ):
@@ -28,6 +57,11 @@ class GenAlg:
 		self.population_sz = kwargs.get( 'size', 10 )
 		self.minOrMax      = kwargs.get( 'minOrMax', 'max' )
 		self.showBest      = kwargs.get( 'showBest', 0 )
+		# 'full' = sort the whole population every generation,
+		# 'topk' = only order the best max(elitism,showBest) members
+		self.sortMode      = kwargs.get( 'sortMode', 'full' )
+		# 'list' = list of chromo objects, 'array' = one 2-D NumPy array
+		self.storage       = kwargs.get( 'storage', 'list' )
 		# selection, crossover, and mutation functions
 		self.selectionFcn  = kwargs.get( 'selectionFcn', GenAlgOps.tournamentSelection )
 		self.crossoverFcn  = kwargs.get( 'crossoverFcn', GenAlgOps.crossover12 )
@@ -40,8 +74,47 @@ class GenAlg:
 		self.migrationSendFcn = kwargs.get( 'migrationSendFcn', None )
 		self.migrationRecvFcn = kwargs.get( 'migrationRecvFcn', None )
 		self.migrationSkip    = kwargs.get( 'migrationSkip', 1 )
+		# which members are sent out ('random', 'best' or 'tournament') and
+		# whether they leave this population (not carried over as elites)
+		self.migrantSelection = kwargs.get( 'migrantSelection', 'random' )
+		self.removeMigrants   = kwargs.get( 'removeMigrants', False )
+		# call migrationRecvFcn every generation (it should not block, e.g.
+		# CommMgr.irecvMigrants); whatever has arrived joins the next generation
+		self.migrationAsync   = kwargs.get( 'migrationAsync', False )
 		# optional params to be passed to functions
 		self.params           = kwargs.get( 'params', {} )
+		# optional FitnessCache object (memoize fitness by chromo data)
+		self.fitnessCache     = kwargs.get( 'fitnessCache', None )
+		# optional concurrent.futures executor for fitness evaluation
+		self.fitnessExecutor  = kwargs.get( 'fitnessExecutor', None )
+		self.fitnessChunkSize = kwargs.get( 'fitnessChunkSize', None )
+		# generations remembered by GenAlgOps.disallowDupes (1 = current only)
+		self.dedupWindow      = kwargs.get( 'dedupWindow', 1 )
+		# max children tried (crossover+mutation) per generation before
+		# giving up on feasibleSolnFcn, default is 10x the pop size
+		self.attemptBudget    = kwargs.get( 'attemptBudget', None )
+		# what to do with the rest of the generation when the budget runs out:
+		# 'random' = new random chromos, 'elite' = mutated copies of the elites,
+		# 'short' = run with a smaller population this generation
+		self.shortfallPolicy  = kwargs.get( 'shortfallPolicy', 'random' )
+		# stopping criteria for evolve(), None = not used
+		# : stop when the best fitness reaches targetFitness
+		self.targetFitness    = kwargs.get( 'targetFitness', None )
+		# : stop after this many generations without the best fitness improving
+		self.stagnationLimit  = kwargs.get( 'stagnationLimit', None )
+		# : stop when diversity() falls below this value
+		self.minDiversity     = kwargs.get( 'minDiversity', None )
+		# : stop after this many seconds (checked between generations)
+		self.timeBudget       = kwargs.get( 'timeBudget', None )
+		# : stop after this many fitness evaluations in total
+		self.evalBudget       = kwargs.get( 'evalBudget', None )
+		# record a per-generation timing breakdown (see GenProfile)
+		self.profile          = kwargs.get( 'profile', False )
+		self.profileCallback  = kwargs.get( 'profileCallback', None )
+		# optional TelemetrySink, gets one record per generation
+		self.telemetry        = kwargs.get( 'telemetry', None )
+		# children bred per step in evolveSteadyState
+		self.steadyStateBatch = kwargs.get( 'steadyStateBatch', 2 )
 
 		# calculated/to-be-calculated values
 		self.population = []
@@ -64,6 +137,17 @@ class GenAlg:
 		if( (self.minOrMax!='min') and (self.minOrMax!='max') ):
 			raise ValueError('minOrMax must be min or max')
 
+		if( (self.storage!='list') and (self.storage!='array') ):
+			raise ValueError('storage must be list or array')
+
+		if( (self.sortMode!='full') and (self.sortMode!='topk') ):
+			raise ValueError('sortMode must be full or topk')
+
+		if( self.shortfallPolicy not in ('random','elite','short') ):
+			raise ValueError('shortfallPolicy must be random, elite or short')
+		if( self.attemptBudget is None ):
+			self.attemptBudget = 10 * self.population_sz
+
 		if( not callable(self.selectionFcn) ):
 			raise ValueError('selectionFcn is not callable')
 		if( not callable(self.crossoverFcn) ):
@@ -73,12 +157,22 @@ class GenAlg:
 		if( not callable(self.feasibleSolnFcn) ):
 			raise ValueError('feasibleSolnFcn is not callable')
 
+		# whole-generation kernels (see ArrayOps) work on the population array
+		self.crossoverKernel = ArrayOps.isArrayKernel( self.crossoverFcn )
+		self.pureMutationKernel = ArrayOps.isArrayKernel( self.pureMutationFcn )
+		if( ArrayOps.isArrayKernel(self.mutationFcn) != self.crossoverKernel ):
+			raise ValueError('crossoverFcn and mutationFcn must both be array-kernels (or neither)')
+		if( (self.crossoverKernel or self.pureMutationKernel) and (self.storage!='array') ):
+			raise ValueError('array-kernels require storage=array')
+
 		if( self.migration > 0 ):
 			if( not callable(self.migrationSendFcn) ):
 				raise ValueError('migrationSendFcn is not callable')
 			if( not callable(self.migrationRecvFcn) ):
 				raise ValueError('migrationRecvFcn is not callable')
 			self.migrationCounter = 0
+		if( not self.migrantSelection in ('random','best','tournament') ):
+			raise ValueError('migrantSelection must be random, best or tournament')
 
 		# TODO: check that chromoClass is a suitable class
 		a = self.chromoClass()
@@ -86,16 +180,62 @@ class GenAlg:
 			raise ValueError('chromoClass does not have calcFitness')
 		# TODO: check that chromoClass has packData/unpackData/etc.
 
+		# optional vectorized fitness function (classmethod on chromoClass)
+		self.batchFitnessFcn = getattr( self.chromoClass, 'calcFitnessBatch', None )
+		if( (self.batchFitnessFcn is not None) and (np is None) ):
+			raise ImportError('calcFitnessBatch requires numpy')
+
+		if( self.storage == 'array' ):
+			# re-use the test chromo as the prototype for row-views
+			self.population = ArrayPop.ArrayPopulation( chromoClass=self.chromoClass,
+				size=self.population_sz, proto=a )
+
 		self.is_sorted = False
+		self.sorted_k = 0
+		# bumped whenever the population (or its order) changes, so
+		# selection functions know when their cached tables are stale
+		self.pop_version = 0
+		self.selectionTables = {}
+		# fitness stats, see int_setStats
+		self.stats_ok = False
+		self.dedupIndex = DedupIndex.DedupIndex( window=self.dedupWindow )
+
+		# per-generation counters for the feasibility loops
+		self.attempts = 0
+		self.rejected = 0
+		self.shortfall = 0
+		self.total_rejected = 0
+		# generations run (all calls to evolve) and fitness evaluations done
+		self.generation = 0
+		self.num_evals = 0
+		# best fitness seen so far, and generations since it last improved
+		self.best_fitness = None
+		self.stagnant_gens = 0
+
+		self.profiler = None
+		if( self.profile or (self.profileCallback is not None) ):
+			self.profiler = GenProfile.GenProfile( callback=self.profileCallback )
+
+		# children inserted by evolveSteadyState (since the last newgen)
+		self.steady_count = 0
 
 		# just to be sure we get different random numbers
 		# : user can always override with random.setState
 		random.seed()
 
+	# call this after changing the population (or fitness values)
+	def popChanged(self):
+		self.is_sorted = False
+		self.sorted_k = 0
+		self.pop_version = self.pop_version + 1
+		self.stats_ok = False
+
 	# maybe this should be __repr__ or __str__?
 	def describe(self):
 		print( 'Genetic Algorithm object:' )
 		print( '   pop size: '+str(self.population_sz) )
+		print( '   storage: '+self.storage )
+		print( '   sort mode: '+self.sortMode )
 		print( '   elitism: %d :: %0.1f%%' % (self.elitism,float(100*self.elitism)/self.population_sz) )
 		print( '   crossover: %d :: %0.1f%%' % (self.crossover,float(100*self.crossover)/self.population_sz) )
 		print( '      selection function: %s.%s: %s'%(self.selectionFcn.__module__,self.selectionFcn.__name__,str(self.selectionFcn.__doc__)) )
@@ -105,147 +245,746 @@ class GenAlg:
 		print( '      pure-mutation selection function: %s.%s: %s'%(self.pureMutationSelectionFcn.__module__,self.pureMutationSelectionFcn.__name__,self.pureMutationSelectionFcn.__doc__) )
 		print( '      pure-mutation function: %s.%s: %s'%(self.pureMutationFcn.__module__,self.pureMutationFcn.__name__,self.pureMutationFcn.__doc__) )
 		print( '   feasible-soln function: %s.%s: %s'%(self.feasibleSolnFcn.__module__,self.feasibleSolnFcn.__name__,self.feasibleSolnFcn.__doc__) )
+		print( '      attempt budget: %d, shortfall policy: %s' % (self.attemptBudget,self.shortfallPolicy) )
 		print( '   migration: %d :: %0.1f%%' % (self.migration,float(100*self.migration)/self.population_sz) )
 		print( '   min_or_max: '+self.minOrMax )
 		print( '   optional params: '+str(self.params) )
+		if( self.fitnessCache is not None ):
+			print( '   '+str(self.fitnessCache) )
+		if( self.fitnessExecutor is not None ):
+			print( '   fitness executor: '+str(self.fitnessExecutor) )
+		if( self.feasibleSolnFcn is GenAlgOps.disallowDupes ):
+			print( '   '+str(self.dedupIndex) )
 
 	def initPopulation(self):
+		if( self.storage == 'array' ):
+			self.population.randomize()
+			self.popChanged()
+			return
 		pop = []
 		chrClass = self.chromoClass
 		for i in range(self.population_sz):
 			pop.append( chrClass() )
 		self.population = pop
-		self.is_sorted = False
+		self.popChanged()
 
 	def appendToPopulation( self, items ):
+		if( self.storage == 'array' ):
+			rtn = self.population.extend( items )
+			self.popChanged()
+			return rtn
 		actual_sz = len(self.population)
 		item_sz   = len(items)
 		if( (actual_sz+item_sz) <= self.population_sz ):
 			# just append to pop
 			self.population.extend( items )
-			self.is_sorted = False
+			self.popChanged()
 			return 0
 		#else:
 		#	TOO MANY ITEMS
 		return -1
 
 	def calcFitness(self):
+		if( self.storage == 'array' ):
+			return self.int_calcFitnessArray()
 		pop = self.population
-		# sum of fitness values needed for roulette wheel selection
-		sum_fitness = 0.0
-		if( pop[0].fitness == None ):
-				pop[0].fitness = pop[0].calcFitness()
-		min_fitness = pop[0].fitness 
-		max_fitness = pop[0].fitness
-		for i in range(self.population_sz):
-			if( pop[i].fitness is None ):
-				pop[i].fitness = pop[i].calcFitness()
-
-			# track some basic stats on the fitness values of the population
-			sum_fitness = sum_fitness + pop[i].fitness
-			if( pop[i].fitness > max_fitness ):
-				max_fitness = pop[i].fitness
-			if( pop[i].fitness < min_fitness ):
-				min_fitness = pop[i].fitness
-		self.sum_fitness = sum_fitness
-		self.min_fitness = min_fitness
-		self.max_fitness = max_fitness
-		self.is_sorted = False
+		fits = [ c.fitness for c in pop ]
+		todo = [ i for i in range(len(fits)) if fits[i] is None ]
+		if( len(todo) > 0 ):
+			self.int_evaluate( [ pop[i] for i in todo ] )
+			for i in todo:
+				fits[i] = pop[i].fitness
+		self.popChanged()
+		self.int_setStats( fits )
+
+	# basic stats on the fitness values of the population, all in one go
+	# (sum is needed for roulette wheel selection)
+	# : these stay valid until popChanged(); sorting does not change them
+	#   (but then the best/worst are at the ends, see bestChromo)
+	def int_setStats( self, fits ):
+		n = len(fits)
+		if( n == 0 ):
+			self.stats_ok = False
+			return
+		if( np is not None ):
+			fits = np.asarray( fits, dtype=np.float64 )
+			self.min_idx = int( np.argmin(fits) )
+			self.max_idx = int( np.argmax(fits) )
+			self.sum_fitness = float( fits.sum() )
+			self.sumsq_fitness = float( np.dot(fits,fits) )
+		else:
+			self.min_idx = min( range(n), key=fits.__getitem__ )
+			self.max_idx = max( range(n), key=fits.__getitem__ )
+			self.sum_fitness = float( sum(fits) )
+			self.sumsq_fitness = float( sum( f*f for f in fits ) )
+		self.min_fitness = float( fits[self.min_idx] )
+		self.max_fitness = float( fits[self.max_idx] )
+		self.stats_ok = True
+
+	# best/mean/min/max/std of the fitness values (e.g. for telemetry)
+	def fitnessStats(self):
+		if( not self.stats_ok ):
+			self.int_setStats( GenAlgOps.int_populationFitness(self) )
+		n = len(self.population)
+		mean = self.sum_fitness / n
+		var = max( self.sumsq_fitness/n - mean*mean, 0.0 )
+		if( self.minOrMax == 'max' ):
+			best = self.max_fitness
+		else:
+			best = self.min_fitness
+		return { 'best':best, 'mean':mean, 'min':self.min_fitness,
+			'max':self.max_fitness, 'std':math.sqrt(var) }
+
+	# calculate fitness for a list of chromos (all with fitness==None),
+	# using the fitness-cache and/or the batch fitness function if present
+	def int_evaluate( self, todo ):
+		cache = self.fitnessCache
+		if( cache is not None ):
+			# group identical chromos so each one is evaluated at most once
+			groups = {}
+			for c in todo:
+				key = c.dataKey()
+				if( key in groups ):
+					groups[key].append( c )
+					continue
+				fit = cache.lookup( key )
+				if( fit is None ):
+					groups[key] = [ c ]
+				else:
+					c.fitness = fit
+			todo = [ grp[0] for grp in groups.values() ]
+
+		self.num_evals = self.num_evals + len(todo)
+		if( len(todo) == 0 ):
+			pass
+		elif( self.fitnessExecutor is not None ):
+			# send packed data to the worker pool, get fitness values back
+			fits = ParallelEval.evaluate( self.fitnessExecutor, self.chromoClass,
+				todo, self.fitnessChunkSize )
+			for k in range(len(todo)):
+				todo[k].fitness = fits[k]
+		elif( self.batchFitnessFcn is not None ):
+			# evaluate all unknown fitness values in one call
+			data = np.array( [ c.data for c in todo ], dtype=np.float64 )
+			fits = self.batchFitnessFcn( data )
+			for k in range(len(todo)):
+				todo[k].fitness = float( fits[k] )
+		else:
+			for c in todo:
+				c.fitness = c.calcFitness()
+
+		if( cache is not None ):
+			for key,grp in groups.items():
+				fit = grp[0].fitness
+				cache.store( key, fit )
+				for c in grp[1:]:
+					c.fitness = fit
+				# duplicates within this generation count as hits too
+				cache.hits = cache.hits + len(grp) - 1
+
+	def int_calcFitnessArray(self):
+		pop = self.population
+		fit = pop.fitness
+		idx = pop.unevaluated()
+		if( len(idx) == 0 ):
+			pass
+		elif( (self.batchFitnessFcn is not None) and (self.fitnessCache is None) \
+				and (self.fitnessExecutor is None) ):
+			# straight from the population array to the batch function
+			# : always float64, like the list-storage path (int-only chromos
+			#   are stored as int64)
+			fit[idx] = self.batchFitnessFcn( pop.data[idx].astype(np.float64) )
+			self.num_evals = self.num_evals + len(idx)
+		else:
+			views = [ pop.view(i) for i in idx ]
+			self.int_evaluate( views )
+			fit[idx] = [ v.fitness for v in views ]
+		self.popChanged()
+		self.int_setStats( fit[:pop.count] )
 
 	def bestChromo(self):
-		# assume idx=1 is the min/max
 		pop = self.population
+		# (partially) sorted, so it's the first one
+		if( self.sorted_k > 0 ):
+			return pop[0]
+		if( not self.stats_ok ):
+			self.int_setStats( GenAlgOps.int_populationFitness(self) )
 		if( self.minOrMax == 'max' ):
-			compare = lambda a,b: a>b
-		else:
-			compare = lambda a,b: a<b
-		idx = 0
-		#mm = pop[idx].getFitness()
-		mm = pop[idx].fitness
-		for i in range(1,self.population_sz):
-			#fit = pop[i].getFitness()
-			fit = pop[i].fitness
-			if( compare(fit,mm) ):
-				mm = fit
-				idx = i
-		return pop[idx]
-
-	def sortPopulation(self):
+			return pop[ self.max_idx ]
+		return pop[ self.min_idx ]
+
+	# sort the population (best first)
+	# : members before 'start' are assumed to already be in place
+	def sortPopulation( self, start=0 ):
 		if( self.minOrMax == 'max' ):
 			rev = True
 		else:
 			rev = False
-		self.population.sort( key=lambda x: x.fitness, reverse=rev )
+		if( self.storage == 'array' ):
+			self.population.sort( reverse=rev, start=start )
+		elif( start == 0 ):
+			self.population.sort( key=lambda x: x.fitness, reverse=rev )
+		else:
+			pop = self.population
+			pop[start:] = sorted( pop[start:], key=lambda x: x.fitness, reverse=rev )
 		self.is_sorted = True
+		self.sorted_k = len(self.population)
+		self.pop_version = self.pop_version + 1
+
+	# move the best k members to the front (in order), leave the rest unsorted
+	def partialSort( self, k ):
+		pop = self.population
+		k = min( k, len(pop) )
+		if( self.storage == 'array' ):
+			pop.partialSort( k, reverse=(self.minOrMax=='max') )
+		else:
+			if( self.minOrMax == 'max' ):
+				top = heapq.nlargest( k, pop, key=lambda x: x.fitness )
+			else:
+				top = heapq.nsmallest( k, pop, key=lambda x: x.fitness )
+			ids = set( id(x) for x in top )
+			top.extend( x for x in pop if id(x) not in ids )
+			pop[:] = top
+		self.is_sorted = ( k >= len(pop) )
+		self.sorted_k = k
+		self.pop_version = self.pop_version + 1
+
+	# sort (or partially sort) the population, depending on sortMode
+	def orderPopulation(self):
+		if( self.sortMode == 'topk' ):
+			self.partialSort( max( self.elitism, self.showBest, 1 ) )
+		else:
+			self.sortPopulation()
+
+	# for selection functions that need a fully sorted population
+	# (e.g. rank selection) when sortMode='topk'
+	def ensureSorted(self):
+		if( not self.is_sorted ):
+			self.sortPopulation( self.sorted_k )
 
+	# draw num pairs of parents, returned as two arrays of indices
+	def selectParents( self, num, selectionFcn=None ):
+		if( selectionFcn is None ):
+			selectionFcn = self.selectionFcn
+		if( ArrayOps.isArrayKernel(selectionFcn) ):
+			return selectionFcn( self, num )
+		idx1 = np.empty( num, dtype=np.intp )
+		idx2 = np.empty( num, dtype=np.intp )
+		for i in range(num):
+			idx1[i],idx2[i] = selectionFcn( self )
+		return idx1,idx2
+
+	# endless stream of (idx1,idx2) parent pairs for the per-child loops
+	# : batch selection functions are called for blocksz pairs at a time
+	def int_pairStream( self, selectionFcn, blocksz ):
+		if( not ArrayOps.isArrayKernel(selectionFcn) ):
+			while( True ):
+				yield selectionFcn( self )
+		while( True ):
+			idx1,idx2 = selectionFcn( self, max(blocksz,1) )
+			for i in range(len(idx1)):
+				yield int(idx1[i]),int(idx2[i])
+
+	def int_crossoverRows( self, num ):
+		children = self.crossoverFcn( self, num, self.params )
+		return self.mutationFcn( self, children, self.params )
+
+	def int_pureMutationRows( self, num ):
+		idx1,idx2 = self.selectParents( num, self.pureMutationSelectionFcn )
+		return self.pureMutationFcn( self, self.population.data[idx1], self.params )
+
+	# build num children (as rows of an array) using one of the
+	# row-generating functions above, dropping any infeasible children
+	def int_kernelChildren( self, num, rowFcn ):
+		if( num <= 0 ):
+			return self.population.data[:0].copy()
+		proto = self.population.proto
+		blocks = []
+		got = 0
+		while( (got < num) and (self.attempts < self.attemptBudget) ):
+			rows = rowFcn( num-got )
+			self.attempts = self.attempts + len(rows)
+			if( self.feasibleSolnFcn is not GenAlgOps.allowAll ):
+				keep = [ k for k in range(len(rows)) if self.feasibleSolnFcn(self,proto.viewOf(rows[k])) ]
+				self.rejected = self.rejected + len(rows) - len(keep)
+				rows = rows[keep]
+			blocks.append( rows )
+			got = got + len(rows)
+		if( len(blocks) == 0 ):
+			return self.population.data[:0].copy()
+		return np.concatenate( blocks )[:num]
+
+	# make num chromos to cover for children that were never found
+	# (attempt budget ran out); these skip the feasibleSolnFcn check
+	def int_fillShortfall( self, num ):
+		pop = self.population
+		if( (num <= 0) or (self.shortfallPolicy == 'short') ):
+			return []
+		if( self.shortfallPolicy == 'random' ):
+			if( self.storage == 'array' ):
+				return pop.randomRows( num )
+			return [ self.chromoClass() for i in range(num) ]
+		# mutated copies of the elites (or just the best one)
+		ne = max( min(self.elitism,len(pop)), 1 )
+		if( self.pureMutationKernel ):
+			idx = np.arange( num ) % ne
+			return self.pureMutationFcn( self, pop.data[idx], self.params )
+		return [ self.pureMutationFcn( pop[i%ne] ) for i in range(num) ]
+
+	#
+	# steady-state (incremental) evolution
+	#
+
+	# breed num new children (unevaluated chromos), using crossover or
+	# pure-mutation in the same proportions as evolve()
+	def breedChildren( self, num ):
+		pop = self.population
+		proto = getattr( pop, 'proto', None )
+		total = self.crossover + self.pureMutation
+		if( total > 0 ):
+			xpct = float(self.crossover) / total
+		else:
+			xpct = 1.0
+		children = []
+		tries = 0
+		while( (len(children) < num) and (tries < self.attemptBudget) ):
+			if( random.random() < xpct ):
+				if( self.crossoverKernel ):
+					new = [ proto.viewOf(row) for row in self.int_crossoverRows(1) ]
+				else:
+					idx1,idx2 = next( self.int_pairStream(self.selectionFcn,1) )
+					new = self.crossoverFcn( pop[idx1], pop[idx2], self.params )
+					new = [ self.mutationFcn(child) for child in new ]
+			else:
+				if( self.pureMutationKernel ):
+					new = [ proto.viewOf(row) for row in self.int_pureMutationRows(1) ]
+				else:
+					idx1,idx2 = next( self.int_pairStream(self.pureMutationSelectionFcn,1) )
+					new = [ self.pureMutationFcn( pop[idx1] ) ]
+			for child in new:
+				tries = tries + 1
+				if( self.feasibleSolnFcn(self,child) ):
+					children.append( child )
+				else:
+					self.rejected = self.rejected + 1
+		self.attempts = self.attempts + tries
+		return children[:num]
+
+	# position where fitness fit belongs in the (sorted) population
+	# : after any members with the same fitness
+	def int_insertPos( self, fit ):
+		pop = self.population
+		lo = 0
+		hi = len(pop)
+		while( lo < hi ):
+			mid = (lo+hi) // 2
+			if( GenAlgOps.int_isBetter(self,fit,pop[mid].fitness) ):
+				hi = mid
+			else:
+				lo = mid + 1
+		return lo
+
+	# insert an evaluated child into the sorted population, replacing
+	# the worst member if the population is full
+	# : returns the position it went in at, or -1 if it was no better than the worst
+	def insertChild( self, child ):
+		if( child.fitness is None ):
+			self.int_evaluate( [child] )
+		self.ensureSorted()
+		pop = self.population
+		full = ( len(pop) >= self.population_sz )
+		if( full and not GenAlgOps.int_isBetter(self,child.fitness,pop[-1].fitness) ):
+			return -1
+		pos = self.int_insertPos( child.fitness )
+		if( not self.stats_ok ):
+			self.int_setStats( GenAlgOps.int_populationFitness(self) )
+		if( full ):
+			worst = pop[-1].fitness
+			self.sum_fitness = self.sum_fitness - worst
+			self.sumsq_fitness = self.sumsq_fitness - worst*worst
+		if( self.storage == 'array' ):
+			pop.insert( pos, child )
+		else:
+			if( full ):
+				pop.pop()
+			pop.insert( pos, child )
+		fit = child.fitness
+		self.sum_fitness = self.sum_fitness + fit
+		self.sumsq_fitness = self.sumsq_fitness + fit*fit
+		if( self.minOrMax == 'max' ):
+			self.max_idx = 0
+			self.min_idx = len(pop) - 1
+		else:
+			self.min_idx = 0
+			self.max_idx = len(pop) - 1
+		self.max_fitness = pop[self.max_idx].fitness
+		self.min_fitness = pop[self.min_idx].fitness
+		# still sorted, but cached selection tables are stale
+		self.sorted_k = len(pop)
+		self.pop_version = self.pop_version + 1
+		return pos
+
+	# after a generation's worth of children, let dedup history roll over
+	def int_steadyRollover( self ):
+		if( self.steady_count >= self.population_sz ):
+			self.feasibleSolnFcn( self, None, newgen=True )
+			self.steady_count = 0
+
+	# steady-state evolution: each step breeds steadyStateBatch children,
+	# evaluates them and inserts them into the population
+	# : elites are never replaced (only the worst members are), and
+	#   migration is not done in this mode
+	# : returns the number of children that made it into the population
+	def evolveSteadyState( self, steps ):
+		self.calcFitness()
+		self.sortPopulation()
+		num_in = 0
+		for step in range(steps):
+			self.int_steadyRollover()
+			self.attempts = 0
+			self.rejected = 0
+			children = self.breedChildren( self.steadyStateBatch )
+			self.total_rejected = self.total_rejected + self.rejected
+			todo = [ c for c in children if c.fitness is None ]
+			if( len(todo) > 0 ):
+				self.int_evaluate( todo )
+			for child in children:
+				if( self.insertChild(child) >= 0 ):
+					num_in = num_in + 1
+			self.steady_count = self.steady_count + len(children)
+
+		# show a progress report?
+		if( self.showBest > 0 ):
+			print( "best chromo:" )
+			for i in range(self.showBest):
+				print( self.population[i] )
+
+		return num_in
+
+	# average spread of each gene across the population, scaled by the
+	# gene's dataRange (0 = every member is identical)
+	def diversity(self):
+		pop = self.population
+		if( len(pop) < 2 ):
+			return 0.0
+		if( self.storage == 'array' ):
+			std = pop.data[:pop.count].std( axis=0 )
+			return float( np.mean( std / np.maximum(pop.range_hi-pop.range_lo,1e-12) ) )
+		proto = pop[0]
+		n = len(pop)
+		total = 0.0
+		for j in range(proto.chromo_sz):
+			vals = [ c.data[j] for c in pop ]
+			mean = float(sum(vals)) / n
+			std = math.sqrt( sum( (v-mean)*(v-mean) for v in vals ) / n )
+			span = proto.dataRange[j][1] - proto.dataRange[j][0]
+			total = total + std / max(span,1e-12)
+		return total / proto.chromo_sz
+
+	# update best_fitness (and stagnant_gens, after a generation)
+	def int_trackBest( self, newgen=True ):
+		best = self.population[0].fitness
+		if( (self.best_fitness is None) or GenAlgOps.int_isBetter(self,best,self.best_fitness) ):
+			self.best_fitness = best
+			self.stagnant_gens = 0
+		elif( newgen ):
+			self.stagnant_gens = self.stagnant_gens + 1
+
+	# returns the reason to stop (see EvolveResult), or None to keep going
+	def int_stopReason( self, t0 ):
+		best = self.best_fitness
+		if( self.targetFitness is not None ):
+			if( (best == self.targetFitness) or GenAlgOps.int_isBetter(self,best,self.targetFitness) ):
+				return 'target'
+		if( (self.stagnationLimit is not None) and (self.stagnant_gens >= self.stagnationLimit) ):
+			return 'stagnation'
+		if( (self.evalBudget is not None) and (self.num_evals >= self.evalBudget) ):
+			return 'evals'
+		if( (self.timeBudget is not None) and ((time.time()-t0) >= self.timeBudget) ):
+			return 'time'
+		if( (self.minDiversity is not None) and (self.diversity() < self.minDiversity) ):
+			return 'diversity'
+		return None
+
+	# swap in timed versions of the functions evolve() calls (see GenProfile)
+	# : returns what is needed to put the originals back
+	def int_profileWrap(self):
+		prof = self.profiler
+		wraps = [ ('selectionFcn','selection'), ('pureMutationSelectionFcn','selection'),
+			('crossoverFcn','crossover'), ('mutationFcn','mutation'), ('pureMutationFcn','mutation'),
+			('migrationSendFcn','migration_send'), ('migrationRecvFcn','migration_recv'),
+			('calcFitness','fitness'), ('orderPopulation','sort') ]
+		# allowAll is skipped, since the array-kernel path checks for it
+		if( self.feasibleSolnFcn is not GenAlgOps.allowAll ):
+			wraps.append( ('feasibleSolnFcn','feasibility') )
+		saved = []
+		for attr,phase in wraps:
+			fcn = getattr( self, attr )
+			if( fcn is None ):
+				continue
+			saved.append( (attr, attr in self.__dict__, self.__dict__.get(attr,None)) )
+			setattr( self, attr, prof.timed(phase,fcn) )
+		return saved
+
+	def int_profileUnwrap( self, saved ):
+		for attr,present,fcn in saved:
+			if( present ):
+				setattr( self, attr, fcn )
+			else:
+				delattr( self, attr )
+
+	# send this generation's stats to the telemetry sink
+	def int_logTelemetry( self, gen_time ):
+		sink = self.telemetry
+		pop = self.population
+		extra = { 'evals':self.num_evals, 'attempts':self.attempts,
+			'rejected':self.rejected, 'shortfall':self.shortfall, 'gen_time':gen_time }
+		if( sink.diversity ):
+			extra['diversity'] = self.diversity()
+		if( (self.profiler is not None) and (len(self.profiler.history) > 0) ):
+			rec = self.profiler.history[-1]
+			for p in self.profiler.phases:
+				extra['time_'+p] = rec[p]
+		sink.logGeneration( 'GenAlg', self.generation, None, self.minOrMax,
+			stats=self.fitnessStats(), **extra )
+
+	# sort any list of chromos (e.g. the best from several islands), best first
+	def sortPopulationList( self, items ):
+		return sorted( items, key=lambda x: x.fitness, reverse=(self.minOrMax=='max') )
+
+	# indices of num members to send to another population
+	# : policy is 'random', 'best' or 'tournament' (default: migrantSelection)
+	def selectMigrants( self, num, policy=None ):
+		if( policy is None ):
+			policy = self.migrantSelection
+		n = len(self.population)
+		num = min( num, n )
+		if( (policy != 'random') and (not self.stats_ok) ):
+			# (only evaluates members that have no fitness yet)
+			self.calcFitness()
+		if( policy == 'best' ):
+			if( self.sorted_k < num ):
+				self.partialSort( num )
+			return list( range(num) )
+		if( policy == 'random' ):
+			return random.sample( range(n), num )
+		if( policy != 'tournament' ):
+			raise ValueError('migrant selection must be random, best or tournament')
+		# distinct tournament winners; fill with random members if the
+		# tournaments keep picking the same ones
+		idxs = []
+		seen = set()
+		tries = 0
+		while( (len(idxs) < num) and (tries < 10*num) ):
+			i = GenAlgOps.int_tournamentSelection( self )
+			if( not i in seen ):
+				seen.add( i )
+				idxs.append( i )
+			tries = tries + 1
+		if( len(idxs) < num ):
+			rest = [ i for i in range(n) if not i in seen ]
+			idxs.extend( random.sample( rest, num-len(idxs) ) )
+		return idxs
+
+	# take the given members out of the population (e.g. after they
+	# were sent to another one)
+	def removeMembers( self, idxs ):
+		drop = set( idxs )
+		keep = [ i for i in range(len(self.population)) if not i in drop ]
+		if( self.storage == 'array' ):
+			pop = self.population
+			pop.replace( [ pop.view(i) for i in keep ] )
+		else:
+			pop = self.population
+			self.population = [ pop[i] for i in keep ]
+		self.popChanged()
+
+	# add incoming migrants: they first fill any empty slots, then
+	# replace the 'worst' or 'random' members
+	# : only migrants without a fitness value are evaluated
+	def acceptMigrants( self, migrants, policy='worst' ):
+		if( not policy in ('worst','random') ):
+			raise ValueError('migrant replacement must be worst or random')
+		n = len(self.population)
+		room = max( self.population_sz - n, 0 )
+		self.appendToPopulation( migrants[:room] )
+		rest = migrants[room:]
+		if( len(rest) > 0 ):
+			# (only the current members are candidates for replacement)
+			pop = self.population
+			if( policy == 'worst' ):
+				if( not self.stats_ok ):
+					self.calcFitness()
+				fits = GenAlgOps.int_populationFitness( self )
+				if( self.minOrMax == 'max' ):
+					idxs = heapq.nsmallest( len(rest), range(n), key=lambda i: fits[i] )
+				else:
+					idxs = heapq.nlargest( len(rest), range(n), key=lambda i: fits[i] )
+			else:
+				idxs = random.sample( range(n), min(len(rest),n) )
+			for i,m in zip(idxs,rest):
+				if( self.storage == 'array' ):
+					pop.int_store( pop.data, pop.fitness, i, [m] )
+				else:
+					pop[i] = m
+		self.calcFitness()
+		self.orderPopulation()
+
+	# everything needed to pick up a run where it left off, fitness
+	# values included (see IoOps.saveCheckpoint)
+	# : the fitness-cache is not included, it has its own save()
+	def getState(self):
+		pop = self.population
+		if( self.storage == 'array' ):
+			members = ( pop.data[:pop.count].copy(), pop.fitness[:pop.count].copy() )
+		else:
+			members = [ (list(c.data),c.fitness) for c in pop ]
+		return { 'algorithm':'GenAlg', 'storage':self.storage, 'population':members,
+			'generation':self.generation, 'num_evals':self.num_evals,
+			'best_fitness':self.best_fitness, 'stagnant_gens':self.stagnant_gens,
+			'total_rejected':self.total_rejected, 'steady_count':self.steady_count,
+			'migrationCounter':getattr(self,'migrationCounter',0),
+			'dedupIndex':self.dedupIndex }
+
+	def setState( self, state ):
+		if( state.get('algorithm') != 'GenAlg' ):
+			raise ValueError('state is not from a GenAlg')
+		if( state['storage'] != self.storage ):
+			raise ValueError('state storage (%s) does not match (%s)'%(state['storage'],self.storage))
+		members = state['population']
+		if( self.storage == 'array' ):
+			pop = self.population
+			data,fits = members
+			n = len(fits)
+			pop.data[:n] = data
+			pop.fitness[:n] = fits
+			pop.fitness[n:] = np.nan
+			pop.count = n
+		else:
+			proto = self.chromoClass()
+			self.population = [ proto.viewOf(list(data),fit) for data,fit in members ]
+		self.generation = state['generation']
+		self.num_evals = state['num_evals']
+		self.best_fitness = state['best_fitness']
+		self.stagnant_gens = state['stagnant_gens']
+		self.total_rejected = state['total_rejected']
+		self.steady_count = state['steady_count']
+		if( self.migration > 0 ):
+			self.migrationCounter = state['migrationCounter']
+		self.dedupIndex = state['dedupIndex']
+		self.popChanged()
+
+	# run up to iters generations (fewer if a stopping criterion is met)
+	# : returns an EvolveResult
 	def evolve( self, iters ):
+		if( self.profiler is None ):
+			return self.int_evolve( iters )
+		saved = self.int_profileWrap()
+		try:
+			return self.int_evolve( iters )
+		finally:
+			self.int_profileUnwrap( saved )
+
+	def int_evolve( self, iters ):
+		t0 = time.time()
+		gen0 = self.generation
 		# make sure the chromo's are sorted first
 		self.calcFitness()
-		self.sortPopulation()
+		self.orderPopulation()
+		self.int_trackBest( newgen=False )
 
+		reason = self.int_stopReason( t0 )
 		for iter in range(iters):
+			if( reason is not None ):
+				break
 			pop = self.population
+			t_gen = time.time()
+			if( self.profiler is not None ):
+				self.profiler.startGen( self )
 
 			self.feasibleSolnFcn( self, None, newgen=True )
+			self.attempts = 0
+			self.rejected = 0
+			self.shortfall = 0
 
 			# while we add elitism population "first", we can
 			# send any migrants out now, to minimize any network slowness
-			# NOTE: this func does not remove the migrant from the
-			#       current population, it makes a copy to send to
-			#       the remote population
+			# NOTE: migrants are still available as parents this generation;
+			#       with removeMigrants they are not carried over as elites
 			migrants_out = []
 			migrants_idx_out = []
 			if( self.migration > 0 ):
 				# only do migrations every N generations
 				if( self.migrationCounter == 0 ):
-					for i in range(0,self.migration):
-						# TODO: migrant should be removed from population (if present)
-						idx1 = random.randrange(self.population_sz)
-						migrants_out.append( pop[ idx1 ] )
-						migrants_idx_out.append( idx1 )
+					migrants_idx_out = self.selectMigrants( self.migration )
+					migrants_out = [ pop[i] for i in migrants_idx_out ]
 					self.migrationSendFcn( migrants_out )
+			if( self.removeMigrants ):
+				gone = set( migrants_idx_out )
+			else:
+				gone = set()
 
 			# first group is best-N chromos (elitism)
 			# : process these with 'feasibleSolnFcn' to make sure they are checksummed/hashed/etc.
 			pop_e = []
 			i = 0
-			while( i < self.elitism ):
-				if( self.feasibleSolnFcn(self,pop[i]) ):
+			while( (len(pop_e) < self.elitism) and (i < len(pop)) ):
+				if( i in gone ):
+					pass
+				elif( self.feasibleSolnFcn(self,pop[i]) ):
 					pop_e.append( pop[i] )
-					i = i + 1
+				else:
+					self.rejected = self.rejected + 1
+				i = i + 1
 
 			# next group are computed from crossover and mutation
-			pop_c = []
-			i = 0
-			while( i < self.crossover ):
-				idx1,idx2 = self.selectionFcn( self )
+			if( self.crossoverKernel ):
+				# whole-generation kernels build all the children at once
+				pop_c = self.int_kernelChildren( self.crossover, self.int_crossoverRows )
+			else:
+				pop_c = []
+			i = len(pop_c)
+			pairs = self.int_pairStream( self.selectionFcn, self.crossover )
+			while( (i < self.crossover) and (self.attempts < self.attemptBudget) ):
+				idx1,idx2 = next( pairs )
 				mother = pop[idx1]
 				father = pop[idx2]
 				children = self.crossoverFcn( mother, father, self.params )
 				for child in children:
 					child = self.mutationFcn( child )
+					self.attempts = self.attempts + 1
 					# test if child is feasible sol'n
 					if( self.feasibleSolnFcn(self,child) ):
 						pop_c.append( child )
 						i = i + 1
+					else:
+						self.rejected = self.rejected + 1
 
 			# last group are pure-mutation
-			pop_m = []
-			i = 0
-			while( i < self.pureMutation ):
-				idx1,idx2 = self.pureMutationSelectionFcn( self )
+			if( self.pureMutationKernel ):
+				pop_m = self.int_kernelChildren( self.pureMutation, self.int_pureMutationRows )
+			else:
+				pop_m = []
+			i = len(pop_m)
+			pairs = self.int_pairStream( self.pureMutationSelectionFcn, self.pureMutation )
+			while( (i < self.pureMutation) and (self.attempts < self.attemptBudget) ):
+				idx1,idx2 = next( pairs )
 				parent = pop[idx1]
 				child = self.pureMutationFcn( parent )
+				self.attempts = self.attempts + 1
 				# test if child is feasible sol'n
 				if( self.feasibleSolnFcn(self,child) ):
 					pop_m.append( child )
 					i = i + 1
+				else:
+					self.rejected = self.rejected + 1
 
 			# if present, do migration (callback to user-code)
 			migrants_in = []
 			if( self.migration > 0 ):
 				# only do migrations every N generations
-				if( self.migrationCounter == 0 ):
+				# : in async mode, take whatever has arrived every generation
+				if( (self.migrationCounter == 0) or self.migrationAsync ):
 					migrants_in = self.migrationRecvFcn()
 				# else:
 				# 	print( 'skipped migration' )
@@ -259,33 +998,59 @@ class GenAlg:
 			# assemble them into the next generation
 			# : due to dedup/infeasible sol'ns, this may not add up, so we have to check each time
 			len_e = len(pop_e)
-			len_c = len(pop_c)
-			len_m = len(pop_m)
+			# (several batches may have arrived at once in async mode)
+			migrants_in = migrants_in[:max(self.population_sz-len_e,0)]
 			len_mi = len(migrants_in)
-			#print( 'len', len_e, len_c, len_m, len_mi )
 			# : we always add the elite population in full
-			self.population = pop_e
 			# : and we'll always take the migrant population (or else they could be lost)
-			self.population.extend( migrants_in )
 			# : for crossover population, add as many as we can (until full-pop)
-			if( (len_e+len_mi+len_c) < self.population_sz ):
-				self.population.extend( pop_c )
-			else:
-				i = self.population_sz - len_e - len_mi
-				self.population.extend( pop_c[:i] )
+			room = max( self.population_sz - len_e - len_mi, 0 )
+			pop_c = pop_c[:room]
 			# : mutation-only population, again, take as many as we can
-			if( (len_e+len_mi+len_c+len_m) < self.population_sz ):
-				self.population.extend( pop_m )
+			room = room - len(pop_c)
+			pop_m = pop_m[:room]
+			# : whatever is still missing (attempt budget ran out) goes to the shortfall policy
+			room = room - len(pop_m)
+			self.shortfall = room
+			self.total_rejected = self.total_rejected + self.rejected
+			pop_f = self.int_fillShortfall( room )
+			#print( 'len', len_e, len(pop_c), len(pop_m), len_mi )
+			if( self.storage == 'array' ):
+				# elites are views into the current array, so this copies
+				# everything into the spare array and then swaps them
+				self.population.replace( pop_e, migrants_in, pop_c, pop_m, pop_f )
 			else:
-				i = self.population_sz - len_e - len_mi - len_c
-				self.population.extend( pop_m[:i] )
+				newpop = pop_e
+				newpop.extend( migrants_in )
+				newpop.extend( pop_c )
+				newpop.extend( pop_m )
+				newpop.extend( pop_f )
+				self.population = newpop
 			#print( 'pop size', self.population_sz, len(self.population), len(pop_e), len(pop_c), len(pop_m), len(migrants_in) )
 
 			self.calcFitness()
-			self.sortPopulation()
+			self.orderPopulation()
+
+			self.generation = self.generation + 1
+			self.int_trackBest()
+			if( self.profiler is not None ):
+				self.profiler.endGen( self )
+			if( self.telemetry is not None ):
+				self.int_logTelemetry( time.time()-t_gen )
 
 			# show a progress report?
 			if( self.showBest > 0 ):
 				print( "best chromo:" )
 				for i in range(self.showBest):
 					print( self.population[i] )
+
+			reason = self.int_stopReason( t0 )
+
+		if( reason is None ):
+			reason = 'iters'
+		div = None
+		if( self.minDiversity is not None ):
+			div = self.diversity()
+		return EvolveResult( reason=reason, generations=self.generation-gen0,
+			best_fitness=self.best_fitness, num_evals=self.num_evals,
+			elapsed=time.time()-t0, diversity=div )
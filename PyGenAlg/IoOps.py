@@ -4,6 +4,17 @@
 # Copyright (C) 2018-2020, John Pormann, Duke University Libraries
 #
 
+import os
+import json
+import random
+import struct
+import pickle
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
 # for parallel runs, use start/finish to read just the pieces of data
 # each PE needs for it's local population (file==global population)
 def loadPopulation( gaMgr, filename, start=0, finish=None ):
@@ -55,3 +66,246 @@ def savePopulation( gaMgr, filename, mode='w' ):
 			txt = p.packData()
 			fp.write( txt + '\n' )
 
+
+#
+# binary checkpoints
+# : a small header followed by one fixed-width record per chromo, so
+#   the records can be np.memmap-ed and a PE's share is just a slice
+# : header: magic, header size, chromo size, pop size, generation,
+#   record format (struct-style; int genes are 'i', float genes are 'd',
+#   the last field is the fitness, NaN if not evaluated) and optionally
+#   the random-number state (pickled)
+# : everything is little-endian
+#
+
+binaryMagic = b'PYGAPOP1'
+binaryHeadFmt = '<8sIIQQ'
+
+def int_recordFormat( proto ):
+	fmt = '<'
+	for tp in proto.dataType:
+		if( tp is int ):
+			fmt = fmt + 'i'
+		else:
+			fmt = fmt + 'd'
+	return fmt + 'd'
+
+def int_recordDtype( fmt ):
+	fields = []
+	for k in range(1,len(fmt)-1):
+		if( fmt[k] == 'i' ):
+			fields.append( ('g%d'%(k-1),'<i4') )
+		else:
+			fields.append( ('g%d'%(k-1),'<f8') )
+	fields.append( ('fitness','<f8') )
+	return np.dtype( fields )
+
+def int_rngState():
+	np_state = None
+	if( np is not None ):
+		np_state = np.random.get_state()
+	return pickle.dumps( (random.getstate(),np_state), protocol=pickle.HIGHEST_PROTOCOL )
+
+def int_setRngState( blob ):
+	py_state,np_state = pickle.loads( blob )
+	random.setstate( py_state )
+	if( (np_state is not None) and (np is not None) ):
+		np.random.set_state( np_state )
+
+# returns a dict with the header info (including 'offset' of the first record)
+def readBinaryHeader( filename ):
+	with open(filename,'rb') as fp:
+		fixed = fp.read( struct.calcsize(binaryHeadFmt) )
+		if( (len(fixed) < struct.calcsize(binaryHeadFmt)) or (fixed[:8] != binaryMagic) ):
+			raise ValueError('not a binary population file: '+filename)
+		magic,head_sz,chromo_sz,pop_sz,generation = struct.unpack( binaryHeadFmt, fixed )
+		fmt_len, = struct.unpack( '<H', fp.read(2) )
+		fmt = fp.read( fmt_len ).decode( 'ascii' )
+		rng_len, = struct.unpack( '<I', fp.read(4) )
+		rng = fp.read( rng_len )
+	return { 'chromo_sz':chromo_sz, 'pop_sz':pop_sz, 'generation':generation,
+		'format':fmt, 'rng':rng, 'offset':head_sz }
+
+def int_binaryHeader( fmt, chromo_sz, pop_sz, generation, rng ):
+	fmt = fmt.encode( 'ascii' )
+	body = struct.pack( '<H', len(fmt) ) + fmt + struct.pack( '<I', len(rng) ) + rng
+	head_sz = struct.calcsize(binaryHeadFmt) + len(body)
+	# records start on an 8-byte boundary
+	pad = (8 - head_sz%8) % 8
+	head_sz = head_sz + pad
+	fixed = struct.pack( binaryHeadFmt, binaryMagic, head_sz, chromo_sz, pop_sz, generation )
+	return fixed + body + b'\0'*pad
+
+# (header,records) where records is a read-only np.memmap structured array
+# (fields g0..gN-1 and fitness); slicing it only touches that part of the file
+def mapBinaryPopulation( filename ):
+	hdr = readBinaryHeader( filename )
+	dtype = int_recordDtype( hdr['format'] )
+	if( hdr['pop_sz'] == 0 ):
+		return hdr, np.zeros( 0, dtype=dtype )
+	recs = np.memmap( filename, dtype=dtype, mode='r', offset=hdr['offset'], shape=(hdr['pop_sz'],) )
+	return hdr, recs
+
+# population data and fitness as (pop_sz x chromo_sz) and (pop_sz,) arrays
+# : members can be chromos or hold one (PsoAlg particles, AbcAlg food-sources)
+def int_populationArrays( gaMgr ):
+	pop = gaMgr.population
+	if( getattr(gaMgr,'storage','list') == 'array' ):
+		return pop.data[:pop.count], pop.fitness[:pop.count]
+	data = np.array( [ getattr(c,'chromo',c).data for c in pop ], dtype=np.float64 ).reshape( len(pop), -1 )
+	fits = np.array( [ (np.nan if c.fitness is None else c.fitness) for c in pop ], dtype=np.float64 )
+	return data, fits
+
+def saveBinaryPopulation( gaMgr, filename, saveRng=True ):
+	if( np is None ):
+		raise ImportError('binary population files require numpy')
+	proto = gaMgr.chromoClass()
+	fmt = int_recordFormat( proto )
+	data,fits = int_populationArrays( gaMgr )
+	recs = np.empty( len(fits), dtype=int_recordDtype(fmt) )
+	for j in range(proto.chromo_sz):
+		recs['g%d'%j] = data[:,j]
+	recs['fitness'] = fits
+	rng = b''
+	if( saveRng ):
+		rng = int_rngState()
+	with open(filename,'wb') as fp:
+		fp.write( int_binaryHeader( fmt, proto.chromo_sz, len(fits),
+			getattr(gaMgr,'generation',0), rng ) )
+		fp.write( recs.tobytes() )
+
+# records -> list of chromos (NaN fitness -> None)
+def int_recordsToChromos( proto, recs ):
+	cols = [ recs['g%d'%j].tolist() for j in range(proto.chromo_sz) ]
+	fits = recs['fitness'].tolist()
+	pop = []
+	for i,row in enumerate(zip(*cols)):
+		fit = fits[i]
+		if( fit != fit ):
+			fit = None
+		pop.append( proto.viewOf( list(row), fit ) )
+	return pop
+
+# members start..finish of the file as a list of chromos (fitness included)
+# : unlike loadBinaryPopulation, the gaMgr's population is not touched
+def readBinaryPopulation( gaMgr, filename, start=0, finish=None ):
+	if( np is None ):
+		raise ImportError('binary population files require numpy')
+	hdr,recs = mapBinaryPopulation( filename )
+	if( finish is None ):
+		finish = hdr['pop_sz']
+	proto = gaMgr.chromoClass()
+	if( int_recordFormat(proto) != hdr['format'] ):
+		raise ValueError('file-format does not match (%s vs %s)'%(hdr['format'],int_recordFormat(proto)))
+	return int_recordsToChromos( proto, recs[start:finish] )
+
+# replace the gaMgr's population with members start..finish of the file
+# (all of it by default), fitness values included
+# : returns the header dict; restoreRng=True also restores the random state
+def loadBinaryPopulation( gaMgr, filename, start=0, finish=None, restoreRng=False ):
+	if( np is None ):
+		raise ImportError('binary population files require numpy')
+	hdr,recs = mapBinaryPopulation( filename )
+	if( finish is None ):
+		finish = min( hdr['pop_sz'], start+gaMgr.population_sz )
+	recs = recs[start:finish]
+	proto = gaMgr.chromoClass()
+	if( int_recordFormat(proto) != hdr['format'] ):
+		raise ValueError('file-format does not match (%s vs %s)'%(hdr['format'],int_recordFormat(proto)))
+	fits = np.array( recs['fitness'] )
+	if( getattr(gaMgr,'storage','list') == 'array' ):
+		pop = gaMgr.population
+		n = min( len(recs), pop.population_sz )
+		for j in range(proto.chromo_sz):
+			pop.data[:n,j] = recs['g%d'%j][:n]
+		pop.fitness[:n] = fits[:n]
+		pop.fitness[n:] = np.nan
+		pop.count = n
+	else:
+		gaMgr.population = int_recordsToChromos( proto, recs )
+	if( hasattr(gaMgr,'popChanged') ):
+		gaMgr.popChanged()
+	if( hasattr(gaMgr,'generation') ):
+		gaMgr.generation = hdr['generation']
+	if( restoreRng and (len(hdr['rng']) > 0) ):
+		int_setRngState( hdr['rng'] )
+	return hdr
+
+#
+# sharded populations (see CommMgr.savePopulation)
+# : each PE writes its own shard file, then one small JSON manifest lists
+#   the shards (in global order) and how many chromos are in each
+# : shards are binary population files if numpy is available, otherwise
+#   the text format from savePopulation
+# : shard names are stored relative to the manifest's directory
+#
+
+def shardName( filename, tid ):
+	return '%s.pe%d' % (filename,tid)
+
+def saveManifest( filename, shards, counts, format='binary' ):
+	dirname = os.path.dirname( filename )
+	names = [ os.path.relpath(f,dirname or '.') for f in shards ]
+	mfest = { 'manifest':1, 'format':format, 'shards':names, 'counts':list(counts) }
+	tmpname = filename + '.tmp'
+	with open(tmpname,'w') as fp:
+		json.dump( mfest, fp )
+		fp.write( '\n' )
+	os.replace( tmpname, filename )
+
+# the manifest as a dict (with full shard paths), or None if filename is
+# not a manifest (e.g. a plain text population file)
+def readManifest( filename ):
+	with open(filename,'r') as fp:
+		if( fp.read(1) != '{' ):
+			return None
+		fp.seek( 0 )
+		mfest = json.load( fp )
+	if( not 'shards' in mfest ):
+		return None
+	dirname = os.path.dirname( filename )
+	mfest['shards'] = [ os.path.join(dirname,f) for f in mfest['shards'] ]
+	return mfest
+
+# members start..finish of the global (all shards) population; only
+# the shards that overlap that range are opened
+def loadShardedPopulation( gaMgr, filename, start=0, finish=None ):
+	mfest = readManifest( filename )
+	if( mfest is None ):
+		raise ValueError('not a population manifest: '+filename)
+	if( finish is None ):
+		finish = sum( mfest['counts'] )
+	pop = []
+	base = 0
+	for shard,count in zip(mfest['shards'],mfest['counts']):
+		lo = max( start-base, 0 )
+		hi = min( finish-base, count )
+		if( lo < hi ):
+			if( mfest['format'] == 'binary' ):
+				pop.extend( readBinaryPopulation( gaMgr, shard, lo, hi ) )
+			else:
+				pop.extend( loadPopulation( gaMgr, shard, lo, hi ) )
+		base = base + count
+	return pop
+
+#
+# full checkpoints (GenAlg, PsoAlg or AbcAlg)
+# : alg.getState() plus the random-number state, pickled; restoring
+#   one continues the run exactly, without re-calculating any fitness
+# : the file is written to a temp-file first and then renamed, so a
+#   job that is killed mid-save still has the previous checkpoint
+#
+
+def saveCheckpoint( alg, filename ):
+	ckpt = { 'state':alg.getState(), 'rng':int_rngState() }
+	tmpname = filename + '.tmp'
+	with open(tmpname,'wb') as fp:
+		pickle.dump( ckpt, fp, protocol=pickle.HIGHEST_PROTOCOL )
+	os.replace( tmpname, filename )
+
+def loadCheckpoint( alg, filename, restoreRng=True ):
+	with open(filename,'rb') as fp:
+		ckpt = pickle.load( fp )
+	alg.setState( ckpt['state'] )
+	if( restoreRng ):
+		int_setRngState( ckpt['rng'] )
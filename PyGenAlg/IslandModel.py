@@ -0,0 +1,252 @@
+#
+# island-model driver: one GenAlg per PE (see ParallelMgr), with
+# migration between the islands every 'interval' generations
+#
+#    im = IslandModel( islands=8, gaArgs={ 'size':500, 'chromoClass':MyChromo, ... },
+#             topology='ring', interval=10, migrants=0.05 )
+#    best = im.run( 200 )
+#
+# topology (who sends migrants to whom):
+#    'ring'   - to the next island
+#    'biring' - to the previous and next islands
+#    'torus'  - to the 4 neighbours on a 2-D grid (torusShape=(rows,cols))
+#    'full'   - to every other island
+#    'random' - to one random other island, re-drawn every migration
+# the migrants are chosen by 'selection' (best, random or tournament) and
+# split evenly over the destinations; incoming migrants replace the 'worst'
+# or 'random' members (replacement), or just fill the empty slots if the
+# senders removed them (removeMigrants=True)
+# : with asyncMigration=True there is no waiting on the neighbours: each
+#   island sends its migrants and then takes in whatever has arrived so far
+#   (from anyone), so fast islands never wait for slow ones
+# : migrants travel as packed buffers (see ParallelMgr.packMigrants), so
+#   the chromo's state must be just its data
+# : at the end, each island contributes its numBest best members and
+#   every island gets the global best (duplicates removed)
+# : run() rebuilds the model on each worker process from its kwargs, so
+#   with the spawn or forkserver start methods everything in them
+#   (gaArgs, the chromo class, initFcn, ...) must be picklable, i.e.
+#   defined at module level
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+import math
+import random
+import functools
+from multiprocessing import Process, Queue
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+from GeneticAlg import GenAlg
+from ParallelMgr import ParallelMgr, packMigrants, unpackMigrants
+
+class IslandModel(object):
+	topologies = ( 'ring', 'biring', 'torus', 'full', 'random' )
+
+	# (internal) message tags
+	migrationTag = 301
+
+	def __init__( self, **kwargs ):
+		# (kept so run() can rebuild the model on each worker)
+		self.kwargs      = dict( kwargs )
+		self.num_islands = kwargs.get( 'islands', 4 )
+		# kwargs for each island's GenAlg
+		self.gaArgs      = kwargs.get( 'gaArgs', {} )
+		self.topology    = kwargs.get( 'topology', 'ring' )
+		self.torusShape  = kwargs.get( 'torusShape', None )
+		# generations between migrations
+		self.interval    = kwargs.get( 'interval', 10 )
+		# number of migrants (or fraction of the island's pop size)
+		self.migrants    = kwargs.get( 'migrants', 0.05 )
+		self.selection   = kwargs.get( 'selection', 'best' )
+		self.replacement = kwargs.get( 'replacement', 'worst' )
+		self.removeMigrants = kwargs.get( 'removeMigrants', False )
+		# don't wait for incoming migrants, merge them when they show up
+		self.asyncMigration = kwargs.get( 'asyncMigration', False )
+		# how many of the best members each island contributes at the end
+		self.numBest     = kwargs.get( 'numBest', 1 )
+		# optional fcn(ga,commMgr) to set up an island's population
+		# (default: ga.initPopulation())
+		self.initFcn     = kwargs.get( 'initFcn', None )
+		# ParallelMgr transport
+		self.transport   = kwargs.get( 'transport', 'queue' )
+		# seeds the random topology and each island's random numbers
+		self.seed        = kwargs.get( 'seed', None )
+
+		if( not self.topology in self.topologies ):
+			raise ValueError('topology must be one of '+', '.join(self.topologies))
+		if( not self.selection in ('best','random','tournament') ):
+			raise ValueError('selection must be best, random or tournament')
+		if( not self.replacement in ('worst','random') ):
+			raise ValueError('replacement must be worst or random')
+		if( self.interval < 1 ):
+			raise ValueError('interval must be at least 1')
+		if( self.topology == 'torus' ):
+			if( self.torusShape is None ):
+				# the most square grid that uses all the islands
+				rows = int( math.sqrt(self.num_islands) )
+				while( (self.num_islands % rows) != 0 ):
+					rows = rows - 1
+				self.torusShape = ( rows, self.num_islands//rows )
+			if( self.torusShape[0]*self.torusShape[1] != self.num_islands ):
+				raise ValueError('torusShape does not match the number of islands')
+
+		self.best = []
+
+	def __str__( self ):
+		txt = 'IslandModel: %d islands, %s topology, %s migrants every %d gens (%s/%s)' % \
+			(self.num_islands,self.topology,str(self.migrants),self.interval,
+			self.selection,self.replacement)
+		if( self.asyncMigration ):
+			txt = txt + ', async'
+		return txt
+
+	# which islands does island 'pe' send migrants to (at migration number 'epoch')?
+	def destinations( self, pe, epoch=0 ):
+		n = self.num_islands
+		if( n < 2 ):
+			return []
+		if( self.topology == 'ring' ):
+			dests = [ (pe+1)%n ]
+		elif( self.topology == 'biring' ):
+			dests = [ (pe+n-1)%n, (pe+1)%n ]
+		elif( self.topology == 'torus' ):
+			rows,cols = self.torusShape
+			r = pe // cols
+			c = pe % cols
+			dests = [ r*cols+(c+cols-1)%cols, r*cols+(c+1)%cols,
+				((r+rows-1)%rows)*cols+c, ((r+1)%rows)*cols+c ]
+		elif( self.topology == 'full' ):
+			dests = [ i for i in range(n) if i != pe ]
+		else:
+			# every island draws the same targets from the same seed
+			rng = random.Random( 1000003*epoch + (self.seed or 0) )
+			targets = []
+			for i in range(n):
+				t = rng.randrange( n-1 )
+				if( t >= i ):
+					t = t + 1
+				targets.append( t )
+			dests = [ targets[pe] ]
+		# no duplicates (e.g. biring with 2 islands) and no self-sends
+		rtn = []
+		for d in dests:
+			if( (d != pe) and (not d in rtn) ):
+				rtn.append( d )
+		return rtn
+
+	# which islands send migrants to island 'pe'?
+	def sources( self, pe, epoch=0 ):
+		return [ i for i in range(self.num_islands) if pe in self.destinations(i,epoch) ]
+
+	def int_numMigrants( self, ga ):
+		if( self.migrants < 1 ):
+			return int( ga.population_sz * self.migrants + 0.5 )
+		return int( self.migrants )
+
+	def makeIsland( self, commMgr ):
+		ga = GenAlg( **self.gaArgs )
+		if( self.initFcn is not None ):
+			self.initFcn( ga, commMgr )
+		else:
+			ga.initPopulation()
+		return ga
+
+	# send migrants to this island's destinations, then take in the
+	# migrants sent to it
+	def migrate( self, ga, commMgr, epoch ):
+		tid = commMgr.tid
+		dests = self.destinations( tid, epoch )
+		srcs = self.sources( tid, epoch )
+		idxs = ga.selectMigrants( self.int_numMigrants(ga), self.selection )
+		pop = ga.population
+		out = [ pop[i] for i in idxs ]
+		for k in range(len(dests)):
+			commMgr.isend( dests[k], self.migrationTag, packMigrants(out[k::len(dests)]) )
+		if( self.removeMigrants and (len(dests) > 0) ):
+			ga.removeMembers( idxs )
+		proto = ga.chromoClass()
+		if( self.asyncMigration ):
+			incoming = commMgr.irecvMigrants( -1, self.migrationTag, proto )
+		else:
+			incoming = []
+			for s in srcs:
+				recv_pe,recv_tag,buf = commMgr.recv( s, self.migrationTag )
+				incoming.extend( unpackMigrants(proto,buf) )
+		if( len(incoming) > 0 ):
+			ga.acceptMigrants( incoming, self.replacement )
+		return len(incoming)
+
+	# gather every island's best members; all islands get the same list
+	def int_globalBest( self, ga, commMgr ):
+		ga.orderPopulation()
+		bufs = commMgr.collect( packMigrants( ga.population[:self.numBest] ) )
+		proto = ga.chromoClass()
+		allBest = []
+		seen = set()
+		for buf in bufs:
+			for c in unpackMigrants(proto,buf):
+				# (the same migrant may be on several islands)
+				key = tuple( c.data )
+				if( not key in seen ):
+					seen.add( key )
+					allBest.append( c )
+		return ga.sortPopulationList( allBest )[:self.numBest]
+
+	# run one island for 'generations' generations (call this on every PE)
+	# : returns (ga,best), best is the list of global-best chromos
+	# : stopping criteria (targetFitness etc.) only end an island's current
+	#   interval early; the islands keep migrating so none of them gets stuck
+	def runIsland( self, commMgr, generations ):
+		ga = self.makeIsland( commMgr )
+		done = 0
+		epoch = 0
+		while( done < generations ):
+			n = min( self.interval, generations-done )
+			ga.evolve( n )
+			done = done + n
+			if( done < generations ):
+				self.migrate( ga, commMgr, epoch )
+				epoch = epoch + 1
+		best = self.int_globalBest( ga, commMgr )
+		if( self.asyncMigration ):
+			# every island is past its last send (collect waited for all
+			# of them), so drop any migrants that came in too late
+			commMgr.irecvAll( -1, self.migrationTag )
+		return ga, best
+
+	# run all islands on a ParallelMgr; returns the global-best chromos
+	def run( self, generations ):
+		results = Queue()
+		parMgr = ParallelMgr( num_pes=self.num_islands, transport=self.transport )
+		parMgr.runWorkers( functools.partial( makeIslandWorker, self.__class__, self.kwargs, generations, results ) )
+		buf = results.get()
+		parMgr.finalize()
+		self.best = unpackMigrants( self.gaArgs['chromoClass'](), buf )
+		return self.best
+
+# ParallelMgr.runWorkers factory: one process per island, with a
+# module-level target and plain arguments so any start method works
+def makeIslandWorker( modelClass, modelArgs, generations, results, tid, commMgr ):
+	return Process( target=runIslandWorker,
+		args=(tid,commMgr,modelClass,modelArgs,generations,results) )
+
+def runIslandWorker( tid, commMgr, modelClass, modelArgs, generations, results ):
+	model = modelClass( **modelArgs )
+	# forked workers start with the same random state
+	seed = model.seed
+	if( seed is not None ):
+		seed = seed + tid
+	random.seed( seed )
+	if( np is not None ):
+		if( seed is None ):
+			np.random.seed()
+		else:
+			np.random.seed( seed )
+	ga,best = model.runIsland( commMgr, generations )
+	if( tid == 0 ):
+		results.put( packMigrants(best) )
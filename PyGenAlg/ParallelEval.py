@@ -0,0 +1,79 @@
+#
+# farm fitness evaluations out to a process pool
+#
+# use any concurrent.futures executor, e.g.
+#    ex = concurrent.futures.ProcessPoolExecutor( max_workers=32 )
+#    ga = GenAlg( ..., fitnessExecutor=ex )
+# only packed chromo data is sent to the workers and only fitness values
+# come back, so chromo objects are never pickled; the chromo class must
+# be importable by the worker processes (e.g. defined at module level)
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+import os
+import time
+import struct
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# worker-side prototype chromos, one per chromo class
+# : created once per worker process, then used to make cheap views
+protoCache = {}
+
+def int_getProto( chromoClass ):
+	proto = protoCache.get( chromoClass, None )
+	if( proto is None ):
+		proto = chromoClass()
+		protoCache[chromoClass] = proto
+	return proto
+
+# floats are sent as doubles so workers see exactly the same data
+def int_wireFormat( chromo ):
+	return chromo.struct_fmt.replace( 'f', 'd' )
+
+# runs in the worker: unpack a chunk of chromos and evaluate them
+def evalChunk( chromoClass, buf ):
+	proto = int_getProto( chromoClass )
+	fmt = int_wireFormat( proto )
+	rows = [ list(vals) for vals in struct.iter_unpack( fmt, buf ) ]
+	if( proto.calcFitnessBatch is not None ):
+		fits = proto.calcFitnessBatch( np.array( rows, dtype=np.float64 ) )
+		return [ float(f) for f in fits ]
+	return [ proto.viewOf(row).calcFitness() for row in rows ]
+
+# same as evalChunk, but also returns the time the worker spent on it
+def evalChunkTimed( chromoClass, buf ):
+	t0 = time.perf_counter()
+	fits = evalChunk( chromoClass, buf )
+	return fits, time.perf_counter()-t0
+
+# pack a list of chromos into one buffer for evalChunk
+def packChunk( chromos ):
+	fmt = int_wireFormat( chromos[0] )
+	return b''.join( struct.pack( fmt, *c.dataValues() ) for c in chromos )
+
+# default chunk size: about 4 chunks per cpu
+def defaultChunkSize( num ):
+	ncpu = os.cpu_count() or 1
+	return max( 1, (num + 4*ncpu - 1) // (4*ncpu) )
+
+# evaluate a list of chromos on the executor, returns the fitness values
+# (in the same order); chromos are not modified
+def evaluate( executor, chromoClass, chromos, chunksize=None ):
+	num = len(chromos)
+	if( num == 0 ):
+		return []
+	if( chunksize is None ):
+		chunksize = defaultChunkSize( num )
+	futures = []
+	for i in range(0,num,chunksize):
+		buf = packChunk( chromos[i:i+chunksize] )
+		futures.append( executor.submit( evalChunk, chromoClass, buf ) )
+	fits = []
+	for f in futures:
+		fits.extend( f.result() )
+	return fits
@@ -1,9 +1,13 @@
 
 import sys
+import time
+import queue
+import struct
 import multiprocessing
-from multiprocessing import Process, Manager
+from multiprocessing import Process, Manager, Queue
 
 import IoOps
+import ParallelEval
 
 # basic parallel operations:
 #   who-ami-i, how-big-is-the-world
@@ -15,6 +19,53 @@ import IoOps
 ANY_TAG = -1
 ANY_PE  = -1
 
+# spin-loops (manager transport) sleep between polls, starting at
+# spinMin seconds and doubling up to spinMax
+spinMin = 0.00001
+spinMax = 0.001
+
+def int_matches( msg, rem_pe, tag ):
+    return ( (rem_pe == -1) or (msg[0] == rem_pe) ) \
+        and ( (tag == -1) or (msg[1] == tag) )
+
+# migrants as one packed buffer instead of a list of pickled chromos
+# : the buffer holds the record format, then one record per chromo
+#   (data, with floats as doubles, plus fitness; NaN if not evaluated)
+# : only 'data' and 'fitness' travel, so this is for chromos whose state
+#   is just their data (the usual case)
+def int_migrantFormat( chromo ):
+    return ParallelEval.int_wireFormat( chromo ) + 'd'
+
+def packMigrants( chromos ):
+    if( len(chromos) == 0 ):
+        return b''
+    fmt = int_migrantFormat( chromos[0] )
+    parts = [ struct.pack( '<H', len(fmt) ), fmt.encode('ascii') ]
+    nan = float('nan')
+    for c in chromos:
+        fit = c.fitness
+        if( fit is None ):
+            fit = nan
+        parts.append( struct.pack( fmt, *c.dataValues(), fit ) )
+    return b''.join( parts )
+
+# views of proto (see BaseChromo.viewOf) with the migrants' data and
+# fitness, so known fitness values don't need to be re-calculated
+def unpackMigrants( proto, buf ):
+    if( len(buf) == 0 ):
+        return []
+    fmt_len, = struct.unpack_from( '<H', buf )
+    fmt = bytes( buf[2:2+fmt_len] ).decode( 'ascii' )
+    if( fmt != int_migrantFormat(proto) ):
+        raise ValueError('migrant format does not match (%s vs %s)'%(fmt,int_migrantFormat(proto)))
+    pop = []
+    for vals in struct.iter_unpack( fmt, buf[2+fmt_len:] ):
+        fit = vals[-1]
+        if( fit != fit ):
+            fit = None
+        pop.append( proto.viewOf( list(vals[:-1]), fit ) )
+    return pop
+
 class CommMgr():
     def __init__( self, **kwargs ):
         self.tid = kwargs.get( 'tid', -1 )
@@ -37,17 +88,17 @@ class CommMgr():
         rtn = self.int_send( other_pe, tag, data )
         # wait for it to be grabbed/removed
         comm = self.ns.msgLists[other_pe]
-        #msg = (other_pe,tag,data)
+        delay = spinMin
         all_done = False
         while not all_done:
-            #if( not msg in comm ):
-            #    break
             all_done = True
-            for msg in comm:
-                if( (msg[0]==ns.tid) and (msg[1]==tag) \
+            for msg in comm[:]:
+                if( (msg[0]==self.tid) and (msg[1]==tag) \
                         and (msg[2]==data) ):
                     all_done = False
-            # TODO: add a throttle to this spin-loop
+            if( not all_done ):
+                time.sleep( delay )
+                delay = min( 2*delay, spinMax )
         return rtn
 
     # : external/non-blocking send, disallows negative tags other than -1==ANY_TAG
@@ -64,37 +115,22 @@ class CommMgr():
         recv_data = None
 
         comm = self.ns.msgLists[self.tid]
-        # if blocking==false, then set all_done=True,
-        #    then we'll only do a single trip thru loop
-        all_done = not blocking
-        while not all_done:
-            #for msg in comm:
-            for n in range(len(comm)):
-                msg = comm[n]
-                # match on remote-pe?
-                match_pe = False
-                if( rem_pe == -1 ):
-                    match_pe = True
-                elif( msg[0] == rem_pe ):
-                    match_pe = True
-
-                # match on tag?
-                match_tag = False
-                if( tag == -1 ):
-                    match_tag = True
-                elif( msg[1] == tag ):
-                    match_tag = True
-
-                if( match_pe and match_tag ):    
-                    (recv_pe,recv_tag,recv_data) = msg
-                    #print( 'msg='+str(msg) )
+        delay = spinMin
+        # if blocking==false, then we'll only do a single trip thru loop
+        while True:
+            # one round-trip to the manager for a copy of the whole list
+            # : only this PE removes msgs, so the indices stay valid
+            msgs = comm[:]
+            for n in range(len(msgs)):
+                if( int_matches(msgs[n],rem_pe,tag) ):
+                    (recv_pe,recv_tag,recv_data) = msgs[n]
                     # pull this msg out of the list
-                    #comm.remove( msg )
                     comm.pop( n )
-                    all_done = True
-                    break
-            
-            # TODO: add a throttle to this spin-loop
+                    return (recv_pe,recv_tag,recv_data)
+            if( not blocking ):
+                break
+            time.sleep( delay )
+            delay = min( 2*delay, spinMax )
 
         # TODO: check for errors
         return (recv_pe,recv_tag,recv_data)
@@ -111,6 +147,37 @@ class CommMgr():
             return (-1,-1,-1)
         return self.int_recv(False,rem_pe,tag)
 
+    # every msg from rem_pe with this tag that has arrived so far, as a
+    # list of (pe,tag,data); never waits
+    def irecvAll( self, rem_pe, tag ):
+        if( tag < -1 ):
+            return []
+        msgs = []
+        while True:
+            msg = self.int_recv( False, rem_pe, tag )
+            if( msg[0] < 0 ):
+                break
+            msgs.append( msg )
+        return msgs
+
+    # send/recv migrants as one packed buffer (see packMigrants)
+    def isendMigrants( self, other_pe, tag, chromos ):
+        return self.isend( other_pe, tag, packMigrants(chromos) )
+
+    # : proto is any chromo of the right class (e.g. ga.population[0])
+    def recvMigrants( self, rem_pe, tag, proto ):
+        recv_pe,recv_tag,buf = self.recv( rem_pe, tag )
+        if( recv_pe < 0 ):
+            return []
+        return unpackMigrants( proto, buf )
+
+    # : all migrants that have arrived so far (maybe none); never waits
+    def irecvMigrants( self, rem_pe, tag, proto ):
+        pop = []
+        for recv_pe,recv_tag,buf in self.irecvAll( rem_pe, tag ):
+            pop.extend( unpackMigrants( proto, buf ) )
+        return pop
+
     def barrier( self ):
         # post the sends
         for i in range(self.num_pes):
@@ -137,10 +204,18 @@ class CommMgr():
         return rtn
 
     #
-    # For load/save to disk .. we ASSUME that all TIDs have same amount of data!
+    # For load/save to disk, each PE reads/writes only its own part
+    # : savePopulation writes one shard per PE (see IoOps.shardName) plus
+    #   a small manifest under 'filename'; loadPopulation reads only the
+    #   shard(s) holding this PE's slice, so it works even if the file
+    #   was written by a different number of PEs
+    # : plain text population files (IoOps.savePopulation) still load,
+    #   there we ASSUME that all TIDs have same amount of data!
     def loadPopulation( self, gaMgr, filename ):
         start = self.tid * gaMgr.population_sz
         finish = start + gaMgr.population_sz
+        if( IoOps.readManifest(filename) is not None ):
+            return IoOps.loadShardedPopulation( gaMgr, filename, start, finish )
         pop = IoOps.loadPopulation( gaMgr, filename, start, finish)
         return pop
 
@@ -148,57 +223,128 @@ class CommMgr():
     def randomPopulation( self, gaMgr, num ):
         return IoOps.randomPopulation( gaMgr, num )
 
-    # dumb/brute-force approach ... all IO is done by TID=0
-    # : this could have major memory and performance implications!
+    # : mode is kept for compatibility; shards are always re-written
+    # : binary shards (with fitness values) if numpy is available,
+    #   otherwise text shards
     def savePopulation( self, gaMgr, filename, mode='w' ):
-        if( self.tid == 0 ):
-            with open(filename,mode) as fp:
-                # write TID-0 data first:
-                for p in gaMgr.population:
-                    txt = p.packData()
-                    fp.write( txt + '\n' )
-                # now for each other TID in sequence ...
-                for i in range(1,self.num_pes):
-                    x,y,data = self.int_recv( True, i, -123 )
-                    for p in data:
-                        txt = p.packData()
-                        fp.write( txt + '\n' )
+        shard = IoOps.shardName( filename, self.tid )
+        if( IoOps.np is not None ):
+            fmt = 'binary'
+            IoOps.saveBinaryPopulation( gaMgr, shard, saveRng=False )
         else:
-            # every other TID sends to TID=0
-            self.int_send( 0, -123, gaMgr.population )
+            fmt = 'text'
+            IoOps.savePopulation( gaMgr, shard )
+        # only the shard sizes go through the comm-lists; this also makes
+        # sure every shard is on disk before the manifest shows up
+        counts = self.collect( len(gaMgr.population) )
+        if( self.tid == 0 ):
+            shards = [ IoOps.shardName(filename,i) for i in range(self.num_pes) ]
+            IoOps.saveManifest( filename, shards, counts, fmt )
+        self.barrier()
+
+
+
+# # # # # # # # # # # # # # # # # # # #
+
+# same API as CommMgr, but each PE has its own multiprocessing.Queue as
+# an inbox (no manager process in the middle) and receives block in
+# Queue.get instead of spinning
+# : msgs pulled off the inbox that don't match the current recv are
+#   kept (in order) in a local pending list
+# : a blocking send is acknowledged by the receiver with an internal msg
+class QueueCommMgr(CommMgr):
+    def __init__( self, **kwargs ):
+        self.tid = kwargs.get( 'tid', -1 )
+        self.queues = kwargs.get( 'queues', None )
+        self.num_pes = len(self.queues)
+        self.ns = None
+        self.pending = []
+
+    def int_ackTag( self, tag ):
+        return -1000 - tag
+
+    def int_send( self, other_pe, tag, data, ack=False ):
+        self.queues[other_pe].put( (self.tid,tag,data,ack) )
+        # TODO: check for errors
+        return (0,0)
+
+    def send( self, other_pe, tag, data ):
+        if( tag < -1 ):
+            return (-1,'ERROR_BAD_TAG')
+        rtn = self.int_send( other_pe, tag, data, True )
+        # wait for the receiver to grab it
+        self.int_recv( True, other_pe, self.int_ackTag(tag) )
+        return rtn
+
+    def int_recv( self, blocking, rem_pe, tag ):
+        inbox = self.queues[self.tid]
+        msg = None
+        for n in range(len(self.pending)):
+            if( int_matches(self.pending[n],rem_pe,tag) ):
+                msg = self.pending.pop( n )
+                break
+        while( msg is None ):
+            try:
+                m = inbox.get( blocking )
+            except queue.Empty:
+                return (-1,-1,None)
+            if( int_matches(m,rem_pe,tag) ):
+                msg = m
+            else:
+                self.pending.append( m )
+        (recv_pe,recv_tag,recv_data,ack) = msg
+        if( ack ):
+            self.int_send( recv_pe, self.int_ackTag(recv_tag), None )
+        return (recv_pe,recv_tag,recv_data)
 
 
 
 # # # # # # # # # # # # # # # # # # # #
 
+# transport is 'queue' (one multiprocessing.Queue per PE, see QueueCommMgr)
+# or 'manager' (shared Manager lists, see CommMgr)
 class ParallelMgr():
     def __init__( self, **kwargs ):
         num_pes = kwargs.get( 'num_pes', 1 )
+        self.transport = kwargs.get( 'transport', 'queue' )
+        self.num_pes = num_pes
 
         # TODO: compare num_pes to multiprocessing.cpu_count()
 
-        # manager for manager-to-worker communication & shared namespace
-        self.mpMgr = Manager()
-        self.namespace = self.mpMgr.Namespace()
-        # need a copy of num_pes
-        self.namespace.num_pes = num_pes
-
-        # manager for manager-to-worker communication
-        self.namespace.masterList = [ self.mpMgr.list() for i in range(num_pes) ]
-        # self.masterList = [ self.commMgr.list() for i in range(self.num_pes) ]
-
-        # separate lists for direct PE-to-PE communication
-        self.namespace.msgLists = [ self.mpMgr.list() for i in range(num_pes) ]
-        # self.msgLists = [ self.commMgr.list() for i in range(self.num_pes) ]
+        if( self.transport == 'queue' ):
+            self.mpMgr = None
+            self.namespace = None
+            self.queues = [ Queue() for i in range(num_pes) ]
+        elif( self.transport == 'manager' ):
+            # manager for manager-to-worker communication & shared namespace
+            self.mpMgr = Manager()
+            self.namespace = self.mpMgr.Namespace()
+            # need a copy of num_pes
+            self.namespace.num_pes = num_pes
+
+            # manager for manager-to-worker communication
+            self.namespace.masterList = [ self.mpMgr.list() for i in range(num_pes) ]
+            # self.masterList = [ self.commMgr.list() for i in range(self.num_pes) ]
+
+            # separate lists for direct PE-to-PE communication
+            self.namespace.msgLists = [ self.mpMgr.list() for i in range(num_pes) ]
+            # self.msgLists = [ self.commMgr.list() for i in range(self.num_pes) ]
+        else:
+            raise ValueError('transport must be queue or manager')
 
         print( 'ParallelMgr init' )
         sys.stdout.flush()
 
+    def commMgr( self, tid ):
+        if( self.transport == 'queue' ):
+            return QueueCommMgr( tid=tid, queues=self.queues )
+        return CommMgr( tid=tid, namespace=self.namespace )
+
     def runWorkers( self, workerModule ):
         # self.peList = [ workerModule(i,self.namespace) for i in range(self.namespace.num_pes) ]
         self.peList = []
-        for i in range(self.namespace.num_pes):
-            commMgr = CommMgr( tid=i, namespace=self.namespace )
+        for i in range(self.num_pes):
+            commMgr = self.commMgr( i )
             pid = workerModule( i, commMgr )
             self.peList.append( pid )
         for pe in self.peList:
@@ -214,4 +360,3 @@ class ParallelMgr():
         for pe in self.peList:
             pe.join()
         # TODO: check for errors
-
@@ -6,10 +6,12 @@
 
 import sys
 import math
+import time
 import random
 from copy import deepcopy
 
 from PsoAlgOps import BaseParticle
+import ParallelEval
 
 # TODO: import default crossover and mutation funcs from GenOps
 
@@ -36,6 +38,11 @@ class PsoAlg:
 		self.removeDupes   = kwargs.get( 'removeDupes', False )
 		# optional params to be passed to functions
 		self.params           = kwargs.get( 'params', {} )
+		# optional concurrent.futures executor for fitness evaluation
+		self.fitnessExecutor  = kwargs.get( 'fitnessExecutor', None )
+		self.fitnessChunkSize = kwargs.get( 'fitnessChunkSize', None )
+		# optional TelemetrySink, gets one record per generation
+		self.telemetry        = kwargs.get( 'telemetry', None )
 
 		# calculated/to-be-calculated values
 		self.population = []
@@ -56,6 +63,7 @@ class PsoAlg:
 
 		#print( 'genalg:', self.population_sz,'=',self.elitism,self.crossover,self.mutation )
 		self.is_sorted = False
+		self.generation = 0
 
 	# maybe this should be __repr__ or __str__?
 	def describe(self):
@@ -130,15 +138,24 @@ class PsoAlg:
 				pop[idx] = t
 		self.is_sorted = True
 
-	def evolve( self, iters ):
-
-		# initial calc of fitness
-		for i in range(self.population_sz):
-			part = self.population[i]
-
-			# calc fitness and update individual-best
-			fit = part.calcFitness()
+	# calc fitness for every particle (updating individual-best),
+	# then update the swarm-best
+	# : parts can be given to only evaluate some of the particles
+	def calcFitness( self, parts=None ):
+		pop = self.population
+		if( parts is not None ):
+			pop = parts
+		if( self.fitnessExecutor is not None ):
+			fits = ParallelEval.evaluate( self.fitnessExecutor, self.chromoClass,
+				[ part.chromo for part in pop ], self.fitnessChunkSize )
+			for i in range(len(pop)):
+				pop[i].setFitness( fits[i] )
+		else:
+			for part in pop:
+				part.calcFitness()
 
+		for part in pop:
+			fit = part.fitness
 			if( self.minOrMax == 'max' ):
 				# trying to maximize fitness:
 				if( fit > self.swarm_best_fit ):
@@ -150,9 +167,43 @@ class PsoAlg:
 					self.swarm_best_fit = fit
 					self.swarm_best_pos = deepcopy( part.chromo.data )
 
+	# everything needed to pick up a run where it left off, including
+	# velocities and personal bests (see IoOps.saveCheckpoint)
+	def getState(self):
+		parts = [ (list(p.chromo.data),p.fitness,list(p.velocity),list(p.best_pos),p.best_fit)
+			for p in self.population ]
+		return { 'algorithm':'PsoAlg', 'population':parts,
+			'swarm_best_fit':self.swarm_best_fit, 'swarm_best_pos':deepcopy(self.swarm_best_pos),
+			'generation':self.generation }
+
+	def setState( self, state ):
+		if( state.get('algorithm') != 'PsoAlg' ):
+			raise ValueError('state is not from a PsoAlg')
+		proto = self.chromoClass()
+		pop = []
+		for data,fit,vel,best_pos,best_fit in state['population']:
+			part = BaseParticle( chromoClass=self.chromoClass, minOrMax=self.minOrMax,
+				chromoData=proto.viewOf(list(data),fit) )
+			part.fitness  = fit
+			part.velocity = list(vel)
+			part.best_pos = list(best_pos)
+			part.best_fit = best_fit
+			pop.append( part )
+		self.population = pop
+		self.swarm_best_fit = state['swarm_best_fit']
+		self.swarm_best_pos = deepcopy( state['swarm_best_pos'] )
+		self.generation = state['generation']
+		self.is_sorted = False
+
+	def evolve( self, iters ):
+
+		# initial calc of fitness (e.g. not needed after setState)
+		self.calcFitness( [ part for part in self.population if part.fitness is None ] )
+
 		# now the main loop
 		for iter in range(iters):
 			pop = self.population
+			t_gen = time.time()
 
 			# for each particle, update the velocity and position
 			for i in range(self.population_sz):
@@ -160,20 +211,14 @@ class PsoAlg:
 				pop[i].update_pos( self.learning_rate )
 
 			# for each particle, take one step w/ current velocity
-			for i in range(self.population_sz):
-				# calc fitness and update individual-best
-				fit = pop[i].calcFitness()
-
-				if( self.minOrMax == 'max' ):
-					# trying to maximize fitness:
-					if( fit > self.swarm_best_fit ):
-						self.swarm_best_fit = fit
-						self.swarm_best_pos = deepcopy( pop[i].chromo.data )
-				else:
-					# trying to minimize fitness:
-					if( fit < self.swarm_best_fit ):
-						self.swarm_best_fit = fit
-						self.swarm_best_pos = deepcopy( pop[i].chromo.data )
+			# : calc fitness and update individual-best
+			self.calcFitness()
+			self.generation = self.generation + 1
+
+			if( self.telemetry is not None ):
+				self.telemetry.logGeneration( 'PsoAlg', self.generation,
+					[ part.fitness for part in pop ], self.minOrMax,
+					swarm_best=self.swarm_best_fit, gen_time=time.time()-t_gen )
 
 			# show a progress report?
 			if( self.showBest > 0 ):
@@ -56,7 +56,11 @@ class BaseParticle(object):
 		return self.fitness
 
 	def calcFitness( self ):
-		self.fitness = self.chromo.calcFitness()
+		return self.setFitness( self.chromo.calcFitness() )
+
+	# store a fitness value (e.g. one computed elsewhere) and update individual-best
+	def setFitness( self, fit ):
+		self.fitness = fit
 		if( self.minOrMax == 'max' ):
 			# trying to maximize fitness:
 			if( self.fitness > self.best_fit ):
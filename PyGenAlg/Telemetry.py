@@ -0,0 +1,124 @@
+#
+# stream per-generation run stats to a JSON-lines or CSV file
+#
+# pass telemetry=TelemetrySink('run.jsonl') to GenAlg, PsoAlg or AbcAlg;
+# one record is written per generation (best/mean/min/max/std fitness,
+# plus whatever else the algorithm knows, e.g. evals, timings)
+# : records are buffered and flushed every bufferSize records or
+#   flushInterval seconds, so 'tail -f' shows progress on long runs
+# : format is 'jsonl' or 'csv' (default: from the file extension); the CSV
+#   header comes from the first record, later fields not in it are dropped
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+import csv
+import json
+import math
+import time
+
+# basic stats on a list (or array) of fitness values
+def fitnessStats( fits, minOrMax='max' ):
+	n = len(fits)
+	if( n == 0 ):
+		return { 'best':None, 'mean':None, 'min':None, 'max':None, 'std':None }
+	if( hasattr(fits,'dtype') ):
+		# NumPy array
+		lo = float( fits.min() )
+		hi = float( fits.max() )
+		mean = float( fits.mean() )
+		var = float( fits.var() )
+	else:
+		total = 0.0
+		total2 = 0.0
+		lo = hi = float( fits[0] )
+		for f in fits:
+			f = float(f)
+			total = total + f
+			total2 = total2 + f*f
+			if( f < lo ):
+				lo = f
+			if( f > hi ):
+				hi = f
+		mean = total / n
+		var = max( total2/n - mean*mean, 0.0 )
+	if( minOrMax == 'max' ):
+		best = hi
+	else:
+		best = lo
+	return { 'best':best, 'mean':mean, 'min':lo, 'max':hi, 'std':math.sqrt(var) }
+
+class TelemetrySink(object):
+	def __init__( self, filename, **kwargs ):
+		self.filename      = filename
+		self.format        = kwargs.get( 'format', None )
+		self.bufferSize    = kwargs.get( 'bufferSize', 100 )
+		self.flushInterval = kwargs.get( 'flushInterval', 5.0 )
+		# also record population diversity (costs an extra pass over the data)
+		self.diversity     = kwargs.get( 'diversity', False )
+		# append to an existing file instead of starting a new one
+		self.append        = kwargs.get( 'append', False )
+
+		if( self.format is None ):
+			if( filename.endswith('.csv') ):
+				self.format = 'csv'
+			else:
+				self.format = 'jsonl'
+		if( (self.format!='jsonl') and (self.format!='csv') ):
+			raise ValueError('telemetry format must be jsonl or csv')
+
+		if( self.append ):
+			self.fp = open( filename, 'a', newline='' )
+		else:
+			self.fp = open( filename, 'w', newline='' )
+		self.writer = None
+		self.buffer = []
+		self.t0 = time.time()
+		self.last_flush = self.t0
+		self.num_records = 0
+
+	def __enter__( self ):
+		return self
+
+	def __exit__( self, *args ):
+		self.close()
+
+	def write( self, record ):
+		self.buffer.append( record )
+		self.num_records = self.num_records + 1
+		if( (len(self.buffer) >= self.bufferSize) \
+				or ((time.time()-self.last_flush) >= self.flushInterval) ):
+			self.flush()
+
+	# one record for a generation of some algorithm
+	# : stats can be given (see fitnessStats) instead of the fitness values
+	def logGeneration( self, source, generation, fits, minOrMax, stats=None, **extra ):
+		rec = { 'source':source, 'generation':generation, 'time':time.time()-self.t0 }
+		if( stats is None ):
+			stats = fitnessStats( fits, minOrMax )
+		rec.update( stats )
+		rec.update( extra )
+		self.write( rec )
+
+	def flush( self ):
+		if( self.fp is None ):
+			return
+		if( self.format == 'csv' ):
+			for rec in self.buffer:
+				if( self.writer is None ):
+					self.writer = csv.DictWriter( self.fp, fieldnames=list(rec.keys()), extrasaction='ignore' )
+					if( self.fp.tell() == 0 ):
+						self.writer.writeheader()
+				self.writer.writerow( rec )
+		else:
+			for rec in self.buffer:
+				self.fp.write( json.dumps(rec) + '\n' )
+		self.buffer = []
+		self.fp.flush()
+		self.last_flush = time.time()
+
+	def close( self ):
+		if( self.fp is not None ):
+			self.flush()
+			self.fp.close()
+			self.fp = None
@@ -2,9 +2,18 @@
 from Chromo import *
 
 from GeneticAlg import *
+from ArrayPop import *
 from ParallelMgr import *
 from GenAlgOps import *
+from ArrayOps import *
 from IoOps import *
+from FitnessCache import *
+from DedupIndex import *
+from GenProfile import *
+from Telemetry import *
+from ParallelEval import *
+from AsyncDriver import *
+from IslandModel import *
 
 from PsoAlgOps import *
 from PsoAlg import *
@@ -0,0 +1,174 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from PyGenAlg import BaseChromo, GenAlg, ArrayOps, GenAlgOps, FitnessCache, IoOps, \
+	ParallelEval, packMigrants, unpackMigrants
+
+class SumChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=6, range=(-5,5), dtype=float )
+
+	def calcFitness( self ):
+		return sum( x*x for x in self.data )
+
+class IntChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=4, range=(0,9), dtype=int )
+
+	def calcFitness( self ):
+		return sum( self.data )
+
+class TestArrayPop(unittest.TestCase):
+	def setUp(self):
+		self.ga = GenAlg( size=20, chromoClass=SumChromo,
+			minOrMax='min', storage='array' )
+		self.ga.initPopulation()
+
+	def test_shape(self):
+		pop = self.ga.population
+		self.assertEqual( len(pop), 20 )
+		self.assertEqual( pop.data.shape, (20,6) )
+
+	def test_view(self):
+		pop = self.ga.population
+		c = pop[3]
+		c.data[0] = 1.5
+		self.assertEqual( pop.data[3,0], 1.5 )
+
+	def test_evolve(self):
+		self.ga.evolve( 5 )
+		pop = self.ga.population
+		self.assertEqual( len(pop), 20 )
+		fits = [ c.fitness for c in pop ]
+		self.assertListEqual( fits, sorted(fits) )
+		self.assertEqual( self.ga.bestChromo().fitness, fits[0] )
+		self.assertAlmostEqual( fits[0], pop[0].calcFitness() )
+
+	def test_int(self):
+		ga = GenAlg( size=10, chromoClass=IntChromo, storage='array' )
+		ga.initPopulation()
+		ga.evolve( 3 )
+		data = ga.population.data
+		self.assertTrue( (data >= 0).all() and (data <= 9).all() )
+		self.assertEqual( ga.population[0].fitness, data[0].sum() )
+
+	def test_append(self):
+		ga = GenAlg( size=4, chromoClass=SumChromo, storage='array' )
+		self.assertEqual( ga.appendToPopulation( [ SumChromo() for i in range(3) ] ), 0 )
+		self.assertEqual( ga.appendToPopulation( [ SumChromo() for i in range(2) ] ), -1 )
+		self.assertEqual( len(ga.population), 3 )
+
+	def test_kernels(self):
+		ga = GenAlg( size=50, chromoClass=IntChromo, minOrMax='min', storage='array',
+			crossoverFcn = ArrayOps.crossover22Array,
+			mutationFcn  = ArrayOps.mutateFewArray,
+			pureMutationFcn = ArrayOps.mutateRandomArray,
+			params = { 'mutateNum':2, 'chromoMutationPct':0.5 } )
+		ga.initPopulation()
+		ga.evolve( 5 )
+		data = ga.population.data
+		self.assertEqual( len(ga.population), 50 )
+		self.assertTrue( (data >= 0).all() and (data <= 9).all() )
+		fits = [ c.fitness for c in ga.population ]
+		self.assertListEqual( fits, sorted(fits) )
+
+	def test_kernel_list(self):
+		with self.assertRaises( ValueError ):
+			GenAlg( size=10, chromoClass=IntChromo,
+				crossoverFcn=ArrayOps.crossover11Array, mutationFcn=ArrayOps.mutateNoneArray )
+
+# int and float genes, so array storage is float64
+class MixedChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=4, range=[(0,9),(0,9),(-1,1),(-1,1)],
+			dtype=[int,int,float,float] )
+
+	def calcFitness( self ):
+		return sum( x*x for x in self.data )
+
+class TestMixed(unittest.TestCase):
+	def test_cache_dedup(self):
+		ga = GenAlg( size=20, chromoClass=MixedChromo, storage='array',
+			fitnessCache=FitnessCache(size=100), feasibleSolnFcn=GenAlgOps.disallowDupes )
+		self.assertEqual( ga.population.data.dtype, np.float64 )
+		ga.initPopulation()
+		ga.evolve( 3 )
+		self.assertEqual( len(ga.population), 20 )
+		self.assertGreater( ga.dedupIndex.checked, 0 )
+		for c in ga.population:
+			self.assertAlmostEqual( c.fitness, c.calcFitness() )
+
+	def test_pack(self):
+		ga = GenAlg( size=5, chromoClass=MixedChromo, storage='array' )
+		ga.initPopulation()
+		ga.calcFitness()
+		pop = ga.population
+		c = pop[2]
+		vals = c.dataValues()
+		self.assertEqual( [ type(v) for v in vals ], [int,int,float,float] )
+		self.assertEqual( c.toBytes(), MixedChromo().viewOf(vals).toBytes() )
+		# text format round-trips through a list chromo
+		other = MixedChromo()
+		other.unpackData( c.packData() )
+		self.assertEqual( other.data[:2], vals[:2] )
+		fd,fname = tempfile.mkstemp()
+		os.close( fd )
+		try:
+			IoOps.savePopulation( ga, fname )
+			with open(fname) as fp:
+				self.assertEqual( len(fp.readlines()), 5 )
+		finally:
+			os.remove( fname )
+		# parallel wire formats
+		self.assertEqual( len(ParallelEval.packChunk( pop[:] )), 5*(2*4+2*8) )
+		back = unpackMigrants( MixedChromo(), packMigrants( pop[:] ) )
+		self.assertEqual( back[2].data, vals )
+		self.assertEqual( back[2].fitness, c.fitness )
+
+# records what calcFitnessBatch was called with
+class BatchChromo(BaseChromo):
+	batches = []
+	def __init__( self ):
+		BaseChromo.__init__( self, size=4, range=(0,9), dtype=int )
+
+	def calcFitness( self ):
+		return sum( x*x for x in self.data ) + 0.5
+
+	@classmethod
+	def calcFitnessBatch( cls, data ):
+		cls.batches.append( (data.dtype,data.shape[0]) )
+		return (data*data).sum( axis=1 ) + 0.5
+
+class TestBatchFitness(unittest.TestCase):
+	def test_same_fitness(self):
+		for storage in [ 'list', 'array' ]:
+			ga = GenAlg( size=20, chromoClass=BatchChromo, storage=storage )
+			ga.initPopulation()
+			BatchChromo.batches = []
+			ga.calcFitness()
+			self.assertEqual( BatchChromo.batches, [ (np.float64,20) ] )
+			for c in ga.population:
+				self.assertEqual( c.fitness, c.calcFitness() )
+			self.assertEqual( ga.num_evals, 20 )
+
+	def test_skip_known(self):
+		for storage in [ 'list', 'array' ]:
+			ga = GenAlg( size=20, chromoClass=BatchChromo, storage=storage )
+			ga.initPopulation()
+			ga.calcFitness()
+			# nothing new to evaluate
+			BatchChromo.batches = []
+			ga.calcFitness()
+			self.assertEqual( BatchChromo.batches, [] )
+			ga.evolve( 1 )
+			# only the new children (not the elites) are evaluated
+			self.assertEqual( len(BatchChromo.batches), 1 )
+			self.assertEqual( BatchChromo.batches[0][1], 20-ga.elitism )
+			for c in ga.population:
+				self.assertEqual( c.fitness, c.calcFitness() )
+
+if __name__ == '__main__':
+	unittest.main()
@@ -1,6 +1,8 @@
 
 import unittest
 
+import numpy as np
+
 from PyGenAlg import BaseChromo
 
 class TestChromo(unittest.TestCase):
@@ -25,5 +27,32 @@ class TestChromo(unittest.TestCase):
 		self.chromo.unpackData( x )
 		self.assertListEqual( self.chromo.data, newdata )
 
+	def test_spawn(self):
+		self.chromo.fitness = 3.0
+		self.chromo.extra = [ 'shared' ]
+		before = list( self.chromo.data )
+		child = self.chromo.spawnChild()
+		self.assertListEqual( child.data, before )
+		self.assertIsNone( child.fitness )
+		child.data[0] = child.data[0] + 1
+		# the parent's data is untouched ...
+		self.assertListEqual( self.chromo.data, before )
+		self.assertIsNot( child.data, self.chromo.data )
+		# ... everything else is shared, not copied
+		self.assertIs( child.dataRange, self.chromo.dataRange )
+		self.assertIs( child.extra, self.chromo.extra )
+		self.assertEqual( child.struct_fmt, self.chromo.struct_fmt )
+
+	def test_view(self):
+		rows = np.zeros( (3,4) )
+		view = self.chromo2.viewOf( rows[1], 2.5 )
+		self.assertEqual( view.fitness, 2.5 )
+		self.assertIs( view.dataType, self.chromo2.dataType )
+		# writes go straight into the row it was given
+		view.data[2] = 1.5
+		self.assertEqual( rows[1,2], 1.5 )
+		rows[1,0] = 7
+		self.assertEqual( view.data[0], 7 )
+
 if __name__ == '__main__':
 	unittest.main()
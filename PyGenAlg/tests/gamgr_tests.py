@@ -0,0 +1,486 @@
+import os
+import csv
+import json
+import tempfile
+import unittest
+import concurrent.futures
+
+from PyGenAlg import BaseChromo, GenAlg, PsoAlg, AbcAlg, FoodSource, GenAlgOps, ArrayOps, \
+	FitnessCache, AsyncDriver, TelemetrySink
+
+# small int chromo, so duplicates are common
+class CountChromo(BaseChromo):
+	calls = 0
+	def __init__( self ):
+		BaseChromo.__init__( self, size=3, range=(0,2), dtype=int )
+
+	def calcFitness( self ):
+		CountChromo.calls = CountChromo.calls + 1
+		return sum( self.data )
+
+class TestFitnessCache(unittest.TestCase):
+	def test_lru(self):
+		cache = FitnessCache( size=2 )
+		cache.store( b'a', 1.0 )
+		cache.store( b'b', 2.0 )
+		self.assertEqual( cache.lookup(b'a'), 1.0 )
+		cache.store( b'c', 3.0 )
+		# b was least-recently used
+		self.assertIsNone( cache.lookup(b'b') )
+		self.assertEqual( cache.lookup(b'c'), 3.0 )
+		self.assertEqual( (cache.hits,cache.misses,cache.evictions), (2,1,1) )
+
+	def test_persist(self):
+		fname = os.path.join( tempfile.mkdtemp(), 'cache.dat' )
+		cache = FitnessCache( size=10 )
+		cache.store( b'a', 1.0 )
+		cache.save( fname )
+		cache2 = FitnessCache( size=10, filename=fname )
+		self.assertEqual( cache2.lookup(b'a'), 1.0 )
+
+	def test_genalg(self):
+		for storage in [ 'list', 'array' ]:
+			cache = FitnessCache( size=100 )
+			ga = GenAlg( size=50, chromoClass=CountChromo, fitnessCache=cache, storage=storage )
+			ga.initPopulation()
+			CountChromo.calls = 0
+			ga.evolve( 5 )
+			# only 27 distinct chromos exist
+			self.assertLessEqual( CountChromo.calls, 27 )
+			self.assertEqual( CountChromo.calls, cache.misses )
+			for c in ga.population:
+				self.assertEqual( c.fitness, sum(c.data) )
+
+	def test_precision(self):
+		ga = GenAlg( size=2, chromoClass=FloatChromo, fitnessCache=FitnessCache(size=10) )
+		a = FloatChromo()
+		a.data = [ 1.0, 2.0, 3.0, 4.0 ]
+		b = a.spawnChild()
+		# the same value at float32 precision
+		b.data[0] = 1.0 + 1e-12
+		self.assertEqual( a.toBytes(), b.toBytes() )
+		self.assertNotEqual( a.dataKey(), b.dataKey() )
+		ga.appendToPopulation( [ a, b ] )
+		ga.calcFitness()
+		self.assertEqual( ga.num_evals, 2 )
+		for c in ga.population:
+			self.assertEqual( c.fitness, c.calcFitness() )
+
+class FloatChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=4, range=(-5,5), dtype=float )
+
+	def calcFitness( self ):
+		return sum( x*x for x in self.data )
+
+class TestTopK(unittest.TestCase):
+	def test_topk(self):
+		for storage in [ 'list', 'array' ]:
+			ga = GenAlg( size=100, chromoClass=FloatChromo, minOrMax='min',
+				elitism=0.10, sortMode='topk', storage=storage )
+			ga.initPopulation()
+			ga.evolve( 3 )
+			fits = [ c.fitness for c in ga.population ]
+			self.assertListEqual( fits[:10], sorted(fits)[:10] )
+			self.assertEqual( ga.sorted_k, 10 )
+			ga.ensureSorted()
+			fits = [ c.fitness for c in ga.population ]
+			self.assertListEqual( fits, sorted(fits) )
+
+class MixedChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=3, range=[(0,9),(-1,1),(-1,1)], dtype=[int,float,float] )
+
+	def calcFitness( self ):
+		return sum( x*x for x in self.data )
+
+class TestDedup(unittest.TestCase):
+	def makeChromo( self, vals ):
+		c = FloatChromo()
+		c.data = list( vals )
+		return c
+
+	def test_precision(self):
+		ga = GenAlg( size=10, chromoClass=FloatChromo, elitism=0 )
+		a = self.makeChromo( [1.0]*4 )
+		# the same chromo at float32 precision, but not a duplicate
+		b = self.makeChromo( [1.0+1e-12]+[1.0]*3 )
+		self.assertTrue( GenAlgOps.disallowDupes(ga,a) )
+		self.assertTrue( GenAlgOps.disallowDupes(ga,b) )
+		self.assertEqual( ga.dedupIndex.dupes, 0 )
+
+	def test_mixed_array(self):
+		# array rows are float64, int genes must still match list chromos
+		ga = GenAlg( size=10, chromoClass=MixedChromo, elitism=0, storage='array' )
+		ga.initPopulation()
+		c = ga.population[0]
+		self.assertTrue( GenAlgOps.disallowDupes(ga,c) )
+		self.assertFalse( GenAlgOps.disallowDupes(ga,MixedChromo().viewOf(c.dataValues())) )
+		ga.evolve( 2 )
+		self.assertEqual( len(ga.population), 10 )
+
+	def test_instances(self):
+		# each GenAlg keeps its own history
+		ga1 = GenAlg( size=10, chromoClass=FloatChromo, elitism=0 )
+		ga2 = GenAlg( size=10, chromoClass=FloatChromo, elitism=0 )
+		c = self.makeChromo( [1.0]*4 )
+		self.assertTrue( GenAlgOps.disallowDupes(ga1,c) )
+		self.assertTrue( GenAlgOps.disallowDupes(ga2,c) )
+		self.assertFalse( GenAlgOps.disallowDupes(ga1,c) )
+		self.assertEqual( ga1.dedupIndex.dupes, 1 )
+		self.assertEqual( ga2.dedupIndex.dupes, 0 )
+
+	def test_window(self):
+		c = self.makeChromo( [2.0]*4 )
+		for window,expect in [ (1,True), (2,False) ]:
+			ga = GenAlg( size=10, chromoClass=FloatChromo, elitism=0, dedupWindow=window )
+			ga.initPopulation()
+			self.assertTrue( GenAlgOps.disallowDupes(ga,c) )
+			GenAlgOps.disallowDupes( ga, None, newgen=True )
+			self.assertEqual( GenAlgOps.disallowDupes(ga,c), expect )
+
+	def test_evolve(self):
+		for storage in [ 'list', 'array' ]:
+			ga = GenAlg( size=50, chromoClass=FloatChromo, storage=storage,
+				feasibleSolnFcn=GenAlgOps.disallowDupes, dedupWindow=3 )
+			ga.initPopulation()
+			ga.evolve( 5 )
+			keys = set( c.dataKey() for c in ga.population )
+			self.assertEqual( len(keys), 50 )
+			self.assertGreater( ga.dedupIndex.checked, 0 )
+
+class TestStats(unittest.TestCase):
+	def test_stats(self):
+		for storage in [ 'list', 'array' ]:
+			for minOrMax in [ 'min', 'max' ]:
+				ga = GenAlg( size=25, chromoClass=FloatChromo, storage=storage, minOrMax=minOrMax )
+				ga.initPopulation()
+				ga.calcFitness()
+				fits = [ c.fitness for c in ga.population ]
+				self.assertAlmostEqual( ga.sum_fitness, sum(fits) )
+				self.assertAlmostEqual( ga.sumsq_fitness, sum( f*f for f in fits ) )
+				self.assertEqual( (ga.min_fitness,ga.max_fitness), (min(fits),max(fits)) )
+				if( minOrMax == 'min' ):
+					best = min(fits)
+				else:
+					best = max(fits)
+				# unsorted: uses the cached index
+				self.assertEqual( ga.bestChromo().fitness, best )
+				ga.sortPopulation()
+				self.assertEqual( ga.bestChromo().fitness, best )
+				self.assertEqual( ga.fitnessStats()['best'], best )
+
+	def test_short(self):
+		# a population smaller than population_sz (e.g. after dedup)
+		ga = GenAlg( size=10, chromoClass=FloatChromo )
+		ga.initPopulation()
+		del ga.population[6:]
+		ga.population[0].fitness = None
+		ga.calcFitness()
+		fits = [ c.fitness for c in ga.population ]
+		self.assertAlmostEqual( ga.sum_fitness, sum(fits) )
+		self.assertEqual( ga.max_fitness, max(fits) )
+
+class TestSteadyState(unittest.TestCase):
+	def checkSorted( self, ga ):
+		fits = [ c.fitness for c in ga.population ]
+		self.assertListEqual( fits, sorted(fits) )
+		self.assertAlmostEqual( ga.sum_fitness, sum(fits) )
+		self.assertAlmostEqual( ga.sumsq_fitness, sum( f*f for f in fits ) )
+		self.assertEqual( ga.min_fitness, fits[0] )
+
+	def test_steady(self):
+		for storage in [ 'list', 'array' ]:
+			ga = GenAlg( size=40, chromoClass=FloatChromo, minOrMax='min', storage=storage )
+			ga.initPopulation()
+			ga.calcFitness()
+			start = min( c.fitness for c in ga.population )
+			num = ga.evolveSteadyState( 200 )
+			self.assertGreater( num, 0 )
+			self.assertEqual( len(ga.population), 40 )
+			self.checkSorted( ga )
+			self.assertLessEqual( ga.population[0].fitness, start )
+
+	def test_insert(self):
+		ga = GenAlg( size=10, chromoClass=FloatChromo, minOrMax='min' )
+		ga.initPopulation()
+		ga.calcFitness()
+		ga.sortPopulation()
+		child = FloatChromo()
+		child.data = [ 0.0, 0.0, 0.0, 0.0 ]
+		self.assertEqual( ga.insertChild(child), 0 )
+		self.assertIs( ga.population[0], child )
+		child = FloatChromo()
+		child.data = [ 5.0, 5.0, 5.0, 5.0 ]
+		self.assertEqual( ga.insertChild(child), -1 )
+		self.checkSorted( ga )
+
+class TestStopping(unittest.TestCase):
+	def makeGA( self, **kwargs ):
+		ga = GenAlg( size=30, chromoClass=FloatChromo, minOrMax='min', **kwargs )
+		ga.initPopulation()
+		return ga
+
+	def test_iters(self):
+		ga = self.makeGA()
+		res = ga.evolve( 3 )
+		self.assertEqual( (res.reason,res.generations,ga.generation), ('iters',3,3) )
+		self.assertEqual( res.best_fitness, ga.population[0].fitness )
+
+	def test_target(self):
+		ga = self.makeGA( targetFitness=1000.0 )
+		res = ga.evolve( 10 )
+		self.assertEqual( (res.reason,res.generations), ('target',0) )
+
+	def test_stagnation(self):
+		# no crossover or mutation, so the best never changes
+		ga = self.makeGA( elitism=30, crossover=0, pureMutation=0, stagnationLimit=4 )
+		res = ga.evolve( 100 )
+		self.assertEqual( (res.reason,res.generations), ('stagnation',4) )
+
+	def test_evals(self):
+		ga = self.makeGA( evalBudget=100 )
+		res = ga.evolve( 100 )
+		self.assertEqual( res.reason, 'evals' )
+		self.assertGreaterEqual( res.num_evals, 100 )
+		self.assertLess( res.num_evals, 100+30 )
+
+	def test_diversity(self):
+		for storage in [ 'list', 'array' ]:
+			# crossover only, so the population converges
+			ga = self.makeGA( storage=storage, minDiversity=0.01, crossover=0.9,
+				pureMutation=0, mutationFcn=GenAlgOps.mutateNone )
+			self.assertGreater( ga.diversity(), 0.1 )
+			res = ga.evolve( 1000 )
+			self.assertEqual( res.reason, 'diversity' )
+			self.assertLess( res.diversity, 0.01 )
+
+	def test_time(self):
+		ga = self.makeGA( timeBudget=0.0 )
+		res = ga.evolve( 10 )
+		self.assertEqual( (res.reason,res.generations), ('time',0) )
+
+class TestProfile(unittest.TestCase):
+	def test_profile(self):
+		for storage,xfcn,mfcn in [ ('list',GenAlgOps.crossover12,GenAlgOps.mutateFew),
+				('array',ArrayOps.crossover12Array,ArrayOps.mutateFewArray) ]:
+			recs = []
+			ga = GenAlg( size=30, chromoClass=FloatChromo, storage=storage,
+				crossoverFcn=xfcn, mutationFcn=mfcn,
+				feasibleSolnFcn=GenAlgOps.disallowDupes,
+				profileCallback=lambda ga,rec: recs.append(rec) )
+			ga.initPopulation()
+			ga.evolve( 3 )
+			hist = ga.profiler.history
+			self.assertEqual( len(hist), 3 )
+			self.assertListEqual( recs, hist )
+			rec = hist[-1]
+			self.assertEqual( rec['generation'], 3 )
+			self.assertGreater( rec['evals'], 0 )
+			for p in [ 'selection', 'crossover', 'mutation', 'feasibility', 'fitness', 'sort' ]:
+				self.assertGreater( rec[p], 0.0 )
+			self.assertLessEqual( sum( rec[p] for p in ga.profiler.phases ), rec['total'] )
+			# originals are put back afterwards
+			self.assertIs( ga.crossoverFcn, xfcn )
+			self.assertNotIn( 'calcFitness', ga.__dict__ )
+
+class TestTelemetry(unittest.TestCase):
+	def test_jsonl(self):
+		fname = os.path.join( tempfile.mkdtemp(), 'run.jsonl' )
+		with TelemetrySink( fname, diversity=True ) as sink:
+			ga = GenAlg( size=20, chromoClass=FloatChromo, minOrMax='min', telemetry=sink, profile=True )
+			ga.initPopulation()
+			ga.evolve( 4 )
+		with open(fname) as fp:
+			recs = [ json.loads(line) for line in fp ]
+		self.assertEqual( len(recs), 4 )
+		rec = recs[-1]
+		self.assertEqual( (rec['source'],rec['generation']), ('GenAlg',4) )
+		self.assertEqual( rec['best'], ga.population[0].fitness )
+		self.assertLessEqual( rec['min'], rec['mean'] )
+		for k in [ 'std', 'diversity', 'evals', 'time_fitness' ]:
+			self.assertIn( k, rec )
+
+	def test_csv(self):
+		for algClass in [ PsoAlg, AbcAlg ]:
+			fname = os.path.join( tempfile.mkdtemp(), 'run.csv' )
+			sink = TelemetrySink( fname, bufferSize=1 )
+			alg = algClass( size=10, chromoClass=FloatChromo, minOrMax='min', telemetry=sink )
+			alg.initPopulation()
+			alg.evolve( 3 )
+			# flushed as it goes
+			with open(fname) as fp:
+				rows = list( csv.DictReader(fp) )
+			sink.close()
+			self.assertEqual( len(rows), 3 )
+			self.assertEqual( rows[-1]['source'], algClass.__name__ )
+			self.assertEqual( rows[-1]['generation'], '3' )
+
+class TestFoodSource(unittest.TestCase):
+	def test_accept(self):
+		for minOrMax,better,worse in [ ('min',1.0,9.0), ('max',9.0,1.0) ]:
+			src = FoodSource( chromoClass=FloatChromo, minOrMax=minOrMax )
+			src.chromo.fitness = src.fitness = 5.0
+			temp = src.chromo.spawnChild()
+			temp.data[0] = temp.data[0] + 1.0
+			temp.fitness = worse
+			src.testSolution( temp )
+			self.assertEqual( (src.fitness,src.counter), (5.0,1) )
+			temp.fitness = better
+			src.testSolution( temp )
+			# the bee's fitness follows the accepted solution
+			self.assertEqual( (src.fitness,src.chromo.fitness,src.counter), (better,better,0) )
+			self.assertEqual( src.chromo.data, temp.data )
+
+	def test_evolve(self):
+		alg = AbcAlg( size=10, chromoClass=FloatChromo, minOrMax='min' )
+		alg.initPopulation()
+		alg.evolve( 5 )
+		for src in alg.population:
+			self.assertEqual( src.fitness, src.chromo.fitness )
+			self.assertAlmostEqual( src.fitness, src.chromo.calcFitness() )
+
+class TestAsyncDriver(unittest.TestCase):
+	def test_run(self):
+		ga = GenAlg( size=20, chromoClass=FloatChromo, minOrMax='min' )
+		ga.initPopulation()
+		ga.calcFitness()
+		start = min( c.fitness for c in ga.population )
+		drv = AsyncDriver( ga, workers=2 )
+		try:
+			drv.run( 100 )
+		finally:
+			drv.close()
+		self.assertEqual( drv.completed, 100 )
+		fits = [ c.fitness for c in ga.population ]
+		self.assertListEqual( fits, sorted(fits) )
+		self.assertLessEqual( fits[0], start )
+		self.assertGreater( drv.utilization(), 0.0 )
+		# the initial population plus every async evaluation
+		self.assertEqual( ga.num_evals, 20+100 )
+
+	def test_workers(self):
+		ga = GenAlg( size=20, chromoClass=FloatChromo, minOrMax='min' )
+		ga.initPopulation()
+		ex = concurrent.futures.ThreadPoolExecutor( max_workers=3 )
+		try:
+			drv = AsyncDriver( ga, executor=ex, workers=3 )
+			self.assertEqual( drv.inFlight, 6 )
+			drv.run( 10 )
+			self.assertEqual( ga.num_evals, 20+10 )
+		finally:
+			ex.shutdown()
+		with self.assertRaises( ValueError ):
+			AsyncDriver( ga, workers=0 )
+
+# only 4 distinct chromos, so dedup can never fill a generation
+class TinyChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=2, range=(0,1), dtype=int )
+
+	def calcFitness( self ):
+		return sum( self.data )
+
+class BitChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=1, range=(0,1), dtype=int )
+
+	def calcFitness( self ):
+		return self.data[0]
+
+class TestAttemptBudget(unittest.TestCase):
+	def test_policies(self):
+		for storage in [ 'list', 'array' ]:
+			for policy,size in [ ('random',20), ('elite',20), ('short',4) ]:
+				ga = GenAlg( size=20, chromoClass=TinyChromo, storage=storage,
+					feasibleSolnFcn=GenAlgOps.disallowDupes,
+					attemptBudget=50, shortfallPolicy=policy )
+				ga.initPopulation()
+				ga.evolve( 3 )
+				self.assertLessEqual( ga.attempts, 51 )
+				self.assertGreater( ga.rejected, 0 )
+				self.assertGreater( ga.shortfall, 0 )
+				if( policy == 'short' ):
+					# at most the 4 distinct chromos
+					self.assertLessEqual( len(ga.population), size )
+				else:
+					self.assertEqual( len(ga.population), size )
+
+	def test_short_selection(self):
+		# only 2 distinct chromos, so 'short' generations can drop below
+		# the tournament size (or to a single member)
+		for sel in [ GenAlgOps.tournamentSelection, GenAlgOps.simpleSelection,
+				GenAlgOps.simpleSelectionParentPct ]:
+			for trial in range(10):
+				ga = GenAlg( size=10, chromoClass=BitChromo, selectionFcn=sel,
+					feasibleSolnFcn=GenAlgOps.disallowDupes, shortfallPolicy='short' )
+				ga.initPopulation()
+				ga.evolve( 5 )
+				self.assertGreater( len(ga.population), 0 )
+				self.assertLessEqual( len(ga.population), 2 )
+
+	def test_bad_policy(self):
+		with self.assertRaises( ValueError ):
+			GenAlg( size=20, chromoClass=TinyChromo, shortfallPolicy='none' )
+
+class TestMigration(unittest.TestCase):
+	def makeGA( self, storage='list', **kwargs ):
+		self.sent = []
+		ga = GenAlg( size=20, chromoClass=FloatChromo, minOrMax='min', storage=storage,
+			elitism=5, crossover=10, pureMutation=5, migration=3,
+			migrationSendFcn=lambda m: self.sent.append( [ list(c.data) for c in m ] ),
+			migrationRecvFcn=lambda: [], **kwargs )
+		ga.initPopulation()
+		return ga
+
+	def test_best(self):
+		for storage in [ 'list', 'array' ]:
+			ga = self.makeGA( storage, migrantSelection='best', removeMigrants=True )
+			ga.calcFitness()
+			ga.sortPopulation()
+			best = [ list(c.data) for c in ga.population[:3] ]
+			ga.evolve( 1 )
+			self.assertEqual( self.sent[0], best )
+			# removed, so not carried over as elites
+			for x in best:
+				self.assertNotIn( x, [ list(c.data) for c in ga.population ] )
+
+	def test_accept(self):
+		for storage in [ 'list', 'array' ]:
+			ga = self.makeGA( storage )
+			ga.evolve( 1 )
+			worst = max( c.fitness for c in ga.population )
+			ga.removeMembers( [0,1] )
+			self.assertEqual( len(ga.population), 18 )
+			incoming = [ FloatChromo() for i in range(4) ]
+			for c in incoming:
+				c.data = [0.5,0.5,0.5,0.5]
+			ga.acceptMigrants( incoming, 'worst' )
+			self.assertEqual( len(ga.population), 20 )
+			self.assertEqual( ga.population[0].fitness, 1.0 )
+			self.assertEqual( sum( 1 for c in ga.population if c.fitness == 1.0 ), 4 )
+			self.assertNotIn( worst, [ c.fitness for c in ga.population ] )
+			with self.assertRaises( ValueError ):
+				ga.acceptMigrants( incoming, 'best' )
+
+	def test_async(self):
+		calls = []
+		ga = GenAlg( size=20, chromoClass=FloatChromo, minOrMax='min',
+			elitism=5, crossover=10, pureMutation=5, migration=3, migrationSkip=4,
+			migrationSendFcn=lambda m: None,
+			migrationRecvFcn=lambda: calls.append(1) or [ FloatChromo() for i in range(30) ],
+			migrationAsync=True )
+		ga.initPopulation()
+		ga.evolve( 8 )
+		# polled every generation, not just every migrationSkip
+		self.assertEqual( len(calls), 8 )
+		self.assertEqual( len(ga.population), 20 )
+
+	def test_sort_list(self):
+		ga = self.makeGA()
+		ga.calcFitness()
+		items = ga.sortPopulationList( list(ga.population) )
+		self.assertEqual( [ c.fitness for c in items ], sorted( c.fitness for c in ga.population ) )
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,116 @@
+import os
+import random
+import tempfile
+import unittest
+
+from PyGenAlg import BaseChromo, GenAlg, PsoAlg, AbcAlg, IoOps
+
+class MixedChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=3, range=[(0,100),(-1,1),(-1,1)], dtype=[int,float,float] )
+
+	def calcFitness( self ):
+		return self.data[0] + self.data[1]*self.data[2]
+
+class TestBinaryPopulation(unittest.TestCase):
+	def setUp(self):
+		self.fname = os.path.join( tempfile.mkdtemp(), 'pop.bin' )
+
+	def makeGA( self, storage='list', size=20 ):
+		ga = GenAlg( size=size, chromoClass=MixedChromo, storage=storage )
+		ga.initPopulation()
+		return ga
+
+	def test_roundtrip(self):
+		for storage in [ 'list', 'array' ]:
+			ga = self.makeGA( storage )
+			ga.evolve( 2 )
+			# leave one member unevaluated
+			ga.population[3].fitness = None
+			IoOps.saveBinaryPopulation( ga, self.fname )
+			ga2 = self.makeGA( storage )
+			hdr = IoOps.loadBinaryPopulation( ga2, self.fname )
+			self.assertEqual( (hdr['pop_sz'],hdr['chromo_sz'],hdr['generation']), (20,3,2) )
+			self.assertEqual( ga2.generation, 2 )
+			for i in range(20):
+				self.assertListEqual( list(ga2.population[i].data), list(ga.population[i].data) )
+				self.assertEqual( ga2.population[i].fitness, ga.population[i].fitness )
+			if( storage == 'list' ):
+				self.assertIsInstance( ga2.population[0].data[0], int )
+
+	def test_slice(self):
+		ga = self.makeGA( size=50 )
+		ga.calcFitness()
+		IoOps.saveBinaryPopulation( ga, self.fname )
+		hdr,recs = IoOps.mapBinaryPopulation( self.fname )
+		self.assertEqual( len(recs), 50 )
+		self.assertEqual( recs['fitness'][7], ga.population[7].fitness )
+		ga2 = self.makeGA( size=10 )
+		IoOps.loadBinaryPopulation( ga2, self.fname, start=20, finish=30 )
+		self.assertEqual( len(ga2.population), 10 )
+		self.assertListEqual( ga2.population[0].data, ga.population[20].data )
+
+	def test_rng(self):
+		ga = self.makeGA()
+		IoOps.saveBinaryPopulation( ga, self.fname )
+		x = random.random()
+		IoOps.loadBinaryPopulation( ga, self.fname, restoreRng=True )
+		self.assertEqual( random.random(), x )
+
+	def test_bad_file(self):
+		with open(self.fname,'wb') as fp:
+			fp.write( b'not a population file' )
+		with self.assertRaises( ValueError ):
+			IoOps.readBinaryHeader( self.fname )
+
+class CountChromo(BaseChromo):
+	calls = 0
+	def __init__( self ):
+		BaseChromo.__init__( self, size=4, range=(-5,5), dtype=float )
+
+	def calcFitness( self ):
+		CountChromo.calls = CountChromo.calls + 1
+		return sum( x*x for x in self.data )
+
+class TestCheckpoint(unittest.TestCase):
+	def fitnesses( self, alg ):
+		return [ (list(x.data) if hasattr(x,'data') else list(x.chromo.data), x.fitness) for x in alg.population ]
+
+	def check( self, makeAlg ):
+		fname = os.path.join( tempfile.mkdtemp(), 'run.ckpt' )
+		alg = makeAlg()
+		alg.initPopulation()
+		alg.evolve( 3 )
+		IoOps.saveCheckpoint( alg, fname )
+		alg.evolve( 3 )
+		expect = self.fitnesses( alg )
+
+		alg2 = makeAlg()
+		IoOps.loadCheckpoint( alg2, fname )
+		CountChromo.calls = 0
+		alg2.evolve( 0 )
+		# nothing is re-evaluated on restart
+		self.assertEqual( CountChromo.calls, 0 )
+		alg2.evolve( 3 )
+		self.assertListEqual( self.fitnesses(alg2), expect )
+		self.assertEqual( alg2.generation, 6 )
+
+	def test_genalg(self):
+		for storage in [ 'list', 'array' ]:
+			self.check( lambda: GenAlg( size=20, chromoClass=CountChromo, minOrMax='min', storage=storage ) )
+
+	def test_pso(self):
+		self.check( lambda: PsoAlg( size=10, chromoClass=CountChromo, minOrMax='min' ) )
+
+	def test_abc(self):
+		self.check( lambda: AbcAlg( size=10, chromoClass=CountChromo, minOrMax='min' ) )
+
+	def test_wrong_alg(self):
+		ga = GenAlg( size=10, chromoClass=CountChromo )
+		ga.initPopulation()
+		pso = PsoAlg( size=10, chromoClass=CountChromo )
+		with self.assertRaises( ValueError ):
+			pso.setState( ga.getState() )
+
+if __name__ == '__main__':
+	unittest.main()
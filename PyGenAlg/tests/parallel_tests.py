@@ -0,0 +1,331 @@
+import os
+import sys
+import subprocess
+import tempfile
+import threading
+import time
+import types
+import unittest
+import multiprocessing
+
+from PyGenAlg import BaseChromo, GenAlg, PsoAlg, AbcAlg, CommMgr, QueueCommMgr, IoOps, IslandModel, packMigrants, unpackMigrants
+
+class SumChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=4, range=(-5,5), dtype=float )
+
+	def calcFitness( self ):
+		return sum( x*x for x in self.data )
+
+class MixedChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=3, range=[(0,100),(-1,1),(-1,1)], dtype=[int,float,float] )
+
+	def calcFitness( self ):
+		return self.data[0] + self.data[1]*self.data[2]
+
+# run fcn(commMgr) on num_pes threads
+# : 'manager' transport shares plain lists for messages
+def runPEs( num_pes, fcn, transport='manager' ):
+	ns = types.SimpleNamespace( num_pes=num_pes,
+		msgLists=[ [] for i in range(num_pes) ] )
+	queues = [ multiprocessing.Queue() for i in range(num_pes) ]
+	rtn = [ None for i in range(num_pes) ]
+	def worker( tid ):
+		if( transport == 'queue' ):
+			rtn[tid] = fcn( QueueCommMgr( tid=tid, queues=queues ) )
+		else:
+			rtn[tid] = fcn( CommMgr( tid=tid, namespace=ns ) )
+	thrs = [ threading.Thread( target=worker, args=(i,) ) for i in range(num_pes) ]
+	for t in thrs:
+		t.start()
+	for t in thrs:
+		t.join( 30 )
+	return rtn
+
+class TestTransport(unittest.TestCase):
+	def exchange( self, commMgr ):
+		tid = commMgr.tid
+		num_pes = commMgr.num_pes
+		# out-of-order tags end up in the pending list
+		commMgr.isend( (tid+1)%num_pes, 7, 'seven from %d'%tid )
+		commMgr.isend( (tid+1)%num_pes, 8, 'eight from %d'%tid )
+		x,y,eight = commMgr.recv( (tid+num_pes-1)%num_pes, 8 )
+		x,y,seven = commMgr.recv( -1, 7 )
+		commMgr.barrier()
+		vals = commMgr.collect( 10*tid )
+		return (seven,eight,vals)
+
+	def check( self, transport ):
+		rtn = runPEs( 3, self.exchange, transport )
+		for tid in range(3):
+			self.assertEqual( rtn[tid][0], 'seven from %d'%((tid+2)%3) )
+			self.assertEqual( rtn[tid][1], 'eight from %d'%((tid+2)%3) )
+			self.assertEqual( rtn[tid][2], [0,10,20] )
+
+	def test_manager(self):
+		self.check( 'manager' )
+
+	def test_queue(self):
+		self.check( 'queue' )
+
+	def test_irecv(self):
+		def fcn( commMgr ):
+			rtn = commMgr.irecv( -1, 5 )
+			commMgr.barrier()
+			return rtn
+		for transport in [ 'manager', 'queue' ]:
+			rtn = runPEs( 2, fcn, transport )
+			self.assertEqual( rtn[0], (-1,-1,None) )
+
+	def test_irecvAll(self):
+		def fcn( commMgr ):
+			if( commMgr.tid == 0 ):
+				for i in range(3):
+					commMgr.isend( 1, 4, i )
+				commMgr.isend( 1, 6, 'other' )
+			commMgr.barrier()
+			return commMgr.irecvAll( -1, 4 ), commMgr.irecvAll( -1, 4 )
+		for transport in [ 'manager', 'queue' ]:
+			rtn = runPEs( 2, fcn, transport )
+			self.assertEqual( rtn[1][0], [ (0,4,0), (0,4,1), (0,4,2) ] )
+			self.assertEqual( rtn[1][1], [] )
+			self.assertEqual( rtn[0], ([],[]) )
+
+	def test_blocking_send(self):
+		def fcn( commMgr ):
+			if( commMgr.tid == 0 ):
+				t0 = time.time()
+				commMgr.send( 1, 3, 'hello' )
+				return time.time() - t0
+			time.sleep( 0.2 )
+			return commMgr.recv( 0, 3 )
+		for transport in [ 'manager', 'queue' ]:
+			rtn = runPEs( 2, fcn, transport )
+			# send only returns after the msg was received
+			self.assertGreater( rtn[0], 0.15 )
+			self.assertEqual( rtn[1], (0,3,'hello') )
+
+class TestMigrants(unittest.TestCase):
+	def test_roundtrip(self):
+		pop = [ MixedChromo() for i in range(5) ]
+		for c in pop[:4]:
+			c.fitness = c.calcFitness()
+		buf = packMigrants( pop )
+		self.assertIsInstance( buf, bytes )
+		out = unpackMigrants( MixedChromo(), buf )
+		self.assertEqual( [ c.data for c in out ], [ c.data for c in pop ] )
+		self.assertEqual( [ c.fitness for c in out ], [ c.fitness for c in pop ] )
+		self.assertIsNone( out[4].fitness )
+		self.assertIsInstance( out[0].data[0], int )
+		self.assertListEqual( unpackMigrants( MixedChromo(), packMigrants([]) ), [] )
+
+	def test_array_rows(self):
+		ga = GenAlg( size=6, chromoClass=MixedChromo, storage='array' )
+		ga.initPopulation()
+		ga.calcFitness()
+		out = unpackMigrants( MixedChromo(), packMigrants( ga.population[:6] ) )
+		self.assertEqual( [ c.data for c in out ], [ list(c.data) for c in ga.population ] )
+		self.assertIsInstance( out[0].data[0], int )
+
+	def test_wrong_class(self):
+		buf = packMigrants( [ SumChromo() ] )
+		with self.assertRaises( ValueError ):
+			unpackMigrants( MixedChromo(), buf )
+
+	def test_exchange(self):
+		pops = [ [ MixedChromo() for i in range(4) ] for tid in range(2) ]
+		def fcn( commMgr ):
+			tid = commMgr.tid
+			commMgr.isendMigrants( 1-tid, 9, pops[tid] )
+			return commMgr.recvMigrants( 1-tid, 9, MixedChromo() )
+		for transport in [ 'manager', 'queue' ]:
+			rtn = runPEs( 2, fcn, transport )
+			for tid in range(2):
+				self.assertEqual( [ c.data for c in rtn[tid] ], [ c.data for c in pops[1-tid] ] )
+
+class TestIslandModel(unittest.TestCase):
+	gaArgs = { 'size':20, 'chromoClass':SumChromo, 'minOrMax':'min' }
+
+	def test_topologies(self):
+		im = IslandModel( islands=6, topology='ring' )
+		self.assertEqual( im.destinations(5), [0] )
+		im = IslandModel( islands=6, topology='biring' )
+		self.assertEqual( im.destinations(0), [5,1] )
+		self.assertEqual( IslandModel( islands=2, topology='biring' ).destinations(0), [1] )
+		im = IslandModel( islands=6, topology='torus' )
+		self.assertEqual( im.torusShape, (2,3) )
+		self.assertEqual( sorted(im.destinations(0)), [1,2,3] )
+		im = IslandModel( islands=4, topology='full' )
+		self.assertEqual( im.sources(2), [0,1,3] )
+		im = IslandModel( islands=5, topology='random', seed=3 )
+		for epoch in range(5):
+			dests = [ im.destinations(pe,epoch) for pe in range(5) ]
+			for pe in range(5):
+				self.assertEqual( len(dests[pe]), 1 )
+				self.assertNotEqual( dests[pe][0], pe )
+				self.assertEqual( im.sources(pe,epoch), [ i for i in range(5) if dests[i]==[pe] ] )
+		with self.assertRaises( ValueError ):
+			IslandModel( topology='star' )
+		with self.assertRaises( ValueError ):
+			IslandModel( islands=6, topology='torus', torusShape=(4,2) )
+
+	def test_run(self):
+		for topology in IslandModel.topologies:
+			im = IslandModel( islands=3, gaArgs=self.gaArgs, topology=topology,
+				interval=2, migrants=4, numBest=3 )
+			rtn = runPEs( 3, lambda cm: im.runIsland( cm, 6 ), 'queue' )
+			best = [ c.fitness for c in rtn[0][1] ]
+			self.assertEqual( len(best), 3 )
+			self.assertEqual( best, sorted(best) )
+			for ga,b in rtn:
+				self.assertEqual( [ c.fitness for c in b ], best )
+				self.assertEqual( len(ga.population), 20 )
+			# it really is the best over all islands
+			allFits = [ c.fitness for ga,b in rtn for c in ga.population ]
+			self.assertEqual( best[0], min(allFits) )
+
+	def test_spawn(self):
+		# run() must not rely on fork: the workers get the model's kwargs,
+		# not the model, and start from a module-level function
+		code = """
+import multiprocessing
+from PyGenAlg import IslandModel
+from PyGenAlg.tests.parallel_tests import SumChromo
+if __name__ == '__main__':
+	multiprocessing.set_start_method( 'spawn' )
+	im = IslandModel( islands=2, gaArgs={ 'size':10, 'chromoClass':SumChromo, 'minOrMax':'min' },
+		interval=2, numBest=2, seed=5 )
+	best = im.run( 4 )
+	print( 'best=%d %s' % (len(best),best[0].fitness <= best[1].fitness) )
+"""
+		env = dict( os.environ, PYTHONPATH=os.pathsep.join(sys.path) )
+		out = subprocess.run( [ sys.executable, '-c', code ], env=env, timeout=120,
+			stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True )
+		self.assertEqual( out.returncode, 0, out.stdout )
+		self.assertIn( 'best=2 True', out.stdout )
+
+	def test_async(self):
+		for topology in [ 'biring', 'random' ]:
+			im = IslandModel( islands=3, gaArgs=self.gaArgs, topology=topology,
+				interval=1, migrants=2, asyncMigration=True )
+			def fcn( cm ):
+				ga,best = im.runIsland( cm, 5 )
+				return ga, best, cm.irecvAll( -1, -1 )
+			rtn = runPEs( 3, fcn, 'queue' )
+			for ga,best,left in rtn:
+				self.assertEqual( len(ga.population), 20 )
+				self.assertEqual( best[0].fitness, rtn[0][1][0].fitness )
+				# nothing left in the mailbox
+				self.assertEqual( left, [] )
+
+	def test_async_nowait(self):
+		# island 0 migrates while island 1 has not sent anything yet
+		im = IslandModel( islands=2, gaArgs=self.gaArgs, migrants=2, asyncMigration=True )
+		def fcn( cm ):
+			ga = im.makeIsland( cm )
+			if( cm.tid == 0 ):
+				n0 = im.migrate( ga, cm, 0 )
+				cm.barrier()
+				cm.barrier()
+				return n0, im.migrate( ga, cm, 1 )
+			cm.barrier()
+			im.migrate( ga, cm, 0 )
+			cm.barrier()
+			return None
+		rtn = runPEs( 2, fcn, 'queue' )
+		self.assertEqual( rtn[0], (0,2) )
+
+	def test_remove(self):
+		im = IslandModel( islands=2, gaArgs=self.gaArgs, interval=1, migrants=5,
+			selection='tournament', replacement='random', removeMigrants=True )
+		def fcn( cm ):
+			ga = im.makeIsland( cm )
+			before = [ list(c.data) for c in ga.population ]
+			im.migrate( ga, cm, 0 )
+			return before, [ list(c.data) for c in ga.population ]
+		rtn = runPEs( 2, fcn, 'queue' )
+		for tid in range(2):
+			before,after = rtn[tid]
+			self.assertEqual( len(after), 20 )
+			# 5 members left, 5 came in from the other island
+			kept = [ x for x in after if x in before ]
+			self.assertEqual( len(kept), 15 )
+			self.assertEqual( len([ x for x in after if x in rtn[1-tid][0] ]), 5 )
+
+class TestShardedIO(unittest.TestCase):
+	def setUp(self):
+		self.fname = os.path.join( tempfile.mkdtemp(), 'pop.dat' )
+
+	def makeGA( self, size=10 ):
+		ga = GenAlg( size=size, chromoClass=SumChromo, minOrMax='min' )
+		ga.initPopulation()
+		ga.calcFitness()
+		return ga
+
+	def test_roundtrip(self):
+		def save( commMgr ):
+			ga = self.makeGA()
+			commMgr.savePopulation( ga, self.fname )
+			return ga.population
+		saved = runPEs( 3, save )
+		mfest = IoOps.readManifest( self.fname )
+		self.assertEqual( mfest['counts'], [10,10,10] )
+		for i in range(3):
+			self.assertTrue( os.path.isfile( IoOps.shardName(self.fname,i) ) )
+
+		def load( commMgr ):
+			return commMgr.loadPopulation( self.makeGA(), self.fname )
+		loaded = runPEs( 3, load )
+		for i in range(3):
+			self.assertEqual( [ c.data for c in loaded[i] ], [ c.data for c in saved[i] ] )
+			# fitness comes back too
+			self.assertEqual( [ c.fitness for c in loaded[i] ], [ c.fitness for c in saved[i] ] )
+
+	def test_repartition(self):
+		# written by 3 PEs of 10, read back by 2 PEs of 15
+		runPEs( 3, lambda cm: cm.savePopulation( self.makeGA(), self.fname ) )
+		allPop = IoOps.loadShardedPopulation( self.makeGA(), self.fname )
+		self.assertEqual( len(allPop), 30 )
+		loaded = runPEs( 2, lambda cm: cm.loadPopulation( self.makeGA(15), self.fname ) )
+		self.assertEqual( [ c.data for c in loaded[0]+loaded[1] ], [ c.data for c in allPop ] )
+
+	def test_pso_abc(self):
+		# members hold a chromo instead of being one
+		for algClass in [ PsoAlg, AbcAlg ]:
+			def makeAlg():
+				alg = algClass( size=10, chromoClass=SumChromo, minOrMax='min' )
+				alg.initPopulation()
+				return alg
+			def save( commMgr ):
+				alg = makeAlg()
+				alg.evolve( 1 )
+				commMgr.savePopulation( alg, self.fname )
+				return alg.population
+			saved = runPEs( 2, save )
+			def load( commMgr ):
+				alg = makeAlg()
+				alg.population = []
+				alg.appendToPopulation( commMgr.loadPopulation( alg, self.fname ) )
+				return alg.population
+			loaded = runPEs( 2, load )
+			for i in range(2):
+				self.assertEqual( [ list(x.chromo.data) for x in loaded[i] ],
+					[ list(x.chromo.data) for x in saved[i] ] )
+				self.assertEqual( [ x.chromo.fitness for x in loaded[i] ],
+					[ x.fitness for x in saved[i] ] )
+
+	def test_text_file(self):
+		# plain text population files still work
+		ga = self.makeGA( 20 )
+		IoOps.savePopulation( ga, self.fname )
+		self.assertIsNone( IoOps.readManifest( self.fname ) )
+		loaded = runPEs( 2, lambda cm: cm.loadPopulation( self.makeGA(), self.fname ) )
+		self.assertEqual( len(loaded[1]), 10 )
+		# (text files store 32-bit floats)
+		for a,b in zip(loaded[1],ga.population[10:]):
+			for x,y in zip(a.data,b.data):
+				self.assertAlmostEqual( x, y, places=5 )
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,77 @@
+import random
+import unittest
+import concurrent.futures
+
+import numpy as np
+
+from PyGenAlg import BaseChromo, GenAlg, PsoAlg, AbcAlg, ParallelEval
+
+# (module level, so the worker processes can import it)
+class SqChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=5, range=[(-5,5),(-5,5),(-5,5),(0,9),(0,9)],
+			dtype=[float,float,float,int,int] )
+
+	def calcFitness( self ):
+		return sum( x*x for x in self.data )
+
+class TestParallelEval(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.executor = concurrent.futures.ProcessPoolExecutor( max_workers=2 )
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.executor.shutdown()
+
+	def seed( self ):
+		random.seed( 1234 )
+		np.random.seed( 1234 )
+
+	def test_evaluate(self):
+		chromos = [ SqChromo() for i in range(17) ]
+		for chunk in [ None, 1, 5, 100 ]:
+			fits = ParallelEval.evaluate( self.executor, SqChromo, chromos, chunk )
+			self.assertEqual( fits, [ c.calcFitness() for c in chromos ] )
+		self.assertEqual( ParallelEval.evaluate( self.executor, SqChromo, [] ), [] )
+
+	def test_genalg(self):
+		for storage in [ 'list', 'array' ]:
+			runs = []
+			for kwargs in [ {}, { 'fitnessExecutor':self.executor },
+					{ 'fitnessExecutor':self.executor, 'fitnessChunkSize':3 } ]:
+				ga = GenAlg( size=30, chromoClass=SqChromo, minOrMax='min', storage=storage, **kwargs )
+				# (GenAlg re-seeds the random module)
+				self.seed()
+				ga.initPopulation()
+				ga.evolve( 4 )
+				runs.append( ( [ list(c.data) for c in ga.population ],
+					[ c.fitness for c in ga.population ], ga.num_evals ) )
+			# same population, same fitness, same number of evaluations
+			self.assertEqual( runs[1], runs[0] )
+			self.assertEqual( runs[2], runs[0] )
+			for c in ga.population:
+				self.assertEqual( c.fitness, c.calcFitness() )
+
+	def test_pso(self):
+		runs = []
+		for kwargs in [ {}, { 'fitnessExecutor':self.executor, 'fitnessChunkSize':2 } ]:
+			pso = PsoAlg( size=10, chromoClass=SqChromo, minOrMax='min', **kwargs )
+			self.seed()
+			pso.initPopulation()
+			pso.evolve( 3 )
+			runs.append( [ (list(p.chromo.data),p.fitness) for p in pso.population ] )
+		self.assertEqual( runs[1], runs[0] )
+
+	def test_abc(self):
+		# the pooled version forages in batches, so the runs differ; check
+		# that every fitness is what serial evaluation gives
+		abc = AbcAlg( size=10, chromoClass=SqChromo, minOrMax='min',
+			fitnessExecutor=self.executor, fitnessChunkSize=3 )
+		abc.initPopulation()
+		abc.evolve( 3 )
+		for src in abc.population:
+			self.assertEqual( src.fitness, src.chromo.calcFitness() )
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,171 @@
+import random
+import unittest
+
+from PyGenAlg import BaseChromo, GenAlg, GenAlgOps, ArrayOps
+
+class FixedChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=2, range=(0,10), dtype=float )
+
+	def calcFitness( self ):
+		return 0.0
+
+# chi-square critical value for 3 degrees of freedom at p=0.001
+CHI2_CRIT = 16.27
+
+class SelectionTestCase(unittest.TestCase):
+	# (minOrMax, fitness values, intended weights)
+	cases = [
+		( 'max', [ 1.0, 2.0, 3.0, 4.0 ],     [ 1.0, 2.0, 3.0, 4.0 ] ),
+		( 'max', [ -4.0, -3.0, -2.0, -1.0 ], [ 1.0, 2.0, 3.0, 4.0 ] ),
+		( 'min', [ 1.0, 2.0, 3.0, 4.0 ],     [ 4.0, 3.0, 2.0, 1.0 ] ),
+		( 'min', [ -4.0, -3.0, -2.0, -1.0 ], [ 4.0, 3.0, 2.0, 1.0 ] ),
+	]
+
+	def makeGA( self, minOrMax, fits ):
+		ga = GenAlg( size=len(fits), chromoClass=FixedChromo, minOrMax=minOrMax )
+		ga.initPopulation()
+		for i in range(len(fits)):
+			ga.population[i].fitness = fits[i]
+		ga.calcFitness()
+		random.seed( 1234 )
+		return ga
+
+	def checkCounts( self, counts, weights ):
+		n = sum( counts )
+		total = sum( weights )
+		chi2 = 0.0
+		for i in range(len(weights)):
+			expect = n * weights[i] / total
+			chi2 = chi2 + (counts[i]-expect)**2 / expect
+		self.assertLess( chi2, CHI2_CRIT )
+
+	def drawCounts( self, ga, fcn, num ):
+		counts = [ 0 for i in range(len(ga.population)) ]
+		for i in range(num):
+			counts[ fcn(ga) ] += 1
+		return counts
+
+class TestFitnessProportional(SelectionTestCase):
+	def test_alias(self):
+		for minOrMax,fits,weights in self.cases:
+			ga = self.makeGA( minOrMax, fits )
+			counts = self.drawCounts( ga, GenAlgOps.int_aliasSelection, 40000 )
+			self.checkCounts( counts, weights )
+
+	def test_roulette(self):
+		for minOrMax,fits,weights in self.cases:
+			ga = self.makeGA( minOrMax, fits )
+			counts = self.drawCounts( ga, GenAlgOps.int_rouletteWheelSelection, 40000 )
+			self.checkCounts( counts, weights )
+
+	def test_alias_batch(self):
+		for minOrMax,fits,weights in self.cases:
+			ga = self.makeGA( minOrMax, fits )
+			ArrayOps.np.random.seed( 1234 )
+			idx1,idx2 = ArrayOps.aliasSelectionBatch( ga, 20000 )
+			counts = [ 0 for i in range(len(fits)) ]
+			for i in list(idx1) + list(idx2):
+				counts[i] += 1
+			self.checkCounts( counts, weights )
+
+	def test_mixed_sign(self):
+		# weights must stay positive when fitness values straddle zero
+		ga = self.makeGA( 'min', [ -2.0, 0.0, 1.0, 5.0 ] )
+		self.assertListEqual( GenAlgOps.int_rouletteWeights(ga), [ 8.0, 6.0, 5.0, 1.0 ] )
+		ga = self.makeGA( 'max', [ -2.0, 0.0, 1.0, 5.0 ] )
+		self.assertListEqual( GenAlgOps.int_rouletteWeights(ga), [ 1.0, 3.0, 4.0, 8.0 ] )
+
+	def test_roulette_batch(self):
+		for minOrMax,fits,weights in self.cases:
+			ga = self.makeGA( minOrMax, fits )
+			ArrayOps.np.random.seed( 1234 )
+			idx1,idx2 = ArrayOps.rouletteWheelSelectionBatch( ga, 20000 )
+			counts = [ 0 for i in range(len(fits)) ]
+			for i in list(idx1) + list(idx2):
+				counts[i] += 1
+			self.checkCounts( counts, weights )
+
+	def test_table_cache(self):
+		ga = self.makeGA( 'max', [ 1.0, 2.0, 3.0, 4.0 ] )
+		table = GenAlgOps.rouletteTable( ga )
+		self.assertEqual( table, [ 1.0, 3.0, 6.0, 10.0 ] )
+		# same generation, same (cached) table
+		self.assertIs( GenAlgOps.rouletteTable( ga ), table )
+		ga.population[3].fitness = 8.0
+		ga.popChanged()
+		self.assertEqual( GenAlgOps.rouletteTable( ga ), [ 1.0, 3.0, 6.0, 14.0 ] )
+
+class TestRank(SelectionTestCase):
+	# weight for rank i (best first) is 1/(i+1)
+	def rankWeights( self, ga ):
+		order = sorted( range(len(ga.population)), key=lambda i: ga.population[i].fitness,
+			reverse=(ga.minOrMax=='max') )
+		weights = [ 0.0 for i in order ]
+		for r in range(len(order)):
+			weights[ order[r] ] = 1.0/(r+1)
+		return weights
+
+	def test_rank(self):
+		for minOrMax,fits,w in self.cases:
+			ga = self.makeGA( minOrMax, fits )
+			ga.sortPopulation()
+			weights = self.rankWeights( ga )
+			counts = [ 0 for i in range(len(fits)) ]
+			for i in range(20000):
+				for idx in GenAlgOps.rankSelection( ga ):
+					counts[idx] += 1
+			self.checkCounts( counts, weights )
+
+	def test_rank_batch(self):
+		for minOrMax,fits,w in self.cases:
+			ga = self.makeGA( minOrMax, fits )
+			ArrayOps.np.random.seed( 1234 )
+			idx1,idx2 = ArrayOps.rankSelectionBatch( ga, 20000 )
+			# (sorts the population first)
+			weights = self.rankWeights( ga )
+			self.assertEqual( weights, [ 1.0, 0.5, 1.0/3, 0.25 ] )
+			counts = [ 0 for i in range(len(fits)) ]
+			for i in list(idx1) + list(idx2):
+				counts[i] += 1
+			self.checkCounts( counts, weights )
+
+	def test_table_cache(self):
+		ga = self.makeGA( 'max', [ 1.0, 2.0, 3.0, 4.0 ] )
+		table = GenAlgOps.rankTable( ga )
+		self.assertIs( GenAlgOps.rankTable( ga ), table )
+		# only depends on the population size
+		del ga.population[3]
+		ga.popChanged()
+		self.assertEqual( GenAlgOps.rankTable( ga ), [ 1.0, 1.5, 1.5+1.0/3 ] )
+
+class TestTournament(SelectionTestCase):
+	def test_scalar(self):
+		# a full-size tournament (without replacement) always picks the best
+		for minOrMax,fits,weights in self.cases:
+			ga = self.makeGA( minOrMax, fits )
+			ga.params['tournamentSize'] = len(fits)
+			best = weights.index( max(weights) )
+			for i in range(20):
+				self.assertEqual( GenAlgOps.int_tournamentSelection(ga), best )
+
+	def test_batch(self):
+		# with replacement: P(i-th best wins) = ((n-i)/n)^k - ((n-i-1)/n)^k
+		k = 2
+		for minOrMax,fits,weights in self.cases:
+			ga = self.makeGA( minOrMax, fits )
+			ga.params['tournamentSize'] = k
+			ArrayOps.np.random.seed( 1234 )
+			idx1,idx2 = ArrayOps.tournamentSelectionBatch( ga, 20000 )
+			counts = [ 0 for i in range(len(fits)) ]
+			for i in list(idx1) + list(idx2):
+				counts[i] += 1
+			n = len(fits)
+			probs = []
+			for w in weights:
+				r = n - int(w)
+				probs.append( (float(n-r)/n)**k - (float(n-r-1)/n)**k )
+			self.checkCounts( counts, probs )
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,71 @@
+#
+# benchmark of per-chromo vs batch (vectorized) fitness evaluation
+# on the de Jong #1 and Rosenbrock examples
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+import time
+
+from PyGenAlg import GenAlg
+
+import ga_dejong1
+import ga_rosenbrock
+
+# # # # # # # # # # # # # # # # # # # #
+## # # # # # # # # # # # # # # # # # #
+# # # # # # # # # # # # # # # # # # # #
+
+# same chromos, but with the batch hook turned off
+class DejongLoop(ga_dejong1.MyChromo):
+	calcFitnessBatch = None
+
+class RosenbrockLoop(ga_rosenbrock.MyChromo):
+	calcFitnessBatch = None
+
+def timeIt( chromoClass, storage, pop_sz, iters ):
+	ga = GenAlg( size=pop_sz,
+		elitism      = 0.10,
+		crossover    = 0.60,
+		pureMutation = 0.30,
+		chromoClass  = chromoClass,
+		minOrMax     = 'min',
+		storage      = storage,
+	)
+	ga.initPopulation()
+
+	# first: evaluate a full (fresh) population
+	t0 = time.time()
+	ga.calcFitness()
+	t_eval = time.time() - t0
+
+	# then: a few full generations
+	t0 = time.time()
+	ga.evolve( iters )
+	t_evolve = time.time() - t0
+
+	return t_eval, t_evolve
+
+# # # # # # # # # # # # # # # # # # # #
+## # # # # # # # # # # # # # # # # # #
+# # # # # # # # # # # # # # # # # # # #
+
+def main():
+	pop_sz = 5000
+	iters  = 3
+
+	tests = [
+		( 'dejong1',    DejongLoop,     ga_dejong1.MyChromo ),
+		( 'rosenbrock', RosenbrockLoop, ga_rosenbrock.MyChromo ),
+	]
+
+	print( 'pop_sz=%d iters=%d'%(pop_sz,iters) )
+	for storage in [ 'list', 'array' ]:
+		for name,loopClass,batchClass in tests:
+			e1,v1 = timeIt( loopClass, storage, pop_sz, iters )
+			e2,v2 = timeIt( batchClass, storage, pop_sz, iters )
+			print( '%-10s %-5s  calcFitness: loop=%0.4fs batch=%0.4fs (%0.1fx)   evolve: loop=%0.3fs batch=%0.3fs (%0.2fx)' \
+				% (name,storage, e1,e2,e1/e2, v1,v2,v1/v2) )
+
+if __name__ == '__main__':
+	main()
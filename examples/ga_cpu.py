@@ -8,7 +8,6 @@
 import os
 import time
 import random
-from copy import deepcopy
 
 import click
 
@@ -198,8 +197,7 @@ def MyCrossover1( mother, father ):
 	idx = random.randint(0,prog_size-1)
 	num = random.randint(0,prog_size//2)
 	ofs = random.randint(0,prog_size-num-1)
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	for i in range(num):
 		ii = (idx+i) % prog_size
 		jj = (idx+num+ofs+i) % prog_size
@@ -213,8 +211,7 @@ def MyCrossover1( mother, father ):
 # 1 crossover-point in program-code and 1 crossover-point in rom-memory
 # leads to 1 child
 def MyCrossover111( mother, father, params={} ):
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	# program-code crossover ...
 	index1 = random.randrange(prog_size)
 	child.data[index1:prog_size] = father.data[index1:prog_size]
@@ -225,10 +222,8 @@ def MyCrossover111( mother, father, params={} ):
 # 1 crossover-point in program-code and 1 crossover-point in rom-memory
 # leads to 2 children
 def MyCrossover112( mother, father, params={} ):
-	child1 = deepcopy(mother)
-	child1.fitness = None
-	child2 = deepcopy(father)
-	child2.fitness = None
+	child1 = mother.spawnChild()
+	child2 = father.spawnChild()
 	# program-code crossover ...
 	index1 = random.randrange(prog_size)
 	child1.data[index1:prog_size] = father.data[index1:prog_size]
@@ -241,10 +236,8 @@ def MyCrossover112( mother, father, params={} ):
 # 2 crossover-point in program-code and 1 crossover-point in rom-memory
 # leads to 2 children
 def MyCrossover212( mother, father, params={} ):
-	child1 = deepcopy(mother)
-	child1.fitness = None
-	child2 = deepcopy(father)
-	child2.fitness = None
+	child1 = mother.spawnChild()
+	child2 = father.spawnChild()
 	# program-code crossover ...
 	(index1,index2) = random.sample( range(prog_size), k=2 )
 	if( index1 > index2 ):
@@ -261,8 +254,7 @@ def MyCrossover212( mother, father, params={} ):
 # mutate a few prog-elements and a few rom-elements
 def MyMutate( mother, params={} ):
 	num = params.get( 'mutateNum', 1 )
-	child = deepcopy(mother)
-	child.fitness = None
+	child = mother.spawnChild()
 	# most of the randomness will be within the program
 	chrlist = random.sample( range(prog_size), k=num-1 )
 	# and make sure one is in the ROM-memory
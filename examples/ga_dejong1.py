@@ -35,6 +35,12 @@ class MyChromo(BaseChromo):
 			fitness = fitness + data[i]**2
 		return fitness
 
+	# vectorized version of the same (one chromo per row);
+	# GenAlg uses this instead of calcFitness when it is present
+	@classmethod
+	def calcFitnessBatch( cls, data ):
+		return (data**2).sum( axis=1 )
+
 # # # # # # # # # # # # # # # # # # # #
 ## # # # # # # # # # # # # # # # # # #
 # # # # # # # # # # # # # # # # # # # #
@@ -54,6 +60,8 @@ def main():
 		#feasibleSolnFcn = GenAlgOps.disallowDupes,
 		minOrMax     = 'min',
 		showBest     = 0,
+		# stop early once the best value stops improving
+		stagnationLimit = 100,
 	)
 
 	# init the gen-alg library from scratch
@@ -62,9 +70,12 @@ def main():
 
 	#
 	# Run it !!
-	# : we'll just do 10 epochs of 10 steps each
+	# : we'll just do (up to) 100 epochs of 10 steps each
 	for i in range(100):
-		ga.evolve( 10 )
+		res = ga.evolve( 10 )
+		if( res.reason != 'iters' ):
+			print( res )
+			break
 
 		# give some running feedback on our progress
 		#print( 'iter '+str(i) + ", best chromo:" )
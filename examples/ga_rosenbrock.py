@@ -37,6 +37,13 @@ class MyChromo(BaseChromo):
 					+ (1.0 - data[i])**2
 		return fitness
 
+	# vectorized version of the same (one chromo per row);
+	# GenAlg uses this instead of calcFitness when it is present
+	@classmethod
+	def calcFitnessBatch( cls, data ):
+		return ( 100.0*(data[:,1:]-data[:,:-1]**2)**2 \
+				+ (1.0 - data[:,:-1])**2 ).sum( axis=1 )
+
 # # # # # # # # # # # # # # # # # # # #
 ## # # # # # # # # # # # # # # # # # #
 # # # # # # # # # # # # # # # # # # # #
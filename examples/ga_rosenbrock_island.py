@@ -0,0 +1,64 @@
+#
+# island-model version of ga_rosenbrock.py: 4 GenAlg islands on
+# separate processes, swapping their best members every 10 generations
+#
+# Copyright (C) 2018-2020, John Pormann, Duke University Libraries
+#
+
+from PyGenAlg import BaseChromo, IslandModel
+
+# # # # # # # # # # # # # # # # # # # #
+## # # # # # # # # # # # # # # # # # #
+# # # # # # # # # # # # # # # # # # # #
+
+# de Jong's function #2/Rosenbrock's Function
+# f2(x)=sum(100*(x(i+1)-x(i)^2)^2+(1-x(i))^2)
+#     i=1:n-1; -2.048<=x(i)<=2.048
+# : with n=10
+# : solution is all ones
+
+class MyChromo(BaseChromo):
+	def __init__( self ):
+		BaseChromo.__init__( self, size=10,
+			range=(-2.048,2.048), dtype=float )
+
+	# calculate the fitness function
+	def calcFitness( self ):
+		data = self.data
+		fitness = 0.0
+		for i in range(0,9):
+			fitness = fitness + 100.0*(data[i+1]-data[i]**2)**2 \
+					+ (1.0 - data[i])**2
+		return fitness
+
+# # # # # # # # # # # # # # # # # # # #
+## # # # # # # # # # # # # # # # # # #
+# # # # # # # # # # # # # # # # # # # #
+
+def main():
+
+	im = IslandModel( islands=4,
+		gaArgs = { 'size':100,
+			'elitism':0.10, 'crossover':0.60, 'pureMutation':0.30,
+			'chromoClass':MyChromo, 'minOrMax':'min' },
+		topology    = 'biring',
+		interval    = 10,
+		migrants    = 0.05,
+		selection   = 'best',
+		replacement = 'worst',
+		numBest     = 3
+	)
+	print( im )
+
+	#
+	# Run it !!
+	best = im.run( 500 )
+
+	#
+	# all done ... output final results
+	print( "\nfinal best chromos:" )
+	for c in best:
+		print( c )
+
+if __name__ == '__main__':
+	main()
@@ -150,6 +150,9 @@ class the_code( Process ):
 
 		# TODO: calculate the splitting across the PEs
 
+		# prototype chromo for unpacking migrants
+		self.proto = MyChromo()
+
 		# otherwise, init the gen-alg library from scratch
 		ga = GenAlg( size=1000,
 			elitism      = 0.10,
@@ -158,6 +161,8 @@ class the_code( Process ):
 			migration    = 0.05,
 			migrationSendFcn = self.migrationSendFcn,
 			migrationRecvFcn = self.migrationRecvFcn,
+			# don't wait on the neighbours, take migrants as they arrive
+			migrationAsync   = True,
 			parents      = 0.80,
 			chromoClass  = MyChromo,
 			minOrMax     = 'max',
@@ -215,8 +220,9 @@ class the_code( Process ):
 		# for add number of migrants, we need the sends to be balanced at the TID level
 		# : so all TIDs send the smaller chunk to prev-tid and larger chunk to next-tid
 		cutoff = len(migrants)//2
-		commMgr.isend( prev_pe, 123, migrants[:cutoff] )
-		commMgr.isend( next_pe, 123, migrants[cutoff:] )
+		# : migrants go out as packed buffers (data+fitness), not pickled chromos
+		commMgr.isendMigrants( prev_pe, 123, migrants[:cutoff] )
+		commMgr.isendMigrants( next_pe, 123, migrants[cutoff:] )
 		return
 
 	def migrationRecvFcn( self ):
@@ -225,8 +231,11 @@ class the_code( Process ):
 		commMgr = self.commMgr
 		prev_pe = ( tid + num_pes - 1 ) % num_pes
 		next_pe = ( tid + 1 ) % num_pes
-		x,y,data1 = commMgr.recv( prev_pe, 123 )
-		x,y,data2 = commMgr.recv( next_pe, 123 )
+		# : unpacked migrants keep their fitness, so they are not re-evaluated
+		# : with migrationAsync, this is called every generation and only
+		#   picks up what has arrived so far (no waiting)
+		data1 = commMgr.irecvMigrants( prev_pe, 123, self.proto )
+		data2 = commMgr.irecvMigrants( next_pe, 123, self.proto )
 		# put all data into one list
 		data1.extend( data2 )
 		# print( 'tid '+str(tid)+' recv fr tids '+str(prev_pe)+' and '+str(next_pe)+' dsize='+str(len(data1)) )